@@ -0,0 +1,302 @@
+"""
+Record-and-replay backtesting for the sniper's entry and exit rules.
+
+    python backtest.py record --out market.jsonl --duration 3600
+
+Polls the market like the sniper and, for every new coin, its holders (and its
+coin data now and then) for the monitoring window, without trading. Every
+response is written with its timestamp. Needs the session cookie the GUI saves.
+A live headless run on the threaded engine records the same way when
+"record_path" is set in its config.
+
+    python backtest.py replay market.jsonl --monitor-duration 120 --new-holders 2
+
+Replays a recording on a virtual clock through the sniper's own NewCoinDetector,
+HolderMonitor and calculate_sell_amount, much faster than real time. It reports
+which coins the strategy would have sniped, and when and how each would have exited.
+"""
+import argparse
+import bisect
+import collections
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import botcore
+
+
+class Recording:
+    """The responses of a recording, indexed by path and kept in time order."""
+    def __init__(self, path):
+        self._times = collections.defaultdict(list)
+        self._bodies = collections.defaultdict(list)
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # Torn last line
+        entries.sort(key=lambda entry: entry["t"])
+        for entry in entries:
+            self._times[entry["path"]].append(entry["t"])
+            self._bodies[entry["path"]].append(entry["body"])
+        self.count = len(entries)
+        self.start = entries[0]["t"] if entries else None
+        self.end = entries[-1]["t"] if entries else None
+
+    def at(self, url, t):
+        """The latest body recorded for `url` at or before time `t`, or None."""
+        key = botcore.ResponseRecorder.key(url)
+        index = bisect.bisect_right(self._times.get(key, ()), t)
+        return self._bodies[key][index - 1] if index else None
+
+    def after(self, url, t):
+        """The first body recorded for `url` at or after time `t`, or None."""
+        key = botcore.ResponseRecorder.key(url)
+        index = bisect.bisect_left(self._times.get(key, ()), t)
+        bodies = self._bodies.get(key, ())
+        return bodies[index] if index < len(bodies) else None
+
+
+class VirtualClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class ReplayAPI:
+    """Answers the sniper's API calls with the latest recorded response at the virtual time."""
+    def __init__(self, recording, clock):
+        self.recording = recording
+        self.clock = clock
+
+    def _fetch(self, url, decode=None):
+        body = self.recording.at(url, self.clock())
+        if body is None:
+            return {'error': 'Not recorded yet.'}
+        try:
+            return (decode or botcore.loads_json)(body)
+        except ValueError as e:
+            return {'error': f"Recorded response is not valid: {e}"}
+
+    def get_latest_listings(self):
+        return self._fetch(botcore.SCAN_WINDOW_API_URL, botcore.decode_coin_listings)
+
+    def get_recent_listings(self):
+        return self._fetch(botcore.MARKET_API_URL, botcore.decode_coin_listings)
+
+    def get_holder_page(self, token_symbol, offset=0):
+        return self._fetch(botcore.HOLDERS_API_URL_TEMPLATE.format(token_symbol=token_symbol, offset=offset), botcore.decode_holder_set)
+
+    def get_coin(self, token_symbol):
+        return self._fetch(botcore.COIN_API_URL_TEMPLATE.format(token_symbol=token_symbol))
+
+    def get_portfolio(self):
+        return self._fetch(botcore.PORTFOLIO_API_URL)
+
+
+def coin_field(coin_data, field):
+    value = (coin_data.get('coin') or {}).get(field)
+    return None if value is None else float(value)
+
+
+# --- Record ---
+
+def record(args):
+    session_cookie = botcore.load_session_cookie(os.path.expanduser(args.cookie_path))
+    if not session_cookie:
+        sys.exit(f"No saved session at {args.cookie_path}. Log in once with tradingbot.py first.")
+    recorder = botcore.ResponseRecorder(args.out)
+    recorder.start()
+    api = botcore.RugplayHTTPAPI(None, session_cookie, recorder=recorder)
+    executor = ThreadPoolExecutor(max_workers=botcore.HOLDER_MONITOR_PIPELINE, thread_name_prefix="record")
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda sig, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda sig, frame: stop_event.set())
+
+    def poll_holders(item):
+        token_symbol, (_, tracker) = item
+        tracker.poll(lambda offset: api.get_holder_page(token_symbol, offset))
+
+    detector = botcore.NewCoinDetector()
+    watched = {}  # symbol -> (monotonic time to stop polling its holders, HolderTracker reading every page)
+    started = next_scan = next_tick = time.monotonic()
+    deadline = started + args.duration if args.duration else None
+    polls = 0
+    print(f"[RECORD] Recording to {args.out}. Press Ctrl+C to stop.")
+    try:
+        while not stop_event.is_set() and (deadline is None or time.monotonic() < deadline):
+            now = time.monotonic()
+            if now >= next_scan:
+                next_scan += args.scan_interval
+                listings = api.get_latest_listings()
+                if not isinstance(listings, dict):
+                    watermark = detector.watermark
+                    new_coins, gap = detector.process(listings, botcore.SCAN_WINDOW_SIZE)
+                    if gap:
+                        recent_listings = api.get_recent_listings()
+                        more_coins = detector.fill_gap([] if isinstance(recent_listings, dict) else recent_listings, watermark)
+                        new_coins += more_coins
+                    for coin in new_coins:
+                        print(f"[RECORD] New coin {coin.symbol}; watching its holders for {args.watch:.0f}s.")
+                        watched[coin.symbol] = (now + args.watch, botcore.HolderTracker(stop_on_join=False))
+                        api.get_coin(coin.symbol)
+
+            if now >= next_tick:
+                next_tick += args.tick
+                polls += 1
+                for token_symbol in [s for s, (until, _) in watched.items() if now >= until]:
+                    del watched[token_symbol]
+                list(executor.map(poll_holders, list(watched.items())))
+                if polls % args.coin_every == 0:
+                    list(executor.map(api.get_coin, list(watched)))
+                if polls % args.portfolio_every == 0:
+                    api.get_portfolio()
+
+            stop_event.wait(max(min(next_scan, next_tick) - time.monotonic(), 0))
+    finally:
+        executor.shutdown()
+        api.close()
+        recorder.close()
+    print(f"[RECORD] Stopped after {time.monotonic() - started:.0f}s.")
+
+
+# --- Replay ---
+
+class SimulatedSnipe:
+    def __init__(self, coin, detected_at, entry_price):
+        self.symbol = coin.symbol
+        self.created_at = coin.created_at
+        self.detected_at = detected_at
+        self.entry_price = entry_price
+        self.exited_at = None
+        self.new_buyer_found = None
+        self.holder_count = None
+        self.exit_action = None
+
+
+def replay(recording, scan_interval, tick, monitor_duration, new_holders, buy_amount, sell_fraction):
+    """Runs the sniper's decision logic over a recording and returns its SimulatedSnipes in detection order."""
+    clock = VirtualClock(recording.start)
+    api = ReplayAPI(recording, clock)
+    detector = botcore.NewCoinDetector()
+    # Never started, so _poll_once() polls inline on the virtual clock
+    monitor = botcore.HolderMonitor(lambda: api, tick=tick, new_holders=new_holders, clock=clock)
+    snipes = []
+
+    def on_exit(snipe, new_buyer_found, holder_count):
+        snipe.exited_at = clock.now
+        snipe.new_buyer_found = new_buyer_found
+        snipe.holder_count = holder_count
+        # Same sizing as the API sell worker: the holding from the entry price, the pool from coin data
+        coin_data = api.get_coin(snipe.symbol)
+        pool_coin_amount = coin_field(coin_data, 'poolCoinAmount') if 'error' not in coin_data else None
+        if snipe.entry_price:
+            amount, pool_limited = botcore.calculate_sell_amount(buy_amount / snipe.entry_price, pool_coin_amount, sell_fraction)
+            snipe.exit_action = f"max {amount}" if pool_limited else f"{int(sell_fraction * 100)}% {amount}"
+
+    next_scan = next_tick = recording.start
+    end = recording.end
+    while min(next_scan, next_tick) <= end:
+        clock.now = min(next_scan, next_tick)
+        if clock.now == next_scan:
+            next_scan += scan_interval
+            listings = api.get_latest_listings()
+            if not isinstance(listings, dict):
+                watermark = detector.watermark
+                new_coins, gap = detector.process(listings, botcore.SCAN_WINDOW_SIZE)
+                if gap:
+                    recent_listings = api.get_recent_listings()
+                    more_coins = detector.fill_gap([] if isinstance(recent_listings, dict) else recent_listings, watermark)
+                    new_coins = sorted(new_coins + more_coins, key=botcore.NewCoinDetector.sort_key)
+                for coin in new_coins:
+                    # The recorder fetches coin data right after detecting a coin, so use the first sample
+                    coin_body = recording.after(botcore.COIN_API_URL_TEMPLATE.format(token_symbol=coin.symbol), clock.now)
+                    entry_price = coin_field(botcore.loads_json(coin_body), 'currentPrice') if coin_body else None
+                    snipe = SimulatedSnipe(coin, clock.now, entry_price)
+                    snipes.append(snipe)
+                    monitor.add_position(coin.symbol, f"Sim-{len(snipes)}",
+                                         lambda p, found, count, snipe=snipe: on_exit(snipe, found, count),
+                                         duration=monitor_duration)
+        if clock.now == next_tick:
+            next_tick += tick
+            monitor._poll_once()
+    return snipes
+
+
+def print_replay_report(snipes, recording):
+    exited = [s for s in snipes if s.exited_at is not None]
+    by_buyer = [s for s in exited if s.new_buyer_found]
+    print(f"\n{'symbol':<12}{'launch->detect ms':>18}{'detect->exit s':>16}  {'exit':<12}{'holders':>8}  action")
+    for snipe in snipes:
+        detect_ms = f"{(snipe.detected_at - snipe.created_at) * 1000:.0f}" if snipe.created_at else "-"
+        if snipe.exited_at is None:
+            hold, reason = "-", "still open"
+        else:
+            hold, reason = f"{snipe.exited_at - snipe.detected_at:.1f}", "new buyer" if snipe.new_buyer_found else "timeout"
+        holders = snipe.holder_count if snipe.holder_count is not None else "-"
+        print(f"{snipe.symbol:<12}{detect_ms:>18}{hold:>16}  {reason:<12}{holders:>8}  {snipe.exit_action or '-'}")
+
+    holds = [s.exited_at - s.detected_at for s in by_buyer]
+    print(f"\nRecording: {recording.count} responses over {recording.end - recording.start:.0f}s")
+    print(f"Snipes: {len(snipes)} | exited on a new buyer: {len(by_buyer)} | timed out: {len(exited) - len(by_buyer)} "
+          f"| still open at the end: {len(snipes) - len(exited)}")
+    if holds:
+        print(f"Time to new buyer: p50={botcore.percentile(holds, 50):.1f}s p99={botcore.percentile(holds, 99):.1f}s")
+
+
+def run_replay(args):
+    recording = Recording(args.recording)
+    if not recording.count:
+        sys.exit(f"{args.recording} holds no responses.")
+    started = time.monotonic()
+    snipes = replay(recording, args.scan_interval, args.tick, args.monitor_duration, args.new_holders,
+                    args.buy_amount, args.sell_fraction)
+    print_replay_report(snipes, recording)
+    print(f"Replayed in {time.monotonic() - started:.2f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "snipes": [vars(s) for s in snipes]}, f, indent=2)
+        print(f"Snipes written to {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record market responses and replay the sniper strategy against them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Record market, holders, coin and portfolio responses.")
+    record_parser.add_argument("--out", required=True, help="JSONL file to append responses to.")
+    record_parser.add_argument("--duration", type=float, help="Seconds to record, default until Ctrl+C.")
+    record_parser.add_argument("--cookie-path", default=botcore.SESSION_COOKIE_PATH, help="Saved session cookie.")
+    record_parser.add_argument("--scan-interval", type=float, default=botcore.SNIPER_SCAN_INTERVAL, help="Seconds between market polls.")
+    record_parser.add_argument("--tick", type=float, default=botcore.HOLDER_MONITOR_TICK, help="Seconds between holder polls.")
+    record_parser.add_argument("--watch", type=float, default=botcore.SNIPER_MONITOR_DURATION, help="Seconds to poll each new coin's holders.")
+    record_parser.add_argument("--coin-every", type=int, default=5, help="Record coin data every N holder polls.")
+    record_parser.add_argument("--portfolio-every", type=int, default=30, help="Record the portfolio every N holder polls.")
+
+    replay_parser = commands.add_parser("replay", help="Replay a recording on a virtual clock.")
+    replay_parser.add_argument("recording", help="JSONL file written by 'record' or a headless run's record_path.")
+    replay_parser.add_argument("--scan-interval", type=float, default=botcore.SNIPER_SCAN_INTERVAL, help="Seconds between market polls.")
+    replay_parser.add_argument("--tick", type=float, default=botcore.HOLDER_MONITOR_TICK, help="Seconds between holder polls.")
+    replay_parser.add_argument("--monitor-duration", type=float, default=botcore.SNIPER_MONITOR_DURATION, help="Seconds to wait for new holders before selling anyway.")
+    replay_parser.add_argument("--new-holders", type=int, default=1, help="New holders that trigger the exit.")
+    replay_parser.add_argument("--buy-amount", type=float, default=10.0, help="USD per snipe, for sell sizing.")
+    replay_parser.add_argument("--sell-fraction", type=float, default=botcore.SNIPER_SELL_FRACTION, help="Share of the holding sold when the pool allows.")
+    replay_parser.add_argument("--json", help="Write the simulated snipes to this file.")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args)
+    else:
+        run_replay(args)
+
+
+if __name__ == "__main__":
+    main()
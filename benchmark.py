@@ -0,0 +1,157 @@
+"""
+End-to-end latency benchmark for the sniper pipeline, run offline against
+mock_server.py.
+
+Coins are launched on a schedule, the sniper detects and buys them, an outside
+buyer joins a fixed delay after each buy and the position is sold. Latencies
+are measured on the mock server's clock:
+
+    launch->buy     coin launch until the bot's BUY reaches the server
+    buy->sell       the bot's BUY until its first SELL
+    trigger->sell   the outside buyer joining until the bot's first SELL
+
+Usage:  python benchmark.py --coins 20 --interval 2 --buyer-delay 1 --latency 0.02
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from mock_server import MockRugplay
+
+
+class BenchBridge:
+    """Stands in for TkBridge: runs callbacks inline and only prints status lines when verbose."""
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+
+    def post(self, callback, *args):
+        callback(*args)
+
+    def status(self, gui_message, console_message=None, is_error=False):
+        if self.verbose or is_error:
+            print(f"{'[ERROR]' if is_error else '[BENCH]'} {console_message or gui_message}")
+
+
+def start_engine(botcore, engine_name, bridge, buy_amount):
+    """Starts the named sniper engine against the mock and returns an object with stop()."""
+    if engine_name == "asyncio":
+        if botcore.aiohttp is None:
+            sys.exit("The asyncio engine needs aiohttp: pip install aiohttp")
+        engine = botcore.AsyncSniperEngine(bridge, "session=benchmark", lambda: buy_amount)
+        engine.start()
+        return engine
+    if engine_name == "threads":
+        # The threaded engine sells through the API when no browser sell worker is given
+        api = botcore.RugplayHTTPAPI(None, "session=benchmark")
+        trade_client = botcore.TradeClient(bridge, lambda: api, lambda: "session=benchmark")
+        engine = botcore.ThreadedSniperEngine(bridge, lambda: api, trade_client, lambda: buy_amount)
+        engine.start()
+        return engine
+    sys.exit(f"Unknown engine: {engine_name}")
+
+
+def collect_latencies(mock):
+    """Pairs the mock's launch/buyer/trade events per coin into latency samples (seconds)."""
+    launches = {e["symbol"]: e["at"] for e in mock.events_of("launch")}
+    buyers, buys, sells = {}, {}, {}
+    for event in mock.events_of("buyer"):
+        buyers.setdefault(event["symbol"], event["at"])
+    for event in mock.events_of("trade"):
+        target = buys if event["side"] == "BUY" else sells
+        target.setdefault(event["symbol"], event["at"])
+
+    results = {"launch->buy": [], "buy->sell": [], "trigger->sell": []}
+    for symbol, launched_at in launches.items():
+        if symbol in buys:
+            results["launch->buy"].append(buys[symbol] - launched_at)
+        if symbol in buys and symbol in sells:
+            results["buy->sell"].append(sells[symbol] - buys[symbol])
+        if symbol in buyers and symbol in sells:
+            results["trigger->sell"].append(sells[symbol] - buyers[symbol])
+    return results
+
+
+def print_stage_report(trace_recorder):
+    rows = trace_recorder.summary()
+    if not rows:
+        return
+    print(f"\n{'bot stage':<36}{'n':>5}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for transition, count, p50, p99, worst, _ in rows:
+        print(f"{transition:<36}{count:>5}{p50:>10.1f}{p99:>10.1f}{worst:>10.1f}")
+
+
+def print_report(botcore, results, launched, request_counts):
+    print(f"\n{'stage':<16}{'n':>5}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, samples in results.items():
+        p50, p99 = botcore.percentile(samples, 50), botcore.percentile(samples, 99)
+        worst = max(samples) if samples else None
+        cells = [f"{v * 1000:>10.1f}" if v is not None else f"{'-':>10}" for v in (p50, p99, worst)]
+        print(f"{stage:<16}{len(samples):>5}{''.join(cells)}")
+    print(f"\nCoins launched: {launched} | bought: {len(results['launch->buy'])} | sold: {len(results['buy->sell'])}")
+    print("Requests: " + ", ".join(f"{k}={v}" for k, v in sorted(request_counts.items())))
+
+
+def run(args):
+    mock = MockRugplay(auto_buyer_delay=args.buyer_delay, etags=args.etags, rate_limit=args.rate_limit)
+    for endpoint in ("market", "coin", "holders", "portfolio", "trade"):
+        mock.set_latency(endpoint, args.latency)
+    base_url = mock.start()
+
+    # The bot builds its URLs from RUGPLAY_BASE_URL at import time
+    os.environ["RUGPLAY_BASE_URL"] = base_url
+    import botcore
+    if args.scan_hedge is not None:
+        botcore.SNIPER_SCAN_HEDGE = args.scan_hedge
+
+    engine = start_engine(botcore, args.engine, BenchBridge(args.verbose), args.buy_amount)
+    try:
+        time.sleep(args.warmup)
+        for i in range(args.coins):
+            mock.launch_coin(f"BENCH{i:03d}")
+            # Jitter the gaps so launches land at random points of the scanner's poll cycle
+            time.sleep(args.interval * random.uniform(0.5, 1.5))
+
+        deadline = time.monotonic() + args.timeout
+        while time.monotonic() < deadline and len({e["symbol"] for e in mock.events_of("trade") if e["side"] == "SELL"}) < args.coins:
+            time.sleep(0.2)
+    finally:
+        engine.stop()
+        mock.stop()
+
+    results = collect_latencies(mock)
+    print_report(botcore, results, args.coins, mock.request_counts)
+    print_stage_report(engine.trace_recorder)
+    cache = engine.cache if args.engine == "asyncio" else engine.get_api().cache
+    if cache:
+        print(f"Response cache: {cache.summary()}")
+    if botcore.rate_scheduler():
+        print(f"Rate scheduler: {botcore.rate_scheduler().summary()}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "samples": results, "requests": mock.request_counts}, f, indent=2)
+        print(f"Samples written to {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sniper latency against the local mock server.")
+    parser.add_argument("--engine", default="threads", choices=["asyncio", "threads"], help="Sniper engine to drive.")
+    parser.add_argument("--coins", type=int, default=20, help="Number of coins to launch.")
+    parser.add_argument("--interval", type=float, default=2.0, help="Mean seconds between launches.")
+    parser.add_argument("--buyer-delay", type=float, default=1.0, help="Seconds after each bot BUY before an outside buyer joins.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latency injected into every endpoint, in seconds.")
+    parser.add_argument("--buy-amount", type=float, default=10.0, help="USD per snipe.")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds to let the scanner baseline before launching.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for outstanding sells after the last launch.")
+    parser.add_argument("--scan-hedge", type=int, help="Scanner polls kept in flight (overrides SNIPER_SCAN_HEDGE).")
+    parser.add_argument("--etags", action="store_true", help="Have the mock send ETags, so polls are revalidated with 304s.")
+    parser.add_argument("--rate-limit", type=int, help="Have the mock answer requests beyond N per second with 429.")
+    parser.add_argument("--json", help="Write raw samples to this file for later comparison.")
+    parser.add_argument("--verbose", action="store_true", help="Print the bot's status lines.")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3330 @@
+"""
+Bot engines, API clients and helpers shared by the Tk app (tradingbot.py) and the
+headless scripts. Nothing here needs tkinter, selenium or a Chrome install.
+"""
+import time
+from datetime import datetime
+import json
+import csv
+import threading
+import math
+import signal
+import sys
+import random
+import os
+import shutil
+import tempfile
+import itertools
+import collections
+import heapq
+import hashlib
+import email.utils
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import queue
+import socket
+import select
+import ssl
+import http.client
+import urllib.parse
+import requests
+import requests.adapters
+
+try:
+    from selenium.common.exceptions import WebDriverException  # Optional: only a live browser driver raises it
+except ImportError:
+    class WebDriverException(Exception):
+        """Stand-in when selenium is not installed; without it no driver exists to raise one."""
+
+try:
+    import aiohttp  # Optional: only needed for SNIPER_ENGINE = "asyncio"
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson  # Optional: faster JSON decoding on the hot paths
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow  # Optional: only needed to export the trade journal as Parquet
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+# --- Configuration & Constants ---
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:140.0) Gecko/20100101 Firefox/140.0"
+
+# API backend: "http" talks to the site through one pooled keep-alive requests
+# session (Chrome is only needed for login), "browser" runs fetch() inside Chrome.
+API_BACKEND = "http"
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = 10
+
+# Polled GET responses are cached per URL (LRU, RESPONSE_CACHE_SIZE entries).
+# Entries younger than their endpoint's TTL in seconds are served without a
+# request; older ones are revalidated with ETag/Last-Modified when the server
+# sent them, and an unchanged body (304 or same content hash) reuses the result
+# decoded last time. Endpoints missing from RESPONSE_CACHE_TTLS are not cached.
+RESPONSE_CACHE = True
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTLS = {"market": 0, "holders": 0, "coin": 1.0}
+
+# Every API request takes a token from its endpoint's bucket and from the
+# site-wide bucket, each given as (requests per second, burst). When requests
+# queue up, lower priority numbers go first: trades, then the scanner, then
+# holder and coin polls, then portfolio fetches. A 429 pauses the endpoint for
+# its Retry-After (or RATE_LIMIT_PENALTY seconds) and halves its rate, which then
+# recovers by RATE_LIMIT_RECOVERY of the configured rate per successful response.
+RATE_LIMITING = True
+RATE_LIMIT_GLOBAL = (20.0, 20)
+RATE_LIMITS = {"trade": (10.0, 5), "market": (6.0, 6), "holders": (12.0, 12), "coin": (6.0, 6), "portfolio": (2.0, 4)}
+RATE_LIMIT_PRIORITIES = {"trade": 0, "market": 1, "holders": 2, "coin": 2, "portfolio": 3}
+RATE_LIMIT_PENALTY = 2.0
+RATE_LIMIT_RECOVERY = 0.05
+
+# Sniper engine: "threads" runs the scanner, buyer and workers as OS threads,
+# "asyncio" runs them all as coroutines on one event loop (requires aiohttp).
+SNIPER_ENGINE = "threads"
+SNIPER_SCAN_INTERVAL = 0.5
+# Staggered scanning: up to this many newest-coin polls in flight, one sent every
+# SNIPER_SCAN_INTERVAL / K seconds, so detection does not wait on one slow
+# response. K is capped to what the "market" rate limit allows; 1 polls serially.
+SNIPER_SCAN_HEDGE = 2
+SNIPER_MONITOR_INTERVAL = 1.0
+SNIPER_MONITOR_DURATION = 180
+SNIPER_SELL_FRACTION = 0.80
+SNIPER_MAX_SELL_ATTEMPTS = 10
+
+# Keep a sniper BUY pre-armed (warm connection, precomputed request and amount) on
+# the HTTP backend; the connection and amount are refreshed this often in seconds.
+SNIPER_PREARM = True
+PREARM_REFRESH_INTERVAL = 10
+
+# How many recently seen coin symbols the scanner remembers besides its createdAt watermark
+SEEN_COIN_INDEX_SIZE = 1000
+
+# Every coin seen and every position opened is indexed on disk so restarts neither
+# double-buy nor forget open positions. If the last detection is at most
+# COIN_INDEX_RESUME_WINDOW seconds old the scanner resumes from the index instead
+# of re-baselining, so coins launched during a quick restart are still sniped.
+COIN_INDEX_PATH = os.path.expanduser("~/.rugplay_coin_index.sqlite3")
+COIN_INDEX_RESUME_WINDOW = 60
+
+# Snipe queue ordering: None buys in detection order, "newest" buys the most
+# recently detected coin first, or pass a callable scoring a SnipeEntry (higher first).
+SNIPE_QUEUE_PRIORITY = None
+
+# One central monitor polls holders for every open position on a shared tick.
+# At most HOLDER_MONITOR_BATCH_SIZE coins are polled per tick (round-robin, least
+# recently polled first), with up to HOLDER_MONITOR_PIPELINE requests in flight.
+HOLDER_MONITOR_TICK = SNIPER_MONITOR_INTERVAL
+HOLDER_MONITOR_BATCH_SIZE = 8
+HOLDER_MONITOR_PIPELINE = 4
+
+# Holder tracking reads the holders endpoint a page at a time (offset/totalHolders)
+# and diffs the holder sets by user, reading at most HOLDERS_MAX_PAGES pages per poll.
+HOLDERS_PAGE_SIZE = 50
+HOLDERS_MAX_PAGES = 10
+
+# Share of the pool's coin reserve a single sell may take before the trade panel
+# caps it with "Max sellable". The API reports the reserve but not the limit, so
+# this is an estimate of the site's rule, not a value read from it. After a failed
+# sell the next one is capped at POOL_SELL_RETRY_FACTOR of the failed amount.
+POOL_MAX_SELL_RATIO = 0.995
+POOL_SELL_RETRY_FACTOR = 0.8
+
+# Logging: in-memory history is a fixed-size ring buffer, console and file output
+# are written in batches by a background thread into a size-rotated log file.
+LOG_HISTORY_SIZE = 5000
+LOG_HISTORY_WINDOW_LINES = 1000
+LOG_FILE_PATH = os.path.expanduser("~/rugplay_tradingbot.log")
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 3
+LOG_FLUSH_INTERVAL = 0.5
+
+# Every trade outcome is appended to this JSONL journal (see journal_export.py)
+TRADE_JOURNAL_PATH = os.path.expanduser("~/rugplay_trades.jsonl")
+
+# Per-snipe stage timing: how many finished traces to keep and where to export them
+SNIPE_TRACE_HISTORY = 1000
+SNIPE_TRACE_EXPORT_PATH = os.path.expanduser("~/rugplay_snipe_traces.json")
+SNIPE_TRACE_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 60000)
+
+# The GUI saves the session cookie here after login so headless.py can reuse it
+SESSION_COOKIE_PATH = os.path.expanduser("~/.rugplay_session_cookie")
+
+# A background SessionMonitor validates the session every SESSION_CHECK_INTERVAL
+# seconds (free when a portfolio fetch succeeded within that window) and re-reads
+# the cookies every SESSION_COOKIE_POLL seconds, swapping rotated ones into every
+# client. A failed check first re-reads the cookies, then reloads the page; the
+# browser is only restarted after SESSION_RESTART_AFTER failed checks in a row.
+SESSION_CHECK_INTERVAL = 30
+SESSION_COOKIE_POLL = 5
+SESSION_RESTART_AFTER = 3
+
+# Portfolio refreshes requested within this many seconds of each other share one fetch
+PORTFOLIO_REFRESH_DEBOUNCE = 0.25
+
+# URLs
+BASE_URL = os.environ.get("RUGPLAY_BASE_URL", "https://rugplay.com")  # Override to target mock_server.py
+PORTFOLIO_API_URL = f"{BASE_URL}/api/portfolio/total"
+MARKET_API_URL = f"{BASE_URL}/api/market?sortBy=createdAt&sortOrder=desc&limit=50"
+NEWEST_COIN_API_URL = f"{BASE_URL}/api/market?sortBy=createdAt&sortOrder=desc&limit=1"
+SCAN_WINDOW_SIZE = 5
+SCAN_WINDOW_API_URL = f"{BASE_URL}/api/market?sortBy=createdAt&sortOrder=desc&limit={SCAN_WINDOW_SIZE}"
+HOLDERS_API_URL_TEMPLATE = f"{BASE_URL}/api/coin/{{token_symbol}}/holders?limit={HOLDERS_PAGE_SIZE}&offset={{offset}}"
+COIN_API_URL_TEMPLATE = f"{BASE_URL}/api/coin/{{token_symbol}}"
+TRADE_API_URL_TEMPLATE = f"{BASE_URL}/api/coin/{{token_symbol}}/trade"
+SESSION_API_URL = f"{BASE_URL}/api/auth/get-session"  # {"user": {"id": ...}} for the logged-in account
+
+
+def api_endpoint(url):
+    """Names the API endpoint a URL belongs to: market, portfolio, coin, holders, trade, or None."""
+    parts = urllib.parse.urlsplit(url).path.strip("/").split("/")
+    if parts[:2] == ["api", "market"]:
+        return "market"
+    if parts[:2] == ["api", "portfolio"]:
+        return "portfolio"
+    if parts[:2] == ["api", "coin"] and len(parts) in (3, 4):
+        return parts[3] if len(parts) == 4 else "coin"
+    return None
+
+
+class CachedResponse:
+    """One cached GET: the body, its content hash, its decoded result and the server's validators."""
+    __slots__ = ("digest", "body", "result", "etag", "last_modified", "stored_at")
+
+    def __init__(self, digest, body, result, etag, last_modified, stored_at):
+        self.digest = digest
+        self.body = body
+        self.result = result
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+
+class ResponseCache:
+    """
+    LRU cache of decoded GET responses for the endpoints in `ttls`, keyed by URL
+    and decoder. An entry younger than its endpoint's TTL is served as is;
+    otherwise the backend revalidates it with request_headers() and hands the
+    answer to not_modified() (a 304) or store(). store() only decodes a body
+    whose content hash differs from the cached one, so an unchanged poll returns
+    the very same result object and callers can skip it with an `is` check.
+    Thread-safe; stats() reports hits, 304s, unchanged bodies, misses and evictions.
+    """
+    def __init__(self, ttls=None, max_entries=RESPONSE_CACHE_SIZE, clock=time.monotonic):
+        self.ttls = RESPONSE_CACHE_TTLS if ttls is None else ttls
+        self.max_entries = max_entries
+        self.clock = clock
+        self.counters = dict.fromkeys(("hits", "not_modified", "unchanged", "misses", "evictions"), 0)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def cacheable(self, url):
+        return api_endpoint(url) in self.ttls
+
+    def fresh(self, url, decode=None):
+        """The cached result if it is younger than its endpoint's TTL, else None."""
+        ttl = self.ttls.get(api_endpoint(url))
+        if not ttl:
+            return None
+        with self._lock:
+            entry = self._entries.get((url, decode))
+            if entry is None or self.clock() - entry.stored_at >= ttl:
+                return None
+            self._entries.move_to_end((url, decode))
+            self.counters["hits"] += 1
+            return entry.result
+
+    def request_headers(self, url, decode=None):
+        """Conditional-request headers for the cached entry, empty when the server sent no validators."""
+        with self._lock:
+            entry = self._entries.get((url, decode))
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def not_modified(self, url, decode=None):
+        """For a 304: refreshes the entry and returns (body, result), or None if it was evicted meanwhile."""
+        with self._lock:
+            entry = self._entries.get((url, decode))
+            if entry is None:
+                return None
+            entry.stored_at = self.clock()
+            self._entries.move_to_end((url, decode))
+            self.counters["not_modified"] += 1
+            return entry.body, entry.result
+
+    def store(self, url, body, decode=None, etag=None, last_modified=None):
+        """Returns `decode(body)`, reusing the cached result when the body is unchanged. Raises ValueError like decode."""
+        if not self.cacheable(url):
+            return (decode or loads_json)(body)
+        key = (url, decode)
+        digest = hashlib.blake2b(body if isinstance(body, bytes) else body.encode(), digest_size=16).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest:
+                entry.etag, entry.last_modified, entry.stored_at = etag, last_modified, self.clock()
+                self._entries.move_to_end(key)
+                self.counters["unchanged"] += 1
+                return entry.result
+
+        result = (decode or loads_json)(body)
+        with self._lock:
+            self._entries[key] = CachedResponse(digest, body, result, etag, last_modified, self.clock())
+            self._entries.move_to_end(key)
+            self.counters["misses"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+        return result
+
+    def invalidate(self, url):
+        """Drops every cached result for `url`, e.g. a coin's data after trading it."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == url]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries))
+
+    def summary(self):
+        return " ".join(f"{name}={count}" for name, count in self.stats().items())
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """`rate` tokens per second up to `burst`. A 429 halves the rate and pauses the bucket until `paused_until`."""
+    __slots__ = ("base_rate", "rate", "burst", "tokens", "updated", "paused_until")
+
+    def __init__(self, rate, burst, now):
+        self.base_rate = self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = now
+        self.paused_until = 0.0
+
+    def refill(self, now):
+        if now > self.paused_until:
+            self.tokens = min(self.burst, self.tokens + (now - max(self.updated, self.paused_until)) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        if now < self.paused_until:
+            return self.paused_until - now
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+
+class RateScheduler:
+    """
+    Process-wide request pacing. acquire(endpoint) blocks until both the
+    endpoint's bucket and the global bucket have a token; when several callers
+    wait, the one with the lowest priority number whose endpoint has a token gets
+    the next global token. report() feeds response statuses back: a 429 pauses
+    the endpoint for its Retry-After and halves its rate, successes restore it.
+    Get the shared instance with rate_scheduler().
+    """
+    def __init__(self, limits=None, global_limit=RATE_LIMIT_GLOBAL, priorities=None, clock=time.monotonic):
+        self.clock = clock
+        self.priorities = RATE_LIMIT_PRIORITIES if priorities is None else priorities
+        now = clock()
+        self._global = TokenBucket(*global_limit, now)
+        self._buckets = {endpoint: TokenBucket(rate, burst, now)
+                         for endpoint, (rate, burst) in (RATE_LIMITS if limits is None else limits).items()}
+        self._waiters = []
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+        self.counters = dict.fromkeys(("granted", "waited", "throttled"), 0)
+        self.wait_seconds = 0.0
+
+    def acquire(self, endpoint):
+        """Blocks until a request to `endpoint` may be sent."""
+        priority = self.priorities.get(endpoint, max(self.priorities.values(), default=0) + 1)
+        ticket = (priority, next(self._tickets), endpoint)
+        started = self.clock()
+        with self._cond:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    delay = self._delay(ticket)
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                self._grant(endpoint, started)
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+    async def acquire_async(self, endpoint):
+        """acquire() for coroutines: the delay is worked out under the lock, the wait is an asyncio.sleep."""
+        if self.try_acquire(endpoint):
+            return
+        priority = self.priorities.get(endpoint, max(self.priorities.values(), default=0) + 1)
+        ticket = (priority, next(self._tickets), endpoint)
+        started = self.clock()
+        with self._cond:
+            self._waiters.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._delay(ticket)
+                    if delay <= 0:
+                        self._grant(endpoint, started)
+                        return
+                await asyncio.sleep(delay)
+        finally:
+            with self._cond:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+    def _grant(self, endpoint, started):
+        """Takes the tokens for a waiter whose delay has run out. Called with the lock held."""
+        self._global.tokens -= 1.0
+        bucket = self._buckets.get(endpoint)
+        if bucket:
+            bucket.tokens -= 1.0
+        self.counters["granted"] += 1
+        waited = self.clock() - started
+        if waited > 0.001:
+            self.counters["waited"] += 1
+            self.wait_seconds += waited
+
+    def try_acquire(self, endpoint):
+        """Takes a token without waiting; False if none is free or someone is already queued."""
+        with self._cond:
+            if self._waiters:
+                return False
+            now = self.clock()
+            bucket = self._buckets.get(endpoint)
+            self._global.refill(now)
+            if bucket:
+                bucket.refill(now)
+            if self._global.wait_time(now) > 0 or (bucket and bucket.wait_time(now) > 0):
+                return False
+            self._global.tokens -= 1.0
+            if bucket:
+                bucket.tokens -= 1.0
+            self.counters["granted"] += 1
+            return True
+
+    def report(self, endpoint, status, retry_after=None):
+        """Adapts `endpoint`'s bucket to a response status and its Retry-After header."""
+        bucket = self._buckets.get(endpoint)
+        if bucket is None or status is None:
+            return
+        with self._cond:
+            if status == 429:
+                delay = parse_retry_after(retry_after)
+                bucket.paused_until = max(bucket.paused_until, self.clock() + (RATE_LIMIT_PENALTY if delay is None else delay))
+                bucket.rate = max(bucket.rate / 2, bucket.base_rate * RATE_LIMIT_RECOVERY)
+                bucket.tokens = min(bucket.tokens, 0.0)
+                self.counters["throttled"] += 1
+            elif status < 500 and bucket.rate < bucket.base_rate:
+                bucket.rate = min(bucket.base_rate, bucket.rate + bucket.base_rate * RATE_LIMIT_RECOVERY)
+
+    def _delay(self, ticket):
+        """Seconds `ticket` should still wait (0 when it may go now). Called with the lock held."""
+        now = self.clock()
+        self._global.refill(now)
+        for bucket in self._buckets.values():
+            bucket.refill(now)
+        bucket = self._buckets.get(ticket[2])
+        delay = bucket.wait_time(now) if bucket else 0.0
+        if delay > 0:
+            return delay
+        delay = self._global.wait_time(now)
+        if delay > 0:
+            return delay
+        for other in self._waiters:
+            # A more urgent caller whose own endpoint is ready gets the global token first
+            other_bucket = self._buckets.get(other[2])
+            if other < ticket and not (other_bucket and other_bucket.wait_time(now) > 0):
+                return 0.005
+        return 0.0
+
+    def stats(self):
+        with self._cond:
+            rates = {endpoint: round(bucket.rate, 2) for endpoint, bucket in self._buckets.items() if bucket.rate < bucket.base_rate}
+            return dict(self.counters, wait_seconds=round(self.wait_seconds, 3), reduced_rates=rates)
+
+    def summary(self):
+        return " ".join(f"{name}={value}" for name, value in self.stats().items())
+
+
+_rate_scheduler = None
+_rate_scheduler_lock = threading.Lock()
+
+
+def rate_scheduler():
+    """The RateScheduler shared by every API backend, engine and trade path, or None when RATE_LIMITING is off."""
+    global _rate_scheduler
+    if not RATE_LIMITING:
+        return None
+    with _rate_scheduler_lock:
+        if _rate_scheduler is None:
+            _rate_scheduler = RateScheduler()
+        return _rate_scheduler
+
+
+class RugplayAPI:
+    """
+    Handles all JavaScript-based API interactions with rugplay.com. Polled
+    endpoints go through `cache` (a ResponseCache, None when RESPONSE_CACHE is off).
+    """
+    def __init__(self, driver):
+        self.driver = driver
+        self.cache = ResponseCache() if RESPONSE_CACHE else None
+
+    def _fetch(self, url, decode=None):
+        """Generic method to execute a fetch request and return JSON, or `decode(text)` if given."""
+        cache = self.cache if self.cache and self.cache.cacheable(url) else None
+        if cache:
+            result = cache.fresh(url, decode)
+            if result is not None:
+                return result
+        scheduler = rate_scheduler()
+        js_script = f"""
+            return fetch('{url}', {{ headers: {{ 'Content-Type': 'application/json', 'User-Agent': '{USER_AGENT}' }} }})
+            .then(response => response.text())
+            .catch(error => JSON.stringify({{'error': error.message, 'status': 'fetch_failed'}}));
+        """
+        try:
+            if not self.is_browser_open():
+                return {'error': 'Browser is not open.'}
+            if scheduler:
+                scheduler.acquire(api_endpoint(url))
+            response_text = self.driver.execute_script(js_script)
+
+            # Handle cases where the API returns an HTML login page instead of JSON
+            if response_text.strip().startswith('<'):
+                return {'error': 'API returned HTML. Session may be invalid.'}
+
+            # fetch() gives no validators here, so the cache can only skip decoding an unchanged body
+            if cache:
+                return cache.store(url, response_text, decode)
+            return (decode or loads_json)(response_text)
+        except (WebDriverException, ValueError) as e:
+            return {'error': f"API fetch failed: {e}"}
+
+    def get_portfolio(self):
+        return self._fetch(PORTFOLIO_API_URL)
+
+    def get_recent_coins(self):
+        return self._fetch(MARKET_API_URL)
+
+    def get_newest_coin(self):
+        return self._fetch(NEWEST_COIN_API_URL)
+
+    def get_latest_listings(self):
+        """Newest coins in the scan window as CoinListing records, or an {'error': ...} dict."""
+        return self._fetch(SCAN_WINDOW_API_URL, decode_coin_listings)
+
+    def get_recent_listings(self):
+        return self._fetch(MARKET_API_URL, decode_coin_listings)
+
+    def get_token_holders(self, token_symbol):
+        url = HOLDERS_API_URL_TEMPLATE.format(token_symbol=token_symbol, offset=0)
+        return self._fetch(url)
+
+    def get_holder_page(self, token_symbol, offset=0):
+        """One page of holders as a HolderSet record, or an {'error': ...} dict."""
+        url = HOLDERS_API_URL_TEMPLATE.format(token_symbol=token_symbol, offset=offset)
+        return self._fetch(url, decode_holder_set)
+
+    def get_coin(self, token_symbol):
+        url = COIN_API_URL_TEMPLATE.format(token_symbol=token_symbol)
+        return self._fetch(url)
+
+    def is_ready(self):
+        """Whether API calls can be made; the in-page backend needs its browser."""
+        return self.is_browser_open()
+
+    def is_browser_open(self):
+        """Checks if the Selenium browser instance is still alive."""
+        if not self.driver:
+            return False
+        try:
+            _ = self.driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    def close(self):
+        """Releases backend resources. The browser itself is owned by the caller."""
+        pass
+
+
+class RugplayHTTPAPI(RugplayAPI):
+    """
+    Browserless API backend. Uses the captured session cookie with one pooled,
+    keep-alive requests session instead of a WebDriver round trip per call.
+    The driver is only kept so callers can still check on the login browser.
+    Every GET response is also handed to `recorder` (a ResponseRecorder) if given.
+    """
+    def __init__(self, driver, session_cookie, recorder=None):
+        super().__init__(driver)
+        self.recorder = recorder
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Referer': f'{BASE_URL}/',
+        })
+        self.set_session_cookie(session_cookie)
+
+    def set_session_cookie(self, session_cookie):
+        self.session.headers['Cookie'] = session_cookie
+
+    def is_ready(self):
+        return bool(self.session.headers.get('Cookie'))
+
+    def get_user_id(self):
+        """The logged-in user's id as the holders API lists it, or None if the session endpoint does not tell."""
+        data = self._fetch(SESSION_API_URL)
+        user = data.get('user') if isinstance(data, dict) else None
+        if not isinstance(user, dict) or user.get('id') is None:
+            return None
+        return str(user['id'])
+
+    def _fetch(self, url, decode=None):
+        """
+        Performs a GET on the pooled session and returns JSON, or `decode(body)` if given.
+        Cached endpoints are requested conditionally and unchanged bodies are not decoded again.
+        """
+        cache = self.cache if self.cache and self.cache.cacheable(url) else None
+        try:
+            if cache:
+                result = cache.fresh(url, decode)
+                if result is not None:
+                    return result
+            response = self._get(url, cache.request_headers(url, decode) if cache else None)
+            if response.status_code == 304 and cache:
+                cached = cache.not_modified(url, decode)
+                if cached:
+                    response_body, result = cached
+                    if self.recorder:
+                        self.recorder.record(url, response_body)
+                    return result
+                response = self._get(url)  # Evicted meanwhile; fetch it in full
+            response_body = response.content
+            if self.recorder:
+                self.recorder.record(url, response_body)
+
+            # Handle cases where the API returns an HTML login page instead of JSON
+            if response_body.lstrip().startswith(b'<'):
+                return {'error': 'API returned HTML. Session may be invalid.'}
+
+            if cache and response.status_code == 200:
+                return cache.store(url, response_body, decode, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return (decode or loads_json)(response_body)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return {'error': f"API fetch failed: {e}"}
+
+    def _get(self, url, headers=None):
+        """One GET, paced and reported through the shared rate scheduler."""
+        endpoint = api_endpoint(url)
+        scheduler = rate_scheduler()
+        if scheduler:
+            scheduler.acquire(endpoint)
+        response = self.session.get(url, timeout=HTTP_TIMEOUT, headers=headers)
+        if scheduler:
+            scheduler.report(endpoint, response.status_code, response.headers.get('Retry-After'))
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+def calculate_sell_amount(quantity, pool_coin_amount=None, fraction=SNIPER_SELL_FRACTION, cap=None):
+    """
+    Applies the bots' sell rule to API data instead of the trade panel text.
+    Returns (amount, pool_limited): the pool-limited maximum when the pool caps
+    the sale, otherwise `fraction` of the holding. `cap` (see retry_sell_cap)
+    bounds the sale after the server refused a larger one; a capped sale counts
+    as pool-limited, so the caller keeps selling the rest.
+    """
+    amount, pool_limited = math.floor(quantity * fraction), False
+    if pool_coin_amount is not None:
+        max_sellable = math.floor(float(pool_coin_amount) * POOL_MAX_SELL_RATIO)
+        if max_sellable < quantity:
+            amount, pool_limited = max(max_sellable, 0), True
+    if cap is not None and amount > cap:
+        amount, pool_limited = max(math.floor(cap), 0), True
+    return amount, pool_limited
+
+
+def retry_sell_cap(failed_amount):
+    """Cap for the sell after one of `failed_amount` failed, in case POOL_MAX_SELL_RATIO overestimates the pool limit."""
+    return math.floor(failed_amount * POOL_SELL_RETRY_FACTOR)
+
+
+def save_session_cookie(session_cookie, path=SESSION_COOKIE_PATH):
+    """Writes the session cookie to a file only the current user can read."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(session_cookie)
+
+
+def cookie_header(cookies):
+    """Joins WebDriver cookies into a Cookie header, sorted by name so an unchanged jar gives the same string."""
+    return "; ".join(f"{c['name']}={c['value']}" for c in sorted(cookies, key=lambda c: c['name']))
+
+
+def session_expired(result):
+    """Whether an API result shows a dead session (the site answered with its HTML login page or 401)."""
+    if not isinstance(result, dict):
+        return False
+    message = str(result.get('error') or result.get('message') or '')
+    return 'HTML' in message or 'unauthorized' in message.lower()
+
+
+def load_session_cookie(path=SESSION_COOKIE_PATH):
+    """Returns the saved session cookie, or None if there is none."""
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def find_holding_quantity(portfolio_data, token_symbol):
+    """Returns the held quantity of a token from a portfolio response, or None if unknown."""
+    if 'error' in portfolio_data or 'coinHoldings' not in portfolio_data:
+        return None
+    holding = next((h for h in portfolio_data['coinHoldings'] if h.get("symbol") == token_symbol), None)
+    return float(holding.get("quantity", 0.0)) if holding else 0.0
+
+
+class LogSink:
+    """
+    Background log writer. Lines are queued without blocking, then echoed to
+    stdout and appended to a size-rotated log file in batches.
+    """
+    def __init__(self, path=LOG_FILE_PATH, max_bytes=LOG_FILE_MAX_BYTES, backup_count=LOG_FILE_BACKUP_COUNT,
+                 flush_interval=LOG_FLUSH_INTERVAL, echo=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.echo = echo
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, line):
+        self._queue.put(line)
+
+    def close(self, timeout=2):
+        """Flushes everything queued so far and stops the writer."""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            self._file = open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            print(f"[ERROR] Could not open log file {self.path}: {e}")
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < 1000:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [line for line in batch if line is not None]
+            if batch:
+                self._write_batch("\n".join(batch) + "\n")
+        if self._file:
+            self._file.close()
+
+    def _write_batch(self, text):
+        if self.echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        if not self._file:
+            return
+        try:
+            self._file.write(text)
+            self._file.flush()
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            print(f"[ERROR] Log file write failed: {e}")
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w" if self.backup_count == 0 else "a", encoding="utf-8")
+
+
+class TradeJournal(LogSink):
+    """
+    Append-only trade journal: one JSON object per line, queued without blocking
+    and written in batches by the LogSink writer thread. The file is never rotated.
+    BUY amounts are USD and SELL amounts are coins; `cost`/`proceeds` are USD
+    from the trade response when it reports them.
+    """
+    FIELDS = ("ts", "account", "strategy", "worker", "symbol", "side", "amount", "outcome",
+              "latency_ms", "cost", "proceeds", "coins", "message")
+
+    def __init__(self, path=TRADE_JOURNAL_PATH, flush_interval=LOG_FLUSH_INTERVAL):
+        super().__init__(path, max_bytes=float('inf'), backup_count=0, flush_interval=flush_interval, echo=False)
+
+    def record(self, symbol, side, amount, outcome, worker, strategy, latency=None, result=None, account="main", message=None):
+        """`outcome` is 'ok', 'failed' (rejected by the server) or 'error'; `latency` is in seconds."""
+        self.write(json.dumps({
+            "ts": time.time(), "account": account, "strategy": strategy, "worker": worker,
+            "symbol": symbol, "side": side.upper(), "amount": None if amount is None else float(amount),
+            "outcome": outcome, "latency_ms": None if latency is None else round(latency * 1000, 3),
+            "cost": result.total_cost if result else None,
+            "proceeds": result.total_received if result else None,
+            "coins": (result.coins_bought if side.upper() == 'BUY' else result.coins_sold) if result else None,
+            "message": message,
+        }))
+
+
+def read_journal(path=TRADE_JOURNAL_PATH):
+    """Loads every record of a trade journal, skipping a torn last line."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+SNIPE_PNL_FIELDS = ("account", "symbol", "bought_at", "closed_at", "hold_s", "buy_latency_ms",
+                    "cost", "proceeds", "pnl", "pnl_pct", "sells", "complete")
+
+
+def snipe_pnl(records):
+    """
+    One row per sniped position (account, symbol): USD cost of its buy, USD
+    proceeds of its sells and the realized PnL (coins still held count as zero).
+    `complete` is False when a sell did not report its proceeds (browser sells),
+    in which case PnL is left empty.
+    """
+    snipes = {}
+    for record in records:
+        if record.get("strategy") != "sniper" or record.get("outcome") != "ok":
+            continue
+        key = (record.get("account"), record["symbol"])
+        if record["side"] == "BUY":
+            snipes[key] = {"account": key[0], "symbol": key[1], "bought_at": record["ts"], "closed_at": None,
+                           "buy_latency_ms": record.get("latency_ms"),
+                           "cost": record.get("cost") if record.get("cost") is not None else record.get("amount"),
+                           "proceeds": 0.0, "sells": 0, "complete": True}
+        elif key in snipes:
+            snipe = snipes[key]
+            snipe["sells"] += 1
+            snipe["closed_at"] = record["ts"]
+            if record.get("proceeds") is None:
+                snipe["complete"] = False
+            else:
+                snipe["proceeds"] += record["proceeds"]
+
+    rows = []
+    for snipe in snipes.values():
+        complete = snipe["complete"] and snipe["sells"] > 0
+        pnl = snipe["proceeds"] - snipe["cost"] if complete and snipe["cost"] is not None else None
+        rows.append(dict(snipe, complete=complete, pnl=pnl,
+                         hold_s=snipe["closed_at"] - snipe["bought_at"] if snipe["closed_at"] else None,
+                         pnl_pct=pnl / snipe["cost"] * 100 if pnl is not None and snipe["cost"] else None,
+                         proceeds=snipe["proceeds"] if snipe["sells"] else None))
+    rows.sort(key=lambda row: row["bought_at"])
+    return rows
+
+
+def write_table(rows, columns, path):
+    """Writes dict rows as Parquet when `path` ends in .parquet (needs pyarrow), otherwise as CSV."""
+    if path.endswith(".parquet"):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+        table = pyarrow.table({column: [row.get(column) for row in rows] for column in columns})
+        pyarrow.parquet.write_table(table, path)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class ResponseRecorder(LogSink):
+    """
+    Records API responses for backtest.py: one JSON line per response with its
+    wall-clock time, its path (without the base URL, so recordings replay against
+    any host) and the raw body. Written in batches like the log.
+    """
+    def __init__(self, path, flush_interval=LOG_FLUSH_INTERVAL):
+        super().__init__(path, max_bytes=float('inf'), backup_count=0, flush_interval=flush_interval, echo=False)
+
+    @staticmethod
+    def key(url):
+        parts = urllib.parse.urlsplit(url)
+        return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+    def record(self, url, body):
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", "replace")
+        self.write(json.dumps({"t": time.time(), "path": self.key(url), "body": body}))
+
+
+def parse_created_at(value):
+    """Converts an API createdAt string to a UTC timestamp, or None if it is missing or malformed."""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError, TypeError):
+        return None
+
+
+def loads_json(text):
+    """Parses JSON with orjson when it is installed, else the standard library."""
+    return orjson.loads(text) if orjson else json.loads(text)
+
+
+class CoinListing:
+    """A market row reduced to what the scanner uses; `created_at` is a UTC timestamp or None."""
+    __slots__ = ("symbol", "created_at")
+
+    def __init__(self, symbol, created_at):
+        self.symbol = symbol
+        self.created_at = created_at
+
+    def __repr__(self):
+        return f"CoinListing({self.symbol!r}, {self.created_at!r})"
+
+
+class HolderSet:
+    """A page of holders reduced to user -> quantity, plus the reported totalHolders."""
+    __slots__ = ("holders", "total")
+
+    def __init__(self, holders, total=None):
+        self.holders = holders
+        self.total = total
+
+
+class TradeResult:
+    """The fields of a trade response the bots and the ledger read."""
+    __slots__ = ("success", "message", "new_balance", "coins_bought", "coins_sold", "total_cost", "total_received")
+
+    def __init__(self, success, message=None, new_balance=None, coins_bought=None, coins_sold=None,
+                 total_cost=None, total_received=None):
+        self.success = success
+        self.message = message
+        self.new_balance = new_balance
+        self.coins_bought = coins_bought
+        self.coins_sold = coins_sold
+        self.total_cost = total_cost
+        self.total_received = total_received
+
+
+def _optional_float(value):
+    return None if value is None else float(value)
+
+
+def decode_coin_listings(text):
+    """Decodes a market response into CoinListing records. Raises ValueError if it is malformed."""
+    try:
+        return [CoinListing(coin['symbol'], parse_created_at(coin.get('createdAt')))
+                for coin in loads_json(text)['coins'] if coin.get('symbol')]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Unexpected market response: {e!r}")
+
+
+def decode_holder_set(text):
+    """Decodes a holders response into a HolderSet. Raises ValueError if it is malformed."""
+    try:
+        data = loads_json(text)
+        return HolderSet({str(h.get('userId') or h.get('username')): float(h.get('quantity') or 0.0) for h in data['holders']},
+                         data.get('totalHolders'))
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Unexpected holders response: {e!r}")
+
+
+def decode_trade_result(text):
+    """Decodes a trade response into a TradeResult. Raises ValueError if it is malformed."""
+    try:
+        data = loads_json(text)
+        return TradeResult(bool(data.get('success')), data.get('message'),
+                           _optional_float(data.get('newBalance')),
+                           _optional_float(data.get('coinsBought')), _optional_float(data.get('coinsSold')),
+                           _optional_float(data.get('totalCost')), _optional_float(data.get('totalReceived')))
+    except (TypeError, AttributeError) as e:
+        raise ValueError(f"Unexpected trade response: {e!r}")
+
+
+class HolderDiff:
+    """What changed between two holder polls: `joined`/`left` map user -> quantity, `changed` user -> (old, new)."""
+    __slots__ = ("joined", "left", "changed", "hidden_joins", "total")
+
+    def __init__(self, joined, left, changed, hidden_joins, total):
+        self.joined = joined
+        self.left = left
+        self.changed = changed
+        self.hidden_joins = hidden_joins
+        self.total = total
+
+    def __bool__(self):
+        return bool(self.joined or self.left or self.changed or self.hidden_joins)
+
+
+class HolderTracker:
+    """
+    The last known holder set of one coin, keyed by user. Each poll walks the
+    holder pages (offset/totalHolders) and diffs them against the previous set,
+    so joins are seen even when the count does not move (a sell and a buy in the
+    same second) or sits past the first page. With `stop_on_join` a poll stops
+    paging at the first page that shows a new user. Leaves are only reported when
+    every page was read; joins beyond `max_pages` show up as `hidden_joins`,
+    estimated from the growth of totalHolders.
+
+    Drive it with poll(fetch_page) or, from async code, begin_poll() then
+    add_page() while next_offset is not None, then end_poll(). When every page
+    is the same object the response cache returned last time, nothing is diffed.
+    """
+    def __init__(self, page_size=HOLDERS_PAGE_SIZE, max_pages=HOLDERS_MAX_PAGES, stop_on_join=True):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.stop_on_join = stop_on_join
+        self.holders = None
+        self.total = None
+        self.next_offset = None
+        self._seen = None
+        self._seen_total = None
+        self._pages = 0
+        self._complete = False
+        self._page_objects = []
+        self._last_page_objects = []
+
+    def poll(self, fetch_page):
+        """`fetch_page(offset)` returns a HolderSet or an {'error': ...} dict. Returns end_poll()."""
+        self.begin_poll()
+        while self.next_offset is not None:
+            self.add_page(fetch_page(self.next_offset))
+        return self.end_poll()
+
+    def begin_poll(self):
+        self.next_offset = 0
+        self._seen = {}
+        self._seen_total = None
+        self._pages = 0
+        self._complete = False
+        self._last_page_objects, self._page_objects = self._page_objects, []
+
+    def add_page(self, page):
+        if isinstance(page, dict):  # {'error': ...}; keep what the earlier pages showed
+            self.next_offset = None
+            return
+        self._pages += 1
+        self._page_objects.append(page)
+        self._seen.update(page.holders)
+        self._seen_total = page.total if page.total is not None else len(self._seen)
+        offset = self.next_offset + len(page.holders)
+        if len(page.holders) < self.page_size or offset >= self._seen_total:
+            self._complete = True
+            self.next_offset = None
+        elif self._pages >= self.max_pages:
+            self.next_offset = None
+        elif self.stop_on_join and self.holders is not None and any(user not in self.holders for user in page.holders):
+            self.next_offset = None  # The answer is known; the rest can wait for the next poll
+        else:
+            self.next_offset = offset
+
+    def end_poll(self):
+        """Returns the HolderDiff since the previous poll: an empty one for the first poll, None if nothing was read."""
+        if not self._pages:
+            return None
+        seen, total = self._seen, self._seen_total
+        if self.holders is None:
+            self.holders, self.total = dict(seen), total
+            return HolderDiff({}, {}, {}, 0, total)
+        if len(self._page_objects) == len(self._last_page_objects) and \
+                all(page is last for page, last in zip(self._page_objects, self._last_page_objects)):
+            return HolderDiff({}, {}, {}, 0, total)  # Every page came back unchanged from the response cache
+
+        joined = {user: quantity for user, quantity in seen.items() if user not in self.holders}
+        changed = {user: (self.holders[user], quantity) for user, quantity in seen.items()
+                   if user in self.holders and quantity != self.holders[user]}
+        left = {user: quantity for user, quantity in self.holders.items() if user not in seen} if self._complete else {}
+        hidden_joins = 0
+        if not self._complete and self.total is not None:
+            hidden_joins = max(total - self.total - len(joined), 0)
+
+        self.holders.update(seen)
+        for user in left:
+            del self.holders[user]
+        self.total = total
+        return HolderDiff(joined, left, changed, hidden_joins, total)
+
+
+class NewCoinDetector:
+    """
+    Gap-free new-coin detection over CoinListing records. Keeps a createdAt
+    watermark plus a bounded index of seen symbols, and reports every unseen
+    coin at or after the watermark exactly once, oldest first. The first batch
+    it sees only sets the baseline. When process() reports a gap, run the wider
+    listing through fill_gap() with the watermark from before that window pass.
+    """
+    def __init__(self, seen_limit=SEEN_COIN_INDEX_SIZE):
+        self.seen_limit = seen_limit
+        self.watermark = None
+        self.newest_symbol = None
+        self.initialized = False
+        self._seen = collections.OrderedDict()
+
+    def is_seen(self, token_symbol):
+        return token_symbol in self._seen
+
+    def mark_seen(self, token_symbol, created_ts=None):
+        self._seen[token_symbol] = created_ts
+        self._seen.move_to_end(token_symbol)
+        while len(self._seen) > self.seen_limit:
+            self._seen.popitem(last=False)
+        if created_ts is not None and (self.watermark is None or created_ts >= self.watermark):
+            self.watermark = created_ts
+            self.newest_symbol = token_symbol
+
+    def baseline(self, coins):
+        for coin in sorted(coins, key=self.sort_key):
+            self.mark_seen(coin.symbol, coin.created_at)
+        self.initialized = True
+
+    def process(self, coins, window_size=None):
+        """
+        Returns (new_coins, gap). `gap` is True when every coin in a full window
+        was new, meaning more launches may lie beyond it.
+        """
+        if not self.initialized:
+            self.baseline(coins)
+            return [], False
+
+        new_coins = self._unseen(coins, self.watermark)
+        gap = bool(window_size) and len(coins) >= window_size and len(new_coins) == len(coins)
+        for coin in new_coins:
+            self.mark_seen(coin.symbol, coin.created_at)
+        return new_coins, gap
+
+    def fill_gap(self, coins, watermark):
+        """
+        Returns the unseen coins of a wider listing fetched after process() reported
+        a gap. `watermark` is the one from before that window pass: the window's own
+        coins have since raised it past every coin in the gap.
+        """
+        new_coins = self._unseen(coins, watermark)
+        for coin in new_coins:
+            self.mark_seen(coin.symbol, coin.created_at)
+        return new_coins
+
+    def _unseen(self, coins, watermark):
+        new_coins = []
+        for coin in coins:
+            if coin.symbol in self._seen:
+                continue
+            created_ts = coin.created_at
+            if watermark is not None and created_ts is not None and created_ts < watermark:
+                continue
+            new_coins.append(coin)
+        return sorted(new_coins, key=self.sort_key)
+
+    @staticmethod
+    def sort_key(coin):
+        return coin.created_at if coin.created_at is not None else float('inf')
+
+
+class CoinIndex:
+    """
+    On-disk index (SQLite, WAL mode) of every coin the scanner has seen and every
+    position each account opened, mirrored in dicts so lookups on the scan and buy
+    paths are O(1). Everything is loaded once at startup; writes go straight to
+    the database. Times are wall-clock (time.time()) so they survive restarts.
+    """
+    def __init__(self, path=COIN_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._coins = {}       # symbol -> (created_at, detected_at)
+        self._positions = {}   # (symbol, account) -> {'buy_amount', 'bought_at', 'buy_outcome', 'sold_at', 'sell_outcome'}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS coins (symbol TEXT PRIMARY KEY, created_at REAL, detected_at REAL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS positions (symbol TEXT, account TEXT, buy_amount REAL, bought_at REAL, "
+                           "buy_outcome TEXT, sold_at REAL, sell_outcome TEXT, PRIMARY KEY (symbol, account))")
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        for symbol, created_at, detected_at in self._conn.execute("SELECT symbol, created_at, detected_at FROM coins"):
+            self._coins[symbol] = (created_at, detected_at)
+        for symbol, account, buy_amount, bought_at, buy_outcome, sold_at, sell_outcome in self._conn.execute(
+                "SELECT symbol, account, buy_amount, bought_at, buy_outcome, sold_at, sell_outcome FROM positions"):
+            self._positions[(symbol, account)] = {'buy_amount': buy_amount, 'bought_at': bought_at, 'buy_outcome': buy_outcome,
+                                                  'sold_at': sold_at, 'sell_outcome': sell_outcome}
+
+    def coin_count(self):
+        return len(self._coins)
+
+    def is_seen(self, token_symbol):
+        return token_symbol in self._coins
+
+    def record_seen(self, coins, detected_at=None):
+        """Adds any CoinListing not yet indexed; coins already in the index keep their first detection time."""
+        detected_at = detected_at or time.time()
+        with self._lock:
+            rows = [(coin.symbol, coin.created_at, detected_at) for coin in coins if coin.symbol not in self._coins]
+            if not rows:
+                return
+            for symbol, created_at, _ in rows:
+                self._coins[symbol] = (created_at, detected_at)
+            if self._conn is None:
+                return
+            self._conn.executemany("INSERT OR IGNORE INTO coins VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def seed(self, detector, resume_window=COIN_INDEX_RESUME_WINDOW):
+        """
+        Marks the most recent indexed coins as seen by `detector`. If the last
+        detection is within `resume_window` seconds the detector resumes from the
+        index instead of re-baselining, so coins launched during a quick restart
+        are still sniped. Returns True when it resumed.
+        """
+        with self._lock:
+            recent = sorted(self._coins.items(), key=lambda item: item[1][0] if item[1][0] is not None else float('-inf'))
+            recent = recent[-detector.seen_limit:]
+            last_detected = max((detected_at for _, (_, detected_at) in recent if detected_at), default=None)
+        for symbol, (created_at, _) in recent:
+            detector.mark_seen(symbol, created_at)
+        resumed = bool(recent) and last_detected is not None and time.time() - last_detected <= resume_window
+        detector.initialized = detector.initialized or resumed
+        return resumed
+
+    def claim_buy(self, token_symbol, account):
+        """
+        Reserves a buy of `token_symbol` for `account`; False if that account already tried it.
+        The 'pending' claim is written to disk before the buy is sent, so a crash mid-buy
+        still counts as an attempt after a restart.
+        """
+        with self._lock:
+            key = (token_symbol, account)
+            if key in self._positions:
+                return False
+            self._positions[key] = {'buy_amount': None, 'bought_at': None, 'buy_outcome': 'pending',
+                                    'sold_at': None, 'sell_outcome': None}
+            self._store(key)
+            return True
+
+    def record_buy(self, token_symbol, account, amount, success):
+        self._write_position(token_symbol, account, buy_amount=amount, bought_at=time.time(),
+                             buy_outcome='bought' if success else 'failed')
+
+    def record_sell(self, token_symbol, account, sold=None):
+        """Records the end of a position: 'sold', 'unsold', or 'closed' when the seller reported no outcome."""
+        outcome = 'closed' if sold is None else ('sold' if sold else 'unsold')
+        self._write_position(token_symbol, account, sold_at=time.time(), sell_outcome=outcome)
+
+    def _write_position(self, token_symbol, account, **fields):
+        with self._lock:
+            position = self._positions.setdefault((token_symbol, account), {
+                'buy_amount': None, 'bought_at': None, 'buy_outcome': None, 'sold_at': None, 'sell_outcome': None})
+            position.update(fields)
+            self._store((token_symbol, account))
+
+    def _store(self, key):
+        """Writes one position row; the caller holds the lock."""
+        if self._conn is None:  # Closed; late sells still update the in-memory view
+            return
+        position = self._positions[key]
+        self._conn.execute("INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           (*key, position['buy_amount'], position['bought_at'],
+                            position['buy_outcome'], position['sold_at'], position['sell_outcome']))
+        self._conn.commit()
+
+    def position(self, token_symbol, account):
+        return self._positions.get((token_symbol, account))
+
+    def open_positions(self, account):
+        """Symbols `account` bought and has not recorded as sold out, oldest first."""
+        with self._lock:
+            held = [(p['bought_at'] or 0, symbol) for (symbol, acct), p in self._positions.items()
+                    if acct == account and p['buy_outcome'] == 'bought' and p['sell_outcome'] not in ('sold', 'closed')]
+        return [symbol for _, symbol in sorted(held)]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (None for an empty list)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    # The smallest value with at least pct% of the list at or below it
+    rank = max(math.ceil(pct * len(ordered) / 100.0), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class SnipeTrace:
+    """
+    Monotonic timestamps for each stage boundary of one snipe: poll_sent,
+    detected, dequeued, request_sent, response_received, trigger_fired,
+    worker_ready, sell_attempt (repeated) and sold.
+    """
+    def __init__(self, token_symbol):
+        self.token_symbol = token_symbol
+        self.wall_started = time.time()
+        self.marks = []
+
+    def mark(self, stage, at=None):
+        self.marks.append((stage, at if at is not None else time.monotonic()))
+
+    def transitions(self):
+        """Returns [("stage_a->stage_b", seconds), ...] between consecutive marks."""
+        return [(f"{a}->{b}", tb - ta) for (a, ta), (b, tb) in zip(self.marks, self.marks[1:])]
+
+    def to_dict(self):
+        origin = self.marks[0][1] if self.marks else 0.0
+        return {
+            'symbol': self.token_symbol,
+            'started': datetime.fromtimestamp(self.wall_started).isoformat(timespec='milliseconds'),
+            'marks_ms': [[stage, round((at - origin) * 1000, 3)] for stage, at in self.marks],
+        }
+
+
+class TraceRecorder:
+    """Aggregates finished snipe traces into per-stage latency samples and histograms."""
+    def __init__(self, history=SNIPE_TRACE_HISTORY, buckets_ms=SNIPE_TRACE_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._traces = collections.deque(maxlen=history)
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=history))
+        self._histograms = collections.defaultdict(lambda: [0] * (len(buckets_ms) + 1))
+        self._lock = threading.Lock()
+
+    def finish(self, trace):
+        if trace is None:
+            return
+        with self._lock:
+            self._traces.append(trace)
+            for transition, seconds in trace.transitions():
+                ms = seconds * 1000
+                self._samples[transition].append(ms)
+                bucket = next((i for i, limit in enumerate(self.buckets_ms) if ms <= limit), len(self.buckets_ms))
+                self._histograms[transition][bucket] += 1
+
+    def summary(self):
+        """Returns one row per stage transition: (transition, count, p50_ms, p99_ms, max_ms, histogram)."""
+        with self._lock:
+            rows = []
+            for transition, samples in self._samples.items():
+                values = list(samples)
+                rows.append((transition, len(values), percentile(values, 50), percentile(values, 99), max(values),
+                             list(self._histograms[transition])))
+            return rows
+
+    def histogram_labels(self):
+        return [f"<={limit}ms" for limit in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+
+    def export(self, path=SNIPE_TRACE_EXPORT_PATH):
+        labels = self.histogram_labels()
+        with self._lock:
+            traces = [trace.to_dict() for trace in self._traces]
+        stages = [{'transition': t, 'count': n, 'p50_ms': p50, 'p99_ms': p99, 'max_ms': worst,
+                   'histogram': dict(zip(labels, hist))} for t, n, p50, p99, worst, hist in self.summary()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({'stages': stages, 'traces': traces}, f, indent=2)
+        return path
+
+
+class SnipeEntry:
+    """A detected coin waiting in the snipe queue."""
+    def __init__(self, token_symbol, coin=None, trace=None):
+        self.token_symbol = token_symbol
+        self.coin = coin or {}
+        self.trace = trace
+        self.enqueued_at = time.monotonic()
+        self.wait_time = None
+
+
+class SnipeQueue:
+    """
+    Thread-safe snipe queue. get() blocks until a coin is put (waking
+    immediately) or the queue is closed, and entries can be ordered by
+    detection order, newest-first or a pluggable score. Tracks depth and
+    queue wait-time stats.
+    """
+    def __init__(self, priority=SNIPE_QUEUE_PRIORITY):
+        if priority is None:
+            self._score = lambda entry, seq: -seq
+        elif priority == "newest":
+            self._score = lambda entry, seq: seq
+        elif callable(priority):
+            self._score = lambda entry, seq: priority(entry)
+        else:
+            raise ValueError(f"Unknown snipe queue priority: {priority!r}")
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.closed = False
+        self._enqueued = 0
+        self._dequeued = 0
+        self._max_depth = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def put(self, token_symbol, coin=None, trace=None):
+        entry = SnipeEntry(token_symbol, coin, trace)
+        with self._cond:
+            seq = next(self._seq)
+            heapq.heappush(self._heap, (-self._score(entry, seq), seq, entry))
+            self._enqueued += 1
+            self._max_depth = max(self._max_depth, len(self._heap))
+            self._cond.notify()
+        return entry
+
+    def get(self, timeout=None):
+        """Returns the next SnipeEntry, or None on timeout or once the queue is closed."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._heap or self.closed, timeout):
+                return None
+            if self.closed:
+                return None
+            entry = heapq.heappop(self._heap)[2]
+            entry.wait_time = time.monotonic() - entry.enqueued_at
+            self._dequeued += 1
+            self._total_wait += entry.wait_time
+            self._max_wait = max(self._max_wait, entry.wait_time)
+            return entry
+
+    def close(self):
+        """Wakes every waiting get() so consumer threads can exit."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._heap)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'depth': len(self._heap),
+                'max_depth': self._max_depth,
+                'enqueued': self._enqueued,
+                'dequeued': self._dequeued,
+                'avg_wait': self._total_wait / self._dequeued if self._dequeued else 0.0,
+                'max_wait': self._max_wait,
+            }
+
+
+class MonitoredPosition:
+    """One open position in the holder monitor's table and the new buyers seen since it opened."""
+    def __init__(self, key, token_symbol, worker_name, duration, on_trigger, trace=None, clock=time.monotonic, on_change=None):
+        self.key = key
+        self.token_symbol = token_symbol
+        self.worker_name = worker_name
+        self.deadline = clock() + duration
+        self.on_trigger = on_trigger
+        self.on_change = on_change
+        self.trace = trace
+        self.baseline = None
+        self.baseline_pending = True
+        self.baselined = False
+        self.new_buyers = set()
+        self.hidden_joins = 0
+
+    def new_buyer_count(self):
+        return len(self.new_buyers) + self.hidden_joins
+
+
+class HolderMonitor:
+    """
+    Polls holders for every open position from a single thread on a shared
+    schedule. Positions on the same coin share one HolderTracker, each tick polls
+    at most `batch_size` coins (least recently polled first) through a small
+    pipeline, and a position's `on_trigger(position, new_buyer_found, holder_count)`
+    is called once `new_holders` new users have bought or its monitoring window
+    ends; the coin is no longer polled once no position needs it. A position's
+    optional `on_change(position, diff)` gets every non-empty HolderDiff.
+    Joins by `ignore_users` (the bot's own accounts) never count as new buyers.
+    add_position() registers the position at once and reads the coin's holders on
+    the monitor's executor, so call it right after the buy response: the position's
+    diffs are evaluated once that snapshot is in, and anyone who joins after it counts.
+    The backtester drives _poll_once() itself on a virtual `clock` without start(),
+    in which case snapshots and polls run inline. AsyncSniperEngine drives it from
+    its event loop instead: open_position() and set_baseline() around its own
+    snapshot, then next_batch(), expire() and evaluate() on every tick.
+    """
+    def __init__(self, get_api, tick=HOLDER_MONITOR_TICK, batch_size=HOLDER_MONITOR_BATCH_SIZE,
+                 pipeline=HOLDER_MONITOR_PIPELINE, on_status=None, new_holders=1, clock=time.monotonic, ignore_users=None):
+        self.get_api = get_api
+        self.tick = tick
+        self.batch_size = batch_size
+        self.pipeline = pipeline
+        self.on_status = on_status or (lambda *args, **kwargs: None)
+        self.new_holders = new_holders
+        self.clock = clock
+        self.ignore_users = set(ignore_users or ())
+        self._positions = {}
+        self._last_polled = {}
+        self._trackers = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._executor = None
+
+    def start(self):
+        self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.pipeline, thread_name_prefix="holders")
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        with self._lock:
+            self._positions.clear()
+            self._last_polled.clear()
+            self._trackers.clear()
+
+    def add_position(self, token_symbol, worker_name, on_trigger, duration=SNIPER_MONITOR_DURATION, trace=None, on_change=None):
+        position = self.open_position(token_symbol, worker_name, on_trigger, duration, trace, on_change)
+        if self._executor and self._running:
+            # The caller is the buy loop: the snapshot must not hold up the next buy
+            self._executor.submit(self._take_baseline, position)
+        else:
+            self._take_baseline(position)
+        return position
+
+    def open_position(self, token_symbol, worker_name, on_trigger, duration=SNIPER_MONITOR_DURATION, trace=None, on_change=None):
+        """Registers a position without reading its holders; the caller hands its snapshot to set_baseline()."""
+        position = MonitoredPosition(worker_name, token_symbol, worker_name, duration, on_trigger, trace, self.clock, on_change)
+        with self._lock:
+            self._positions[position.key] = position
+            self._last_polled.setdefault(token_symbol, 0.0)
+        return position
+
+    def _take_baseline(self, position):
+        snapshot = None
+        try:
+            snapshot = self._snapshot(position.token_symbol)
+        finally:
+            self.set_baseline(position, snapshot)
+
+    def set_baseline(self, position, snapshot):
+        """
+        Sets a position's baseline from `snapshot`, a HolderTracker that has read the
+        coin's holders (None if they could not be read). Until then none of its coin's
+        diffs are evaluated for the position.
+        """
+        with self._lock:
+            if snapshot is not None:
+                position.baseline = set(snapshot.holders)
+            position.baseline_pending = False
+            if self._positions.get(position.key) is position and position.token_symbol not in self._trackers:
+                # A coin nobody else holds starts from the snapshot; its first diff is already past our buy
+                self._trackers[position.token_symbol] = snapshot or HolderTracker()
+
+    def _snapshot(self, token_symbol):
+        """A HolderTracker that has read the coin's current holders, or None if they could not be read."""
+        api = self.get_api()
+        if not api:
+            return None
+        tracker = HolderTracker()
+        if tracker.poll(lambda offset: api.get_holder_page(token_symbol, offset)) is None:
+            return None
+        return tracker
+
+    def remove_position(self, key):
+        with self._lock:
+            position = self._positions.pop(key, None)
+            if position and not any(p.token_symbol == position.token_symbol for p in self._positions.values()):
+                self._last_polled.pop(position.token_symbol, None)
+                self._trackers.pop(position.token_symbol, None)
+
+    def open_positions(self):
+        with self._lock:
+            return len(self._positions)
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while self._running:
+            next_tick += self.tick
+            self._poll_once()
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+        self._executor.shutdown(wait=False)
+
+    def _poll_once(self):
+        expired, trackers = self.next_batch()
+        self.expire(expired)
+        if not trackers:
+            return
+
+        api = self.get_api()
+        if not api:
+            return
+
+        def poll(item):
+            token_symbol, tracker = item
+            return token_symbol, tracker.poll(lambda offset: api.get_holder_page(token_symbol, offset))
+
+        for token_symbol, diff in (self._executor.map if self._executor else map)(poll, trackers):
+            if diff is not None:
+                self.evaluate(token_symbol, diff)
+
+    def next_batch(self):
+        """
+        One tick's work: the positions past their deadline, and up to `batch_size`
+        (token_symbol, tracker) pairs to poll, least recently polled first. Coins
+        whose first snapshot is still being read have no tracker yet and are skipped.
+        """
+        now = self.clock()
+        with self._lock:
+            expired = [p for p in self._positions.values() if now >= p.deadline]
+            due = sorted(self._last_polled, key=self._last_polled.get)[:self.batch_size]
+            for token_symbol in due:
+                self._last_polled[token_symbol] = now
+            trackers = [(token_symbol, self._trackers[token_symbol]) for token_symbol in due if token_symbol in self._trackers]
+        return expired, trackers
+
+    def expire(self, positions):
+        for position in positions:
+            self.on_status(f"[{position.worker_name}:{position.token_symbol}] Monitoring timed out. Selling anyway.")
+            self._fire(position, False, None)
+
+    def evaluate(self, token_symbol, diff):
+        """Applies one poll's HolderDiff to every position on the coin and fires the ones that are done."""
+        now = self.clock()
+        with self._lock:
+            positions = [p for p in self._positions.values() if p.token_symbol == token_symbol]
+        for position in positions:
+            log_prefix = f"[{position.worker_name}:{token_symbol}]"
+            if position.baseline_pending:
+                continue
+            if position.baseline is None and not position.baselined:
+                # No snapshot at open: a shared tracker's first diff may still show this position's own buy as a join
+                position.baselined = True
+                continue
+            if diff and position.on_change:
+                position.on_change(position, diff)
+            position.new_buyers.update(user for user in diff.joined
+                                       if user not in self.ignore_users and user not in (position.baseline or ()))
+            position.hidden_joins += diff.hidden_joins
+            time_left = int(position.deadline - now)
+            self.on_status(f"{log_prefix} Monitoring... {time_left}s left | Holders: {diff.total} | "
+                           f"New buyers: {position.new_buyer_count()}/{self.new_holders}")
+            if position.new_buyer_count() >= self.new_holders:
+                buyers = ", ".join(sorted(position.new_buyers)) or f"{position.hidden_joins} past the last page read"
+                self.on_status(f"✅ {log_prefix} New buyer detected ({buyers})! Holders: {diff.total}.")
+                self._fire(position, True, diff.total)
+
+    def _fire(self, position, new_buyer_found, holder_count):
+        with self._lock:
+            if self._positions.get(position.key) is not position:
+                return
+        self.remove_position(position.key)
+        if position.trace:
+            position.trace.mark("trigger_fired")
+        try:
+            position.on_trigger(position, new_buyer_found, holder_count)
+        except Exception as e:
+            self.on_status(f"❌ [{position.worker_name}:{position.token_symbol}] Exit trigger failed: {e}", is_error=True)
+
+
+class PortfolioLedger:
+    """
+    In-memory numeric cash balance and per-coin quantities. Trades update it
+    optimistically from their responses; portfolio snapshots reconcile it in the
+    background, except snapshots fetched before the latest trade finished (they
+    would roll it back) or while one is in flight (they may count it twice).
+    """
+    def __init__(self):
+        self.cash = None
+        self.holdings = {}
+        self.last_trade_at = 0.0
+        self.reconciled_at = None
+        self._trades_in_flight = 0
+        self._lock = threading.Lock()
+
+    def cash_balance(self):
+        """Available cash, or None until the first snapshot or trade response arrives."""
+        with self._lock:
+            return self.cash
+
+    def quantity(self, token_symbol):
+        """Held quantity of a coin, or None until the ledger has been reconciled."""
+        with self._lock:
+            if self.reconciled_at is None and token_symbol not in self.holdings:
+                return None
+            return self.holdings.get(token_symbol, 0.0)
+
+    def begin_trade(self):
+        """Call before sending a trade; pair with end_trade() whatever the outcome."""
+        with self._lock:
+            self._trades_in_flight += 1
+
+    def end_trade(self):
+        with self._lock:
+            self._trades_in_flight -= 1
+            self.last_trade_at = time.monotonic()
+
+    def apply_trade(self, token_symbol, trade_type, amount, result=None):
+        """Applies a successful trade using the TradeResult's new_balance/coins_bought/coins_sold when present."""
+        result = result or TradeResult(True)
+        with self._lock:
+            if result.new_balance is not None:
+                self.cash = result.new_balance
+            elif self.cash is not None:
+                if trade_type.upper() == 'BUY':
+                    self.cash -= result.total_cost or float(amount)
+                elif result.total_received is not None:
+                    self.cash += result.total_received
+
+            held = self.holdings.get(token_symbol, 0.0)
+            if trade_type.upper() == 'BUY':
+                if result.coins_bought is not None:
+                    self.holdings[token_symbol] = held + result.coins_bought
+            else:
+                remaining = held - (result.coins_sold or float(amount))
+                if remaining > 1e-9:
+                    self.holdings[token_symbol] = remaining
+                else:
+                    self.holdings.pop(token_symbol, None)
+            self.last_trade_at = time.monotonic()
+
+    def reconcile(self, portfolio_data, started_at):
+        """Replaces the ledger with a portfolio snapshot unless a trade landed after the fetch began."""
+        with self._lock:
+            if self._trades_in_flight or started_at < self.last_trade_at:
+                return False
+            self.cash = float(portfolio_data.get("baseCurrencyBalance", 0.0))
+            self.holdings = {h['symbol']: float(h.get('quantity', 0.0))
+                             for h in portfolio_data.get("coinHoldings", []) if h.get('symbol')}
+            self.reconciled_at = time.monotonic()
+            return True
+
+
+class PortfolioService:
+    """
+    Single-flight portfolio refresh. Requests are coalesced into at most one
+    fetch in flight plus one pending; requests arriving within the debounce
+    window share one fetch, and every caller waiting on it gets the same snapshot.
+    Successful snapshots reconcile the optional PortfolioLedger before callbacks run.
+    """
+    def __init__(self, fetch, on_snapshot=None, on_error=None, ledger=None, debounce=PORTFOLIO_REFRESH_DEBOUNCE):
+        self.fetch = fetch
+        self.ledger = ledger
+        self.on_snapshot = on_snapshot
+        self.on_error = on_error
+        self.debounce = debounce
+        self.snapshot = None
+        self.snapshot_started_at = None
+        self.fetch_count = 0
+        self.request_count = 0
+        self._last_result = None
+        self._generation = 0
+        self._running = False
+        self._fetching = False
+        self._pending = False
+        self._cond = threading.Condition()
+
+    def request_refresh(self):
+        """Asks for a fresh snapshot without blocking. Returns the fetch generation that will satisfy it."""
+        with self._cond:
+            self.request_count += 1
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, daemon=True, name="portfolio-refresh").start()
+            self._pending = True
+            # A fetch already on the wire may predate this request, so wait for the next one
+            return self._generation + (2 if self._fetching else 1)
+
+    def refresh(self, timeout=HTTP_TIMEOUT * 2):
+        """Blocks until a snapshot fetched after this call is available and returns it (or an error dict)."""
+        target = self.request_refresh()
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._generation >= target, timeout):
+                return {'error': "Timed out waiting for portfolio refresh."}
+            return self._last_result
+
+    def _run(self):
+        while True:
+            time.sleep(self.debounce)
+            with self._cond:
+                self._pending = False
+                self._fetching = True
+            started_at = time.monotonic()
+            try:
+                result = self.fetch()
+            except Exception as e:
+                result = {'error': str(e)}
+            if self.ledger and 'error' not in result:
+                self.ledger.reconcile(result, started_at)
+            with self._cond:
+                self._fetching = False
+                self._generation += 1
+                self.fetch_count += 1
+                self._last_result = result
+                if 'error' not in result:
+                    self.snapshot, self.snapshot_started_at = result, started_at
+                self._cond.notify_all()
+
+            callback = self.on_error if 'error' in result else self.on_snapshot
+            if callback:
+                try:
+                    callback(result)
+                except Exception:
+                    pass
+
+            with self._cond:
+                if not self._pending:
+                    self._running = False
+                    return
+
+
+class SessionMonitor:
+    """
+    Keeps one account's session alive in the background. Every `cookie_poll`
+    seconds it re-reads the current cookie with `read_cookie()` (the live browser,
+    or the saved cookie file for headless runs) and, when it rotated, hands it to
+    `apply_cookie(cookie)`, which swaps it into every client. Every `interval`
+    seconds the session is validated through the PortfolioService, without a
+    request when a snapshot succeeded within the interval. check_now() asks for a
+    check right away, e.g. after a response came back as the login page.
+
+    A failed check escalates one step at a time: re-read the cookie, then
+    `reload()` the page so the site re-issues it, and only after `restart_after`
+    failed checks in a row call `restart()` (relaunch the browser).
+    """
+    def __init__(self, frontend, portfolio_service, get_cookie, apply_cookie, read_cookie, reload=None, restart=None,
+                 interval=SESSION_CHECK_INTERVAL, cookie_poll=SESSION_COOKIE_POLL, restart_after=SESSION_RESTART_AFTER,
+                 name=None):
+        self.frontend = frontend
+        self.portfolio_service = portfolio_service
+        self.get_cookie = get_cookie
+        self.apply_cookie = apply_cookie
+        self.read_cookie = read_cookie
+        self.reload = reload
+        self.restart = restart
+        self.interval = interval
+        self.cookie_poll = cookie_poll
+        self.restart_after = restart_after
+        self.log_prefix = f"[SESSION:{name}]" if name else "[SESSION]"
+        self.failures = 0
+        self.counters = dict.fromkeys(("checks", "rotations", "reloads", "restarts"), 0)
+        self._swap_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._active = False
+        self._thread = None
+
+    def start(self):
+        self._active = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="session-monitor")
+        self._thread.start()
+
+    def stop(self):
+        self._active = False
+        self._wake.set()
+
+    def check_now(self):
+        self._wake.set()
+
+    def _run(self):
+        last_check = time.monotonic()
+        while self._active:
+            woke = self._wake.wait(self.cookie_poll)
+            self._wake.clear()
+            if not self._active:
+                break
+            try:
+                self.sync_cookie()
+                since_check = time.monotonic() - last_check
+                # check_now() is honoured at most once per cookie poll so a failing session cannot spin
+                if since_check >= self.interval or (woke and since_check >= self.cookie_poll):
+                    last_check = time.monotonic()
+                    self._check()
+            except Exception as e:
+                self.frontend.status(f"❌ {self.log_prefix} Session monitor error: {e}", is_error=True)
+
+    def sync_cookie(self):
+        """Swaps in the freshly read cookie if it changed. True when it did."""
+        try:
+            cookie = self.read_cookie()
+        except Exception:
+            return False
+        with self._swap_lock:
+            if not cookie or cookie == self.get_cookie():
+                return False
+            self.apply_cookie(cookie)
+            self.counters["rotations"] += 1
+        self.frontend.status(f"{self.log_prefix} Session cookie rotated; swapped into every client.")
+        return True
+
+    def _validate(self, force=False):
+        """False only when the session is known to be dead; network errors do not count against it."""
+        started_at = self.portfolio_service.snapshot_started_at
+        if not force and started_at is not None and time.monotonic() - started_at < self.interval:
+            return True
+        self.counters["checks"] += 1
+        return not session_expired(self.portfolio_service.refresh())
+
+    def _check(self):
+        if self._validate():
+            self.failures = 0
+            return
+        self.frontend.status(f"{self.log_prefix} Session check failed. Recovering...", is_error=True)
+        if self.sync_cookie() and self._validate(force=True):
+            self._recovered("with the browser's current cookie")
+            return
+        if self.reload:
+            self.counters["reloads"] += 1
+            self.reload()
+            if self.sync_cookie() and self._validate(force=True):
+                self._recovered("after reloading the page")
+                return
+
+        self.failures += 1
+        if self.restart and self.failures >= self.restart_after:
+            self.frontend.status(f"{self.log_prefix} Session still invalid after {self.failures} checks. Restarting the browser...", is_error=True)
+            self.counters["restarts"] += 1
+            self.failures = 0
+            self.restart()
+        elif not self.restart:
+            self.frontend.status(f"❌ {self.log_prefix} Session invalid ({self.failures} failed checks). Log in again to refresh the saved cookie.", is_error=True)
+
+    def _recovered(self, how):
+        self.failures = 0
+        self.frontend.status(f"✅ {self.log_prefix} Session recovered {how}.")
+
+    def summary(self):
+        return " ".join(f"{name}={count}" for name, count in self.counters.items())
+
+
+class TkBridge:
+    """
+    Thread-safe hand-off from background threads and event loops to the Tk
+    main loop. Callbacks are queued and drained on the Tk thread.
+    """
+    def __init__(self, root, poll_ms=20):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._queue = queue.SimpleQueue()
+
+    def start(self):
+        self.root.after(self.poll_ms, self._drain)
+
+    def post(self, callback, *args):
+        self._queue.put((callback, args))
+
+    def status(self, gui_message, console_message=None, is_error=False):
+        self.post(self.root.update_status, gui_message, console_message, is_error)
+
+    def _drain(self):
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"[ERROR] Bridge callback failed: {e}")
+        if self.root.winfo_exists():
+            self.root.after(self.poll_ms, self._drain)
+
+
+class ConsoleFrontend:
+    """
+    Headless stand-in for TkBridge. Engines only need a frontend with post() and
+    status(); here callbacks run inline and status lines go straight to the log sink.
+    """
+    def __init__(self, log_sink):
+        self.log_sink = log_sink
+
+    def post(self, callback, *args):
+        callback(*args)
+
+    def status(self, gui_message, console_message=None, is_error=False):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        log_prefix = "[ERROR]" if is_error else "[CONSOLE]"
+        self.log_sink.write(f"{timestamp} {log_prefix} {console_message or gui_message}")
+
+
+class AsyncSniperEngine:
+    """
+    Runs the sniper scanner, buy dispatch and holder monitoring as coroutines on
+    a single event loop, using aiohttp for non-blocking HTTP. Talks to the GUI
+    only through the bridge.
+
+    Open positions are watched by a HolderMonitor driven from the loop, so exits
+    follow the threaded engine's rules: one holders request per coin per tick
+    however many positions it has, at most HOLDER_MONITOR_BATCH_SIZE coins per
+    tick, joins by `ignore_users` never count, and no new coin is bought while
+    `max_open_positions` are held. Unlike the threaded engine there is no
+    PreArmedBuy: buys go out over the session's already warm keep-alive connections.
+    """
+    def __init__(self, bridge, session_cookie, resolve_buy_amount, on_trade=None, trace_recorder=None, ledger=None,
+                 coin_index=None, account="main", journal=None, max_open_positions=None, ignore_users=None):
+        self.bridge = bridge
+        self.session_cookie = session_cookie
+        self.resolve_buy_amount = resolve_buy_amount
+        self.on_trade = on_trade
+        self.ledger = ledger
+        self.coin_index = coin_index
+        self.account = account
+        self.journal = journal
+        self.trace_recorder = trace_recorder or TraceRecorder()
+        self.cache = ResponseCache() if RESPONSE_CACHE else None
+        self.scheduler = rate_scheduler()
+        self.worker_id_counter = itertools.count(1)
+        self.max_open_positions = max_open_positions
+        # Never started: the event loop drives its ticks and reads the holders itself
+        self.holder_monitor = HolderMonitor(lambda: None, on_status=bridge.status, ignore_users=ignore_users)
+        self._open_positions = 0
+        self._loop = None
+        self._thread = None
+        self._stopping = None
+        self._session = None
+        self._buy_queue = None
+        self._scans_in_flight = 0
+        self._tasks = set()
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._stopping = asyncio.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def set_session_cookie(self, session_cookie):
+        """Swaps a rotated cookie into the running HTTP session; safe to call from any thread."""
+        self.session_cookie = session_cookie
+        try:
+            if self._loop and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._apply_session_cookie)
+        except RuntimeError:
+            pass  # The loop closed meanwhile
+
+    def _apply_session_cookie(self):
+        if self._session:
+            self._session.headers['Cookie'] = self.session_cookie
+
+    def _run(self):
+        try:
+            self._loop.run_until_complete(self._main())
+        except Exception as e:
+            self.bridge.status(f"❌ [ASYNC] Engine crashed: {e}", is_error=True)
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        self._buy_queue = asyncio.Queue()
+        headers = {
+            'User-Agent': USER_AGENT,
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Origin': BASE_URL,
+            'Cookie': self.session_cookie,
+        }
+        connector = aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
+            self._session = session
+            self._spawn(self._prime_ledger())
+            self._spawn(self._scanner())
+            self._spawn(self._buy_dispatch())
+            self._spawn(self._holder_monitor_loop())
+            await self._stopping.wait()
+
+            tasks = list(self._tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.holder_monitor.stop()
+        self.bridge.status("[ASYNC] Sniper engine stopped.")
+
+    async def _resolve_buy_amount(self):
+        """Sizes a buy from the ledger, or off the loop while its cash is unknown, since that fetches the portfolio."""
+        if self.ledger and self.ledger.cash_balance() is not None:
+            return self.resolve_buy_amount()
+        return await self._loop.run_in_executor(None, self.resolve_buy_amount)
+
+    async def _prime_ledger(self):
+        """Fills the ledger's cash before the first coin turns up, so buys can size without waiting."""
+        try:
+            await self._resolve_buy_amount()
+        except (ValueError, IndexError):
+            pass  # _buy reports it when it happens again
+
+    def _spawn(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _sleep_until(self, deadline):
+        """Sleeps until an absolute loop-clock deadline so periodic loops do not drift."""
+        delay = deadline - self._loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _fetch(self, url, decode=None):
+        """Async twin of RugplayHTTPAPI._fetch, sharing its use of the response cache."""
+        cache = self.cache if self.cache and self.cache.cacheable(url) else None
+        try:
+            if cache:
+                result = cache.fresh(url, decode)
+                if result is not None:
+                    return result
+            status, validators, response_body = await self._get(url, cache.request_headers(url, decode) if cache else None)
+            if status == 304 and cache:
+                cached = cache.not_modified(url, decode)
+                if cached:
+                    return cached[1]
+                status, validators, response_body = await self._get(url)
+            if response_body.lstrip().startswith(b'<'):
+                return {'error': 'API returned HTML. Session may be invalid.'}
+            if cache and status == 200:
+                return cache.store(url, response_body, decode, *validators)
+            return (decode or loads_json)(response_body)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return {'error': f"API fetch failed: {e}"}
+
+    async def _get(self, url, headers=None):
+        """One GET paced by the rate scheduler. Returns (status, (ETag, Last-Modified), body)."""
+        endpoint = api_endpoint(url)
+        if self.scheduler:
+            await self.scheduler.acquire_async(endpoint)
+        async with self._session.get(url, headers=headers) as response:
+            status = response.status
+            validators = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            response_body = await response.read()
+        if self.scheduler:
+            self.scheduler.report(endpoint, status, response.headers.get('Retry-After'))
+        return status, validators, response_body
+
+    async def _trade(self, token_symbol, trade_type, amount, worker_name, trace=None):
+        """Async twin of TradeApp._trade_via_api."""
+        log_prefix = f"[{worker_name}:{token_symbol}]"
+        self.bridge.status(f"{log_prefix} Firing {trade_type} API for {amount}...")
+        url = TRADE_API_URL_TEMPLATE.format(token_symbol=token_symbol)
+        headers = {'Referer': f'{BASE_URL}/coin/{token_symbol}'}
+        payload = {"type": trade_type.upper(), "amount": float(amount)}
+        if self.ledger: self.ledger.begin_trade()
+        try:
+            return await self._post_trade(token_symbol, trade_type, amount, log_prefix, url, headers, payload, trace, worker_name)
+        finally:
+            if self.ledger: self.ledger.end_trade()
+
+    async def _post_trade(self, token_symbol, trade_type, amount, log_prefix, url, headers, payload, trace, worker_name):
+        sent_at = time.monotonic()
+
+        def journal(outcome, result=None, message=None):
+            if self.journal:
+                self.journal.record(token_symbol, trade_type, amount, outcome, worker_name, "sniper",
+                                    latency=latency, result=result, account=self.account, message=message)
+
+        try:
+            if self.scheduler:
+                await self.scheduler.acquire_async("trade")
+                sent_at = time.monotonic()
+            if trace: trace.mark("request_sent", sent_at)
+            async with self._session.post(url, headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                status = response.status
+                response_text = await response.text()
+            latency = time.monotonic() - sent_at
+            if self.scheduler:
+                self.scheduler.report("trade", status, response.headers.get('Retry-After'))
+            if trace: trace.mark("response_received", sent_at + latency)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            latency = time.monotonic() - sent_at
+            self.bridge.status(f"❌ {log_prefix} Trade request error: {e}", is_error=True)
+            journal('error', message=str(e))
+            return False
+
+        result = None
+        if status in [200, 204] and not response_text:
+            self.bridge.status(f"✅ {log_prefix} Trade successful (No Content response).")
+        else:
+            try:
+                result = decode_trade_result(response_text)
+            except ValueError:
+                self.bridge.status(f"❌ {log_prefix} Trade failed: Invalid JSON in response: {response_text}", is_error=True)
+                journal('error', message=f"HTTP {status}: invalid JSON")
+                return False
+            if not (status == 200 and result.success):
+                error_msg = result.message or response_text
+                self.bridge.status(f"❌ {log_prefix} Trade failed: '{error_msg}'.", is_error=True)
+                journal('failed', message=error_msg)
+                return False
+            self.bridge.status(f"✅ {log_prefix} Trade successful!")
+        journal('ok', result)
+        if self.cache:
+            self.cache.invalidate(COIN_API_URL_TEMPLATE.format(token_symbol=token_symbol))
+
+        if self.ledger:
+            self.ledger.apply_trade(token_symbol, trade_type, amount, result)
+        if self.on_trade:
+            self.bridge.post(self.on_trade)
+        return True
+
+    async def _scanner(self):
+        """Sends a poll every interval/hedge seconds as its own task, like CoinScanner's staggered mode."""
+        self.bridge.status("[ASYNC-SCANNER] Starting scan for new coins...")
+        detector = NewCoinDetector()
+        if self.coin_index and self.coin_index.seed(detector):
+            self.bridge.status(f"[ASYNC-SCANNER] Resuming from the coin index ({self.coin_index.coin_count()} coins, newest {detector.newest_symbol}).")
+        if not detector.initialized:
+            initial_listings = await self._fetch(SCAN_WINDOW_API_URL, decode_coin_listings)
+            if not isinstance(initial_listings, dict):
+                detector.baseline(initial_listings)
+                if self.coin_index: self.coin_index.record_seen(initial_listings)
+
+        hedge = scan_hedge()
+        spacing = SNIPER_SCAN_INTERVAL / hedge
+        response_filter = ScanResponseFilter()
+        self._scans_in_flight = 0
+        poll_ids = itertools.count()
+        next_poll = self._loop.time()
+        while True:
+            next_poll += spacing
+            await self._sleep_until(next_poll)
+            if self._loop.time() > next_poll + spacing:
+                # The loop fell more than a slot behind; re-anchor
+                next_poll = self._loop.time()
+            if self._scans_in_flight < hedge:
+                self._scans_in_flight += 1
+                self._spawn(self._scan_once(detector, response_filter, next(poll_ids)))
+
+    async def _scan_once(self, detector, response_filter, poll_id):
+        try:
+            poll_sent = time.monotonic()
+            listings = await self._fetch(SCAN_WINDOW_API_URL, decode_coin_listings)
+            if isinstance(listings, dict) or not response_filter.accept(poll_id, listings, detector.watermark):
+                return  # {'error': ...}, unchanged, or overtaken by a later poll
+
+            watermark = detector.watermark
+            new_coins, gap = detector.process(listings, SCAN_WINDOW_SIZE)
+            if gap:
+                self.bridge.status("[ASYNC-SCANNER] Possible gap detected. Widening scan window...")
+                recent_listings = await self._fetch(MARKET_API_URL, decode_coin_listings)
+                more_coins = detector.fill_gap([] if isinstance(recent_listings, dict) else recent_listings, watermark)
+                new_coins = sorted(new_coins + more_coins, key=NewCoinDetector.sort_key)
+            if self.coin_index: self.coin_index.record_seen(new_coins)
+        finally:
+            self._scans_in_flight -= 1
+
+        newest_symbol = detector.newest_symbol
+        self.bridge.status(f"[SNIPER] Monitoring... Newest: {newest_symbol or 'N/A'}",
+                           f"Scanning for new coins... Current newest found: {newest_symbol or 'N/A'}")
+        detected_at = time.monotonic()
+        for coin in new_coins:
+            self.bridge.status(f"✨ [ASYNC-SCANNER] New coin detected: {coin.symbol}! Added to buy queue.")
+            trace = SnipeTrace(coin.symbol)
+            trace.mark("poll_sent", poll_sent)
+            trace.mark("detected", detected_at)
+            self._buy_queue.put_nowait((coin.symbol, trace))
+
+    async def _buy_dispatch(self):
+        self.bridge.status("[ASYNC-BUY] Waiting for coins in queue...")
+        while True:
+            token_symbol, trace = await self._buy_queue.get()
+            trace.mark("dequeued")
+            self._spawn(self._buy(token_symbol, trace))
+
+    async def _buy(self, token_symbol, trace):
+        log_prefix = f"[ASYNC-BUY:{token_symbol}]"
+        if self.max_open_positions and self._open_positions >= self.max_open_positions:
+            self.bridge.status(f"{log_prefix} {self._open_positions} positions already open. Skipping.")
+            self.trace_recorder.finish(trace)
+            return
+        try:
+            buy_amount = await self._resolve_buy_amount()
+        except (ValueError, IndexError) as e:
+            self.bridge.status(f"❌ {log_prefix} Critical buy error: {e}", is_error=True)
+            self.trace_recorder.finish(trace)
+            return
+        if buy_amount < 1:
+            self.bridge.status(f"{log_prefix} Insufficient amount ({buy_amount}). Skipping.")
+            self.trace_recorder.finish(trace)
+            return
+        if self.coin_index and not self.coin_index.claim_buy(token_symbol, self.account):
+            self.bridge.status(f"{log_prefix} Already bought by {self.account} in an earlier run. Skipping.")
+            self.trace_recorder.finish(trace)
+            return
+
+        # Buys run concurrently, so the slot is taken before the request goes out
+        self._open_positions += 1
+        bought = await self._trade(token_symbol, 'BUY', buy_amount, "SniperAsync", trace)
+        if self.coin_index:
+            self.coin_index.record_buy(token_symbol, self.account, buy_amount, bought)
+        if not bought:
+            self._open_positions -= 1
+            self.bridge.status(f"❌ {log_prefix} Buy failed.")
+            self.trace_recorder.finish(trace)
+            return
+
+        worker_id = next(self.worker_id_counter)
+        self.bridge.status(f"✅ {log_prefix} Buy successful! Monitoring as Monitor-{worker_id}.")
+        position = self.holder_monitor.open_position(
+            token_symbol, f"Monitor-{worker_id}",
+            lambda p, found, count: self._spawn(self._sell_and_close(p.token_symbol, p.worker_name, p.trace)),
+            trace=trace)
+        snapshot = HolderTracker()
+        if await self._poll_holders(token_symbol, snapshot) is None:
+            snapshot = None
+        self.holder_monitor.set_baseline(position, snapshot)
+
+    async def _holder_monitor_loop(self):
+        """Drives the HolderMonitor's ticks on the loop clock."""
+        pipeline = asyncio.Semaphore(self.holder_monitor.pipeline)
+        next_tick = self._loop.time()
+        while True:
+            next_tick += self.holder_monitor.tick
+            await self._sleep_until(next_tick)
+            await self._holder_monitor_tick(pipeline)
+
+    async def _holder_monitor_tick(self, pipeline):
+        """One HolderMonitor tick: fires timeouts, then polls each due coin's holders once, `pipeline` at a time."""
+        monitor = self.holder_monitor
+        expired, trackers = monitor.next_batch()
+        monitor.expire(expired)
+
+        async def poll(token_symbol, tracker):
+            async with pipeline:
+                return await self._poll_holders(token_symbol, tracker)
+
+        diffs = await asyncio.gather(*(poll(token_symbol, tracker) for token_symbol, tracker in trackers))
+        for (token_symbol, _), diff in zip(trackers, diffs):
+            if diff is not None:
+                monitor.evaluate(token_symbol, diff)
+
+    async def _sell_and_close(self, token_symbol, worker_name, trace):
+        """Sells a position whose exit fired via the API, then frees its slot and records the outcome."""
+        sold = False
+        try:
+            sold = await self._sell_position(token_symbol, f"[{worker_name}:{token_symbol}]", worker_name, trace)
+        finally:
+            self._open_positions -= 1
+            self.trace_recorder.finish(trace)
+            if self.coin_index:
+                self.coin_index.record_sell(token_symbol, self.account, sold)
+
+    async def _poll_holders(self, token_symbol, tracker):
+        """Async twin of HolderTracker.poll(): reads holder pages until the tracker has its answer."""
+        tracker.begin_poll()
+        while tracker.next_offset is not None:
+            url = HOLDERS_API_URL_TEMPLATE.format(token_symbol=token_symbol, offset=tracker.next_offset)
+            tracker.add_page(await self._fetch(url, decode_holder_set))
+        return tracker.end_poll()
+
+    async def _sell_position(self, token_symbol, log_prefix, worker_name, trace):
+        """Sells like the browser worker, but sizes each sell from portfolio and pool data. True once sold out."""
+        cap = None
+        for sell_attempt in range(1, SNIPER_MAX_SELL_ATTEMPTS + 1):
+            trace.mark("sell_attempt")
+            self.bridge.status(f"{log_prefix} Sell attempt #{sell_attempt}.")
+            portfolio_data, coin_data = await asyncio.gather(
+                self._fetch(PORTFOLIO_API_URL),
+                self._fetch(COIN_API_URL_TEMPLATE.format(token_symbol=token_symbol)),
+            )
+            quantity = find_holding_quantity(portfolio_data, token_symbol)
+            if quantity is None:
+                self.bridge.status(f"{log_prefix} Could not read holding: {portfolio_data.get('error')}", is_error=True)
+                await asyncio.sleep(SNIPER_MONITOR_INTERVAL)
+                continue
+
+            pool_coin_amount = (coin_data.get('coin') or {}).get('poolCoinAmount')
+            amount, pool_limited = calculate_sell_amount(quantity, pool_coin_amount, cap=cap)
+            if amount < 1:
+                self.bridge.status(f"{log_prefix} Remainder too small. Ending cycle.")
+                return True
+            if pool_limited:
+                self.bridge.status(f"{log_prefix} Action: Pool limit detected. Selling max ({amount}).")
+            else:
+                self.bridge.status(f"{log_prefix} Action: No pool limit. Selling {int(SNIPER_SELL_FRACTION * 100)}% ({amount}).")
+
+            if await self._trade(token_symbol, 'SELL', amount, worker_name):
+                trace.mark("sold")
+                if not pool_limited:
+                    return True
+                self.bridge.status(f"{log_prefix} Pool limit sell complete. Re-evaluating...")
+            else:
+                cap = retry_sell_cap(amount)
+            await asyncio.sleep(SNIPER_MONITOR_INTERVAL)
+        return False
+
+
+class PreArmedBuy:
+    """
+    Keeps one sniper BUY ready to fire: a connected keep-alive socket to the trade
+    host, the raw request precomputed around the symbol, and the amount resolved
+    and the JSON body encoded ahead of time. fire() only splices the symbol in and
+    writes the bytes. A background thread re-arms after every fire and refreshes
+    the connection and amount every `refresh_interval` seconds; arming failures
+    and the recovery from them are reported through `on_status`.
+    """
+    def __init__(self, get_session_cookie, resolve_amount, refresh_interval=PREARM_REFRESH_INTERVAL, on_status=None):
+        self.get_session_cookie = get_session_cookie
+        self.resolve_amount = resolve_amount
+        self.refresh_interval = refresh_interval
+        self.on_status = on_status or (lambda *args, **kwargs: None)
+        self.arm_error = None
+        self.amount = None
+        self._parts = None
+        self._armed_key = None
+        self._sock = None
+        self._sock_opened_at = 0.0
+        self._lock = threading.Lock()
+        self._rearm = threading.Event()
+        self._active = False
+
+        url = urllib.parse.urlsplit(TRADE_API_URL_TEMPLATE)
+        self._https = url.scheme == "https"
+        self._host = url.hostname
+        self._port = url.port or (443 if self._https else 80)
+        self._host_header = url.netloc
+        self._path_parts = url.path.split("{token_symbol}")
+        self._ssl_context = ssl.create_default_context() if self._https else None
+
+    def start(self):
+        self._active = True
+        self._rearm.set()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._active = False
+        self._rearm.set()
+        with self._lock:
+            sock, self._sock = self._sock, None
+        if sock:
+            sock.close()
+
+    def fire(self, token_symbol, trace=None):
+        """
+        Sends the armed BUY for token_symbol. Returns (amount, status_code, response_text),
+        with status_code None if the response could not be read, or None when the request
+        never fully went out (not armed, or the idle connection had been dropped) so the
+        caller can fall back to a regular trade. Once the bytes are sent the server may
+        have executed the buy, so a failure after that is never reported as None.
+        """
+        with self._lock:
+            armed_key = self._armed_key
+            if armed_key and armed_key[1] != self.get_session_cookie():
+                # The session cookie rotated since arming; let the caller send a regular trade
+                self._rearm.set()
+                return None
+            sock, amount, parts = self._sock, self.amount, self._parts
+            self._sock = None
+        if sock is None or parts is None or self._dropped(sock):
+            if sock:
+                sock.close()
+            self._rearm.set()
+            return None
+
+        symbol = urllib.parse.quote(token_symbol, safe="").encode()
+        scheduler = rate_scheduler()
+        if scheduler:
+            scheduler.acquire("trade")
+        try:
+            if trace: trace.mark("request_sent")
+            sock.sendall(b"".join((parts[0], symbol, parts[1], symbol, parts[2])))
+        except OSError:
+            # The request never fully left, so the server cannot have acted on it
+            sock.close()
+            self._rearm.set()
+            return None
+        try:
+            response = http.client.HTTPResponse(sock, method="POST")
+            response.begin()
+            response_text = response.read().decode("utf-8", "replace")
+            if trace: trace.mark("response_received")
+            if scheduler:
+                scheduler.report("trade", response.status, response.getheader("Retry-After"))
+        except (OSError, http.client.HTTPException) as e:
+            # Even a dropped connection may have carried the buy through; never resend it
+            sock.close()
+            self._rearm.set()
+            return amount, None, f"Trade response error: {e}"
+
+        with self._lock:
+            if response.will_close or self._sock is not None:
+                sock.close()
+            else:
+                self._sock = sock
+        self._rearm.set()  # Cash changed, so re-resolve the amount
+        return amount, response.status, response_text
+
+    @staticmethod
+    def _dropped(sock):
+        """True if the server has closed an idle connection (or sent something unasked on it)."""
+        try:
+            if not select.select([sock], [], [], 0)[0]:
+                return False
+            sock.setblocking(False)
+            try:
+                sock.recv(1)  # b"" once closed; any byte is unexpected on an idle connection
+                return True
+            finally:
+                sock.settimeout(HTTP_TIMEOUT)
+        except (ssl.SSLWantReadError, BlockingIOError):
+            return False  # Only TLS housekeeping, such as a session ticket, was pending
+        except (OSError, ValueError):
+            return True
+
+    def _connect(self):
+        sock = socket.create_connection((self._host, self._port), timeout=HTTP_TIMEOUT)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if self._https:
+            sock = self._ssl_context.wrap_socket(sock, server_hostname=self._host)
+        return sock
+
+    def _build_parts(self, session_cookie, amount):
+        """Pre-encodes the request as three byte strings that the symbol is spliced between."""
+        body = json.dumps({"type": "BUY", "amount": float(amount)}).encode()
+        head = (
+            f"POST {self._path_parts[0]}\0{self._path_parts[1]} HTTP/1.1\r\n"
+            f"Host: {self._host_header}\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+            "Content-Type: application/json\r\n"
+            "Accept: application/json\r\n"
+            f"Origin: {BASE_URL}\r\n"
+            f"Referer: {BASE_URL}/coin/\0\r\n"
+            f"Cookie: {session_cookie}\r\n"
+            "Connection: keep-alive\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode()
+        before, between, after = head.split(b"\0")
+        return before, between, after + body
+
+    def _run(self):
+        while self._active:
+            self._rearm.wait(self.refresh_interval)
+            self._rearm.clear()
+            if not self._active:
+                break
+            try:
+                amount = self.resolve_amount()
+                session_cookie = self.get_session_cookie()
+                if (amount, session_cookie) != self._armed_key:
+                    parts = self._build_parts(session_cookie, amount)
+                    with self._lock:
+                        self.amount, self._parts, self._armed_key = amount, parts, (amount, session_cookie)
+
+                # Keep a fresh connection armed; idle ones are replaced before servers drop them
+                with self._lock:
+                    stale = self._sock is None or time.monotonic() - self._sock_opened_at > self.refresh_interval
+                if stale:
+                    sock = self._connect()
+                    with self._lock:
+                        old_sock, self._sock, self._sock_opened_at = self._sock, sock, time.monotonic()
+                    if old_sock:
+                        old_sock.close()
+            except Exception as e:
+                if self.arm_error is None:
+                    self.on_status(f"⚠️ [PREARM] Could not arm the sniper buy: {e}. Retrying; buys use regular trades meanwhile.",
+                                   is_error=True)
+                self.arm_error = str(e)
+                time.sleep(1)
+                self._rearm.set()
+                continue
+            if self.arm_error is not None:
+                self.arm_error = None
+                self.on_status("✅ [PREARM] Sniper buy armed again.")
+
+
+class TradeClient:
+    """
+    GUI-free API trading shared by every frontend and engine. Reports through the
+    frontend's status(), applies fills to the ledger, records every outcome in the
+    trade journal under `account` and calls on_trade after a success.
+    """
+    def __init__(self, frontend, get_api, get_session_cookie, ledger=None, on_trade=None, journal=None, account="main"):
+        self.frontend = frontend
+        self.get_api = get_api
+        self.get_session_cookie = get_session_cookie
+        self.ledger = ledger
+        self.on_trade = on_trade
+        self.journal = journal
+        self.account = account
+
+    def trade(self, token_symbol, trade_type, amount, worker_name="API", trace=None, refresh_balance=True, strategy="manual"):
+        """
+        Executes a trade using the direct API endpoint. Marks request/response times
+        on `trace` if given; pass refresh_balance=False when the caller refreshes once for a batch.
+        `strategy` tags the journal record ("manual", "sniper", "random", "sell_all").
+        """
+        log_prefix = f"[{worker_name}:{token_symbol}]"
+        self.frontend.status(f"{log_prefix} Firing {trade_type} API for {amount}...")
+
+        session_cookie = self.get_session_cookie()
+        if not session_cookie:
+            self.frontend.status(f"❌ {log_prefix} Trade failed: No session cookie.", is_error=True)
+            self._journal(token_symbol, trade_type, amount, 'error', worker_name, strategy, message="No session cookie.")
+            return False
+
+        url = TRADE_API_URL_TEMPLATE.format(token_symbol=token_symbol)
+        headers = {
+            'User-Agent': USER_AGENT,
+            'Content-Type': 'application/json',
+            'Origin': BASE_URL,
+            'Referer': f'{BASE_URL}/coin/{token_symbol}',
+            'Cookie': session_cookie
+        }
+        payload = {"type": trade_type.upper(), "amount": float(amount)}
+
+        # Reuse the pooled keep-alive connection when the HTTP backend is active
+        api = self.get_api()
+        http = api.session if isinstance(api, RugplayHTTPAPI) else requests
+        scheduler = rate_scheduler()
+        if self.ledger: self.ledger.begin_trade()
+        if scheduler: scheduler.acquire("trade")
+        sent_at = time.monotonic()
+        try:
+            if trace: trace.mark("request_sent", sent_at)
+            response = http.post(url, headers=headers, json=payload, timeout=15)
+            received_at = time.monotonic()
+            if scheduler: scheduler.report("trade", response.status_code, response.headers.get('Retry-After'))
+            if trace: trace.mark("response_received", received_at)
+            success = self._handle_response(token_symbol, trade_type, amount, response.status_code, response.text, log_prefix,
+                                            worker_name, strategy, received_at - sent_at)
+        except requests.exceptions.RequestException as e:
+            self.frontend.status(f"❌ {log_prefix} Trade request error: {e}", is_error=True)
+            self._journal(token_symbol, trade_type, amount, 'error', worker_name, strategy, time.monotonic() - sent_at, message=str(e))
+            return False
+        finally:
+            if self.ledger: self.ledger.end_trade()
+
+        if success and refresh_balance and self.on_trade:
+            self.on_trade()
+        return success
+
+    def buy_prearmed(self, prearmed, token_symbol, worker_name="API", trace=None, strategy="sniper"):
+        """
+        Fires a PreArmedBuy for token_symbol and reports it like trade(). Falls back to a
+        regular trade only when the armed request was never sent: not armed, or its idle
+        connection had been dropped. A request that went out but got no response fails.
+        Returns (success, amount), the amount being the one actually sent.
+        """
+        log_prefix = f"[{worker_name}:{token_symbol}]"
+        if self.ledger: self.ledger.begin_trade()
+        try:
+            sent_at = time.monotonic()
+            result = prearmed.fire(token_symbol, trace)
+            if result is not None:
+                latency = time.monotonic() - sent_at
+                amount, status_code, response_text = result
+                self.frontend.status(f"{log_prefix} Fired pre-armed BUY API for {amount}...")
+                if status_code is None:
+                    self.frontend.status(f"❌ {log_prefix} {response_text}", is_error=True)
+                    self._journal(token_symbol, 'BUY', amount, 'error', worker_name, strategy, latency, message=response_text)
+                    return False, amount
+                success = self._handle_response(token_symbol, 'BUY', amount, status_code, response_text, log_prefix,
+                                                worker_name, strategy, latency)
+        finally:
+            if self.ledger: self.ledger.end_trade()
+
+        if result is None:
+            amount = prearmed.amount if prearmed.amount is not None else prearmed.resolve_amount()
+            if amount < 1:
+                self.frontend.status(f"{log_prefix} Insufficient amount ({amount}). Skipping.")
+                return False, amount
+            return self.trade(token_symbol, 'BUY', amount, worker_name, trace=trace, strategy=strategy), amount
+        if success and self.on_trade:
+            self.on_trade()
+        return success, amount
+
+    def _handle_response(self, token_symbol, trade_type, amount, status_code, response_text, log_prefix,
+                         worker_name, strategy, latency):
+        """Reports a trade response, journals it and applies a successful one to the ledger."""
+        result = None
+        if status_code in [200, 204] and not response_text:
+            self.frontend.status(f"✅ {log_prefix} Trade successful (No Content response).")
+        else:
+            try:
+                result = decode_trade_result(response_text)
+            except ValueError:
+                self.frontend.status(f"❌ {log_prefix} Trade failed: Invalid JSON in response: {response_text}", is_error=True)
+                self._journal(token_symbol, trade_type, amount, 'error', worker_name, strategy, latency, message=f"HTTP {status_code}: invalid JSON")
+                return False
+            if not (status_code == 200 and result.success):
+                error_msg = result.message or response_text
+                self.frontend.status(f"❌ {log_prefix} Trade failed: '{error_msg}'.", is_error=True)
+                self._journal(token_symbol, trade_type, amount, 'failed', worker_name, strategy, latency, message=error_msg)
+                return False
+            self.frontend.status(f"✅ {log_prefix} Trade successful!")
+        self._journal(token_symbol, trade_type, amount, 'ok', worker_name, strategy, latency, result)
+        # The pool just moved, so the coin's cached data is stale
+        cache = getattr(self.get_api(), 'cache', None)
+        if cache:
+            cache.invalidate(COIN_API_URL_TEMPLATE.format(token_symbol=token_symbol))
+        if self.ledger:
+            self.ledger.apply_trade(token_symbol, trade_type, amount, result)
+        return True
+
+    def _journal(self, token_symbol, trade_type, amount, outcome, worker_name, strategy, latency=None, result=None, message=None):
+        if self.journal:
+            self.journal.record(token_symbol, trade_type, amount, outcome, worker_name, strategy,
+                                latency=latency, result=result, account=self.account, message=message)
+
+
+def resolve_buy_amount(fixed_amount, percentage, ledger, portfolio_service=None):
+    """USD for the next snipe: the fixed amount if set, else a share of the ledger's cash."""
+    if fixed_amount:
+        return int(fixed_amount)
+    cash = ledger.cash_balance()
+    if cash is None and portfolio_service:
+        portfolio_service.refresh()
+        cash = ledger.cash_balance()
+    return math.floor((cash or 0.0) * percentage)
+
+
+class ScanResponseFilter:
+    """
+    Orders the responses of overlapping scanner polls. accept() drops a response
+    identical to the last one taken (the response cache hands back the same
+    object) and one that a later-sent poll has overtaken, unless it shows a coin
+    past the detector's createdAt watermark.
+    """
+    def __init__(self):
+        self.newest_poll = -1
+        self.last_listings = None
+
+    def accept(self, poll_id, listings, watermark):
+        if listings is self.last_listings:
+            return False
+        if poll_id < self.newest_poll and not any(
+                coin.created_at is not None and watermark is not None and coin.created_at > watermark for coin in listings):
+            return False
+        self.newest_poll = max(self.newest_poll, poll_id)
+        self.last_listings = listings
+        return True
+
+
+def scan_hedge(hedge=None, interval=SNIPER_SCAN_INTERVAL):
+    """How many scanner polls to keep in flight: `hedge` (default SNIPER_SCAN_HEDGE), capped to the market rate limit."""
+    if hedge is None:
+        hedge = SNIPER_SCAN_HEDGE
+    if RATE_LIMITING and "market" in RATE_LIMITS:
+        hedge = min(hedge, int(RATE_LIMITS["market"][0] * interval))
+    return max(int(hedge), 1)
+
+
+class CoinScanner:
+    """
+    Polls the market for new coins and hands each new coin, oldest first, to
+    every subscriber as `submit(coin, trace)`. One scanner can feed any number of
+    engines, so market polling does not grow with the number of accounts.
+    With a `coin_index` every coin seen is recorded and the detector is seeded from it.
+    With `hedge` K > 1 a poll is sent every interval/K seconds with up to K in
+    flight, and whichever response shows a new coin first is used (see
+    ScanResponseFilter for how late responses are dropped).
+    """
+    def __init__(self, frontend, get_api, interval=SNIPER_SCAN_INTERVAL, coin_index=None, hedge=None):
+        self.frontend = frontend
+        self.get_api = get_api
+        self.interval = interval
+        self.coin_index = coin_index
+        self.hedge = scan_hedge(hedge, interval)
+        self._subscribers = []
+        self._active = False
+        self._thread = None
+        self._detector = None
+        self._filter = None
+        self._detect_lock = threading.Lock()
+
+    def subscribe(self, submit):
+        self._subscribers.append(submit)
+
+    def unsubscribe(self, submit):
+        if submit in self._subscribers:
+            self._subscribers.remove(submit)
+
+    def start(self):
+        self._active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._active = False
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        """Finds new coins and fans every one of them out to the subscribers, oldest first."""
+        detector = self._detector = NewCoinDetector()
+        self._filter = ScanResponseFilter()
+        self.frontend.status("[SCANNER] Starting scan for new coins...")
+        if self.coin_index and self.coin_index.seed(detector):
+            self.frontend.status(f"[SCANNER] Resuming from the coin index ({self.coin_index.coin_count()} coins, newest {detector.newest_symbol}).")
+        try:
+            if not detector.initialized:
+                initial_listings = self.get_api().get_latest_listings()
+                if not isinstance(initial_listings, dict):
+                    detector.baseline(initial_listings)
+                    if self.coin_index: self.coin_index.record_seen(initial_listings)
+        except Exception: pass
+
+        api = self.get_api()
+        if self.hedge > 1 and isinstance(api, RugplayAPI) and not isinstance(api, RugplayHTTPAPI):
+            # The in-browser backend drives a single WebDriver, so its polls cannot overlap
+            self.frontend.status("[SCANNER] The browser backend polls one at a time; scan hedging is off.")
+            self.hedge = 1
+        if self.hedge > 1:
+            self._run_staggered()
+            return
+        poll_ids = itertools.count()
+        while self._active:
+            time.sleep(self.interval)
+            self._poll(next(poll_ids))
+
+    def _run_staggered(self):
+        """Sends a poll every interval/hedge seconds on a small pool; slots are skipped while `hedge` are in flight."""
+        self.frontend.status(f"[SCANNER] Staggered polling: up to {self.hedge} in flight, one every {self.interval / self.hedge:.3f}s.")
+        in_flight = threading.BoundedSemaphore(self.hedge)
+        poll_ids = itertools.count()
+
+        def poll(poll_id):
+            try:
+                self._poll(poll_id)
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.hedge, thread_name_prefix="scanner") as executor:
+            next_send = time.monotonic()
+            while self._active:
+                next_send += self.interval / self.hedge
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_send = time.monotonic()
+                if in_flight.acquire(blocking=False):
+                    executor.submit(poll, next(poll_ids))
+
+    def _poll(self, poll_id):
+        """One newest-coin poll; `poll_id` grows with send order so overtaken responses can be told apart."""
+        try:
+            api = self.get_api()
+            poll_sent = time.monotonic()
+            listings = api.get_latest_listings()
+            if isinstance(listings, dict):  # {'error': ...}
+                return
+            with self._detect_lock:
+                new_coins = self._detect(api, poll_id, listings)
+                current_newest = self._detector.newest_symbol
+            if new_coins is None:
+                return
+
+            self.frontend.status(f"[SNIPER] Monitoring... Newest: {current_newest or 'N/A'}",
+                                 f"Scanning for new coins... Current newest found: {current_newest or 'N/A'}")
+            detected_at = time.monotonic()
+            for coin in new_coins:
+                self.frontend.status(f"✨ [SCANNER] New coin detected: {coin.symbol}! Added to buy queue.")
+                for submit in list(self._subscribers):
+                    # Every subscriber gets its own trace, since each one buys separately
+                    trace = SnipeTrace(coin.symbol)
+                    trace.mark("poll_sent", poll_sent)
+                    trace.mark("detected", detected_at)
+                    submit(coin, trace)
+            # Indexed only after the fan-out, so the disk write never delays a buy
+            if new_coins and self.coin_index: self.coin_index.record_seen(new_coins)
+        except Exception as e:
+            # Rate limits are waited out by the scheduler on the next request; this only reports the error
+            self.frontend.status(f"❌ [SCANNER] Scan failed: {e}", is_error=True)
+
+    def _detect(self, api, poll_id, listings):
+        """Runs the detector over one response under the detect lock. None when it is unchanged or stale."""
+        detector = self._detector
+        if not self._filter.accept(poll_id, listings, detector.watermark):
+            return None
+        watermark = detector.watermark
+        new_coins, gap = detector.process(listings, SCAN_WINDOW_SIZE)
+        if gap:
+            # Every coin in the window is new, so more may have launched; widen to the 50-coin query
+            self.frontend.status("[SCANNER] Possible gap detected. Widening scan window...")
+            recent_listings = api.get_recent_listings()
+            more_coins = detector.fill_gap([] if isinstance(recent_listings, dict) else recent_listings, watermark)
+            new_coins = sorted(new_coins + more_coins, key=NewCoinDetector.sort_key)
+        return new_coins
+
+
+class ThreadedSniperEngine:
+    """
+    GUI-free sniper on threads: a CoinScanner feeding a SnipeQueue, one buy thread
+    and a HolderMonitor. When a position's exit trigger fires it is handed to
+    `sell_position(token_symbol, worker_id, trace)` on its own thread, which must
+    finish the trace and return True once the position is sold out (False
+    otherwise); by default the position is sold through the API.
+    Pass a shared `scanner` and `holder_monitor` to run several engines off the
+    same polling; the engine then subscribes to them but does not start or stop them.
+    With a `coin_index` each coin is bought at most once per account, across restarts,
+    and each sell's outcome is recorded.
+    """
+    def __init__(self, frontend, get_api, trade_client, resolve_buy_amount, trace_recorder=None, sell_position=None,
+                 scanner=None, holder_monitor=None, name=None, max_open_positions=None, prearm=SNIPER_PREARM,
+                 coin_index=None):
+        self.frontend = frontend
+        self.get_api = get_api
+        self.trade_client = trade_client
+        self.resolve_buy_amount = resolve_buy_amount
+        self.trace_recorder = trace_recorder or TraceRecorder()
+        self.sell_position = sell_position or self._sell_position_via_api
+        self.scanner = scanner
+        self.holder_monitor = holder_monitor
+        self.name = name
+        self.max_open_positions = max_open_positions
+        self.prearm = prearm
+        self.coin_index = coin_index
+        self.account = name or "main"
+        self.prearmed = None
+        self.worker_id_counter = itertools.count(1)
+        self.snipe_queue = None
+        self.queue_stats = None
+        self._owns_scanner = scanner is None
+        self._owns_monitor = holder_monitor is None
+        self._log_name = f"{name}/" if name else ""
+        self._open_positions = 0
+        self._positions_lock = threading.Lock()
+        self._active = False
+        self._threads = []
+
+    def start(self):
+        self._active = True
+        self.snipe_queue = SnipeQueue()
+
+        # The pre-armed buy speaks raw HTTP with the session cookie, so it needs the HTTP backend
+        if self.prearm and isinstance(self.get_api(), RugplayHTTPAPI):
+            self.prearmed = PreArmedBuy(self.trade_client.get_session_cookie, self.resolve_buy_amount, on_status=self.frontend.status)
+            self.prearmed.start()
+
+        if self._owns_monitor:
+            # The in-browser backend drives a single WebDriver, so it cannot pipeline
+            pipeline = HOLDER_MONITOR_PIPELINE if isinstance(self.get_api(), RugplayHTTPAPI) else 1
+            self.holder_monitor = HolderMonitor(self.get_api, pipeline=pipeline, on_status=self.frontend.status)
+            self.holder_monitor.start()
+
+        if self.coin_index:
+            still_open = self.coin_index.open_positions(self.account)
+            if still_open:
+                self.frontend.status(f"[{self._log_name}SNIPER] {len(still_open)} position(s) from a previous run were not sold: "
+                                     f"{', '.join(still_open)}. Sell them manually or with Sell All.")
+
+        if self._owns_scanner:
+            self.scanner = CoinScanner(self.frontend, self.get_api, coin_index=self.coin_index)
+        self.scanner.subscribe(self.submit)
+        if self._owns_scanner:
+            self.scanner.start()
+
+        self._threads = [threading.Thread(target=self._buy_loop, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, coin, trace=None):
+        """Queues a detected CoinListing for this engine's buy thread."""
+        self.snipe_queue.put(coin.symbol, coin, trace)
+
+    def stop(self):
+        """Stops buying (and any scanner/monitor this engine owns); returns the snipe queue's stats."""
+        self._active = False
+        self.scanner.unsubscribe(self.submit)
+        if self._owns_scanner:
+            self.scanner.stop()
+        if self._owns_monitor:
+            self.holder_monitor.stop()
+        if self.prearmed:
+            self.prearmed.stop()
+        self.queue_stats = self.snipe_queue.stats()
+        self.snipe_queue.close()
+        return self.queue_stats
+
+    def is_running(self):
+        return any(thread.is_alive() for thread in self._threads) or (self._owns_scanner and self.scanner.is_running())
+
+    def _buy_loop(self):
+        """Buys queued coins one at a time through the API and hands each position to the holder monitor."""
+        self.frontend.status(f"[{self._log_name}BUY-THREAD] Waiting for coins in queue...")
+        snipe_queue = self.snipe_queue
+        while self._active:
+            entry = snipe_queue.get()  # Blocks until the scanner puts a coin or the engine stops
+            if entry is None:
+                break
+            token_symbol = entry.token_symbol
+            trace = entry.trace or SnipeTrace(token_symbol)
+            trace.mark("dequeued")
+            log_prefix = f"[{self._log_name}BUY-THREAD:{token_symbol}]"
+            self.frontend.status(f"{log_prefix} Processing buy...",
+                                 f"{log_prefix} Processing buy (queue wait {entry.wait_time * 1000:.1f}ms, {len(snipe_queue)} still queued)...")
+
+            try:
+                if self.max_open_positions and self._open_positions >= self.max_open_positions:
+                    self.frontend.status(f"{log_prefix} {self._open_positions} positions already open. Skipping.")
+                    continue
+
+                buy_amount = self.prearmed.amount if self.prearmed else self.resolve_buy_amount()
+                if buy_amount is not None and buy_amount < 1:
+                    self.frontend.status(f"{log_prefix} Insufficient amount ({buy_amount}). Skipping.")
+                    continue
+                if not self._claim(token_symbol, log_prefix):
+                    continue
+
+                try:
+                    if self.prearmed:
+                        buy_successful, buy_amount = self.trade_client.buy_prearmed(
+                            self.prearmed, token_symbol, f"{self._log_name}SniperAPI", trace=trace, strategy="sniper")
+                    else:
+                        buy_successful = self.trade_client.trade(token_symbol, 'BUY', buy_amount, f"{self._log_name}SniperAPI", trace=trace, strategy="sniper")
+                except Exception as e:
+                    # The coin is claimed; record the failure so the index does not keep it pending
+                    self.frontend.status(f"❌ {log_prefix} Buy error: {e}", is_error=True)
+                    buy_successful = False
+                if self.coin_index:
+                    self.coin_index.record_buy(token_symbol, self.account, buy_amount, buy_successful)
+
+                if buy_successful:
+                    # --- Hand the position to the holder monitor ---
+                    worker_id = next(self.worker_id_counter)
+                    with self._positions_lock:
+                        self._open_positions += 1
+                    self.frontend.status(f"✅ {log_prefix} Buy successful! Monitoring as {self._log_name}Worker-{worker_id}.")
+                    self.holder_monitor.add_position(token_symbol, f"{self._log_name}Worker-{worker_id}",
+                                                     lambda p, found, count, w_id=worker_id: self._on_exit_trigger(p.token_symbol, w_id, p.trace),
+                                                     trace=trace)
+                    trace = None  # The sell worker finishes it
+                else:
+                    self.frontend.status(f"❌ {log_prefix} Buy failed.")
+
+            except Exception as e:
+                self.frontend.status(f"❌ {log_prefix} Critical buy error: {e}", is_error=True)
+            finally:
+                self.trace_recorder.finish(trace)
+
+    def _claim(self, token_symbol, log_prefix):
+        """False (and logs it) if the coin index shows this account already tried to buy the coin."""
+        if self.coin_index and not self.coin_index.claim_buy(token_symbol, self.account):
+            self.frontend.status(f"{log_prefix} Already bought by {self.account} in an earlier run. Skipping.")
+            return False
+        return True
+
+    def _on_exit_trigger(self, token_symbol, worker_id, trace=None):
+        """Called by the holder monitor when a position should exit; spawns its sell worker."""
+        if not self._active:
+            self._close_position()
+            self.trace_recorder.finish(trace)
+            return
+        threading.Thread(target=self._run_sell, args=(token_symbol, worker_id, trace), daemon=True).start()
+
+    def _run_sell(self, token_symbol, worker_id, trace):
+        sold = False
+        try:
+            sold = self.sell_position(token_symbol, worker_id, trace) is True
+        finally:
+            self._close_position()
+            if self.coin_index:
+                self.coin_index.record_sell(token_symbol, self.account, sold)
+
+    def _close_position(self):
+        with self._positions_lock:
+            self._open_positions -= 1
+
+    def _sell_position_via_api(self, token_symbol, worker_id, trace=None):
+        """Sells like the browser worker, but sizes each sell from portfolio and pool data. True once sold out."""
+        worker_name = f"{self._log_name}Worker-{worker_id}"
+        log_prefix = f"[{worker_name}:{token_symbol}]"
+        cap = None
+        try:
+            for sell_attempt in range(1, SNIPER_MAX_SELL_ATTEMPTS + 1):
+                if not self._active:
+                    return False
+                if trace: trace.mark("sell_attempt")
+                self.frontend.status(f"{log_prefix} Sell attempt #{sell_attempt}.")
+                api = self.get_api()
+                portfolio_data = api.get_portfolio()
+                quantity = find_holding_quantity(portfolio_data, token_symbol)
+                if quantity is None:
+                    self.frontend.status(f"{log_prefix} Could not read holding: {portfolio_data.get('error')}", is_error=True)
+                    time.sleep(SNIPER_MONITOR_INTERVAL)
+                    continue
+
+                pool_coin_amount = (api.get_coin(token_symbol).get('coin') or {}).get('poolCoinAmount')
+                amount, pool_limited = calculate_sell_amount(quantity, pool_coin_amount, cap=cap)
+                if amount < 1:
+                    self.frontend.status(f"{log_prefix} Remainder too small. Ending cycle.")
+                    return True
+                if pool_limited:
+                    self.frontend.status(f"{log_prefix} Action: Pool limit detected. Selling max ({amount}).")
+                else:
+                    self.frontend.status(f"{log_prefix} Action: No pool limit. Selling {int(SNIPER_SELL_FRACTION * 100)}% ({amount}).")
+
+                if self.trade_client.trade(token_symbol, 'SELL', amount, worker_name, strategy="sniper"):
+                    if trace: trace.mark("sold")
+                    if not pool_limited:
+                        return True
+                    self.frontend.status(f"{log_prefix} Pool limit sell complete. Re-evaluating...")
+                else:
+                    cap = retry_sell_cap(amount)
+                time.sleep(SNIPER_MONITOR_INTERVAL)
+            return False
+        except Exception as e:
+            self.frontend.status(f"❌ {log_prefix} Worker error: {e}", is_error=True)
+            return False
+        finally:
+            self.trace_recorder.finish(trace)
+
+
+class AccountSession:
+    """
+    One trading account for headless runs: its session cookie, pooled HTTP client,
+    ledger, coalesced portfolio refresh and trade client, plus per-account limits.
+    `max_buy` caps the USD of a single snipe and `max_open_positions` how many
+    positions the account may hold at once. `user_id` is the account's id in holder
+    lists; when it is not given, MultiAccountSniper asks the session endpoint.
+    """
+    def __init__(self, name, session_cookie, frontend, buy_amount=None, buy_percentage=0.0,
+                 max_buy=None, max_open_positions=None, journal=None, recorder=None, user_id=None):
+        self.name = name
+        self.session_cookie = session_cookie
+        self.user_id = user_id
+        self.buy_amount = buy_amount
+        self.buy_percentage = buy_percentage
+        self.max_buy = max_buy
+        self.max_open_positions = max_open_positions
+        self.api = RugplayHTTPAPI(None, session_cookie, recorder=recorder)
+        self.ledger = PortfolioLedger()
+        self.portfolio_service = PortfolioService(
+            self.api.get_portfolio, ledger=self.ledger,
+            on_error=lambda data: frontend.status(f"[{name}] Balance check failed: {data['error']}", is_error=True))
+        self.trade_client = TradeClient(frontend, lambda: self.api, lambda: self.session_cookie,
+                                        ledger=self.ledger, on_trade=self.portfolio_service.request_refresh,
+                                        journal=journal, account=name)
+
+    def set_session_cookie(self, session_cookie):
+        """Swaps a rotated cookie into the account's HTTP client and trade paths."""
+        self.session_cookie = session_cookie
+        self.api.set_session_cookie(session_cookie)
+
+    def resolve_buy_amount(self):
+        amount = resolve_buy_amount(self.buy_amount, self.buy_percentage, self.ledger, self.portfolio_service)
+        return min(amount, math.floor(self.max_buy)) if self.max_buy else amount
+
+    def close(self):
+        self.api.close()
+
+
+class MultiAccountSniper:
+    """
+    Runs one ThreadedSniperEngine per AccountSession behind a single CoinScanner
+    and a single HolderMonitor, so market and holder polling stay constant however
+    many accounts trade. Each new coin is queued to every account at once and
+    bought by each account's own buy thread. The accounts' own user ids are left out
+    of holder joins, so one account's buy does not trigger another's exit.
+    """
+    def __init__(self, frontend, accounts, trace_recorder=None, coin_index=None):
+        self.frontend = frontend
+        self.accounts = accounts
+        self.trace_recorder = trace_recorder or TraceRecorder()
+        self.coin_index = coin_index
+        self.scanner = None
+        self.holder_monitor = None
+        self.engines = []
+
+    def start(self):
+        # Market and holder data are the same for every account, so the first one polls for all
+        primary = self.accounts[0]
+        self.scanner = CoinScanner(self.frontend, lambda: primary.api, coin_index=self.coin_index)
+        for account in self.accounts:
+            if account.user_id is None:
+                account.user_id = account.api.get_user_id()
+            if account.user_id is None:
+                self.frontend.status(f"⚠️ [{account.name}] Could not read the account's user id, so its buys may trigger "
+                                     f"the other accounts' exits. Set \"user_id\" for it in the config.", is_error=True)
+        self.holder_monitor = HolderMonitor(lambda: primary.api, on_status=self.frontend.status,
+                                            ignore_users={account.user_id for account in self.accounts if account.user_id})
+        self.engines = [
+            ThreadedSniperEngine(self.frontend, (lambda account=account: account.api), account.trade_client,
+                                 account.resolve_buy_amount, trace_recorder=self.trace_recorder,
+                                 scanner=self.scanner, holder_monitor=self.holder_monitor,
+                                 name=account.name, max_open_positions=account.max_open_positions,
+                                 coin_index=self.coin_index)
+            for account in self.accounts]
+        self.holder_monitor.start()
+        for engine in self.engines:
+            engine.start()
+        self.scanner.start()
+
+    def stop(self):
+        """Stops every engine and the shared polling; returns each account's snipe queue stats."""
+        self.scanner.stop()
+        stats = {engine.name: engine.stop() for engine in self.engines}
+        self.holder_monitor.stop()
+        return stats
+
+    def is_running(self):
+        return self.scanner.is_running() or any(engine.is_running() for engine in self.engines)
+
+
+class RandomBotEngine:
+    """
+    GUI-free random bot: alternates API buys and sells of one token. Buys are sized
+    from the ledger's cash, sells from the holding and the coin's pool reserve, with
+    `scrape_sell_amount(token_symbol)` as the fallback when that API data is missing.
+    `on_stopped` is posted to the frontend if the bot stops itself.
+    """
+    def __init__(self, frontend, get_api, trade_client, ledger, portfolio_service, token_symbol,
+                 max_buy=10.0, scrape_sell_amount=None, on_stopped=None):
+        self.frontend = frontend
+        self.get_api = get_api
+        self.trade_client = trade_client
+        self.ledger = ledger
+        self.portfolio_service = portfolio_service
+        self.token_symbol = token_symbol
+        self.max_buy = max_buy
+        self.scrape_sell_amount = scrape_sell_amount
+        self.on_stopped = on_stopped
+        self.sell_cap = None
+        self._active = False
+        self._thread = None
+
+    def start(self):
+        self._active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._active = False
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _calculate_sell_amount(self):
+        """
+        Sizes a sell from the ledger holding and the coin's pool reserve, applying the
+        same 'Max sellable' rule as the trade panel. Returns None when the API data is missing.
+        """
+        token_symbol = self.token_symbol
+        log_prefix = f"[RandomBot:{token_symbol}]"
+        quantity = self.ledger.quantity(token_symbol)
+        if quantity is None:
+            quantity = find_holding_quantity(self.portfolio_service.refresh(), token_symbol)
+        if quantity is None:
+            return None
+
+        coin_data = self.get_api().get_coin(token_symbol)
+        pool_coin_amount = (coin_data.get('coin') or {}).get('poolCoinAmount')
+        if pool_coin_amount is None:
+            return None
+
+        sell_percentage = random.uniform(0.20, 0.95)
+        amount, pool_limited = calculate_sell_amount(quantity, pool_coin_amount, fraction=sell_percentage, cap=self.sell_cap)
+        if pool_limited:
+            self.frontend.status(f"{log_prefix} Pool limit detected. Selling max: {amount}")
+        else:
+            self.frontend.status(f"{log_prefix} No limit. Selling {int(sell_percentage * 100)}% ({amount})")
+        return amount
+
+    def _run(self):
+        self.frontend.status("Random Bot Activated!", "Random bot thread started.")
+        token_symbol = self.token_symbol
+        last_trade_type = 'SELL'  # Start by buying first
+
+        while self._active:
+            try:
+                # Check for valid session and API state
+                api = self.get_api()
+                if not self.trade_client.get_session_cookie() or not api or not api.is_ready():
+                    self.frontend.status("Session/Browser not ready, stopping bot.", is_error=True)
+                    self._active = False
+                    if self.on_stopped:
+                        self.frontend.post(self.on_stopped)
+                    break
+
+                trade_type = 'BUY' if last_trade_type == 'SELL' else 'SELL'
+                amount = 0
+                traded = False
+
+                if trade_type == 'BUY':
+                    available_balance = self.ledger.cash_balance() or 0.0
+                    if available_balance > 1:
+                        # Determine the max possible buy, respecting the user's limit
+                        max_buy = min(available_balance * 0.80, self.max_buy)
+                        if max_buy > 1:
+                            # Calculate a more random amount within the allowed range
+                            amount = math.floor(random.uniform(max_buy * 0.20, max_buy * 0.95))
+
+                    if amount > 0:
+                        traded = self.trade_client.trade(token_symbol, trade_type, amount, "RandomBot", strategy="random")
+
+                    last_trade_type = 'BUY' # Set type for next iteration
+
+                else:  # SELL logic
+                    # Size the sell from API data; only scrape the page when that data is missing
+                    amount = self._calculate_sell_amount()
+                    if amount is None and self.scrape_sell_amount:
+                        self.frontend.status(f"[RandomBot:{token_symbol}] API sell data unavailable. Falling back to page scrape.")
+                        amount = self.scrape_sell_amount(token_symbol)
+
+                    if amount and amount > 0:
+                        traded = self.trade_client.trade(token_symbol, trade_type, amount, "RandomBot", strategy="random")
+                        self.sell_cap = None if traded else retry_sell_cap(amount)
+
+                    last_trade_type = 'SELL' # Set type for next iteration
+
+                if not traded:
+                    time.sleep(1)  # Nothing to trade yet; don't spin on the API
+
+            except Exception as e:
+                self.frontend.status(f"Critical error in random bot: {e}", is_error=True)
+                time.sleep(2) # Keep a small sleep only for critical error cases
@@ -0,0 +1,232 @@
+"""
+Headless runner for the sniper and random bots. Needs no display and no browser:
+it reuses the session cookie the GUI saves after login (SESSION_COOKIE_PATH) and
+drives the same GUI-free engines the Tk app uses, logging to the console and the
+rotating log file.
+
+Usage:  python headless.py --config bot.json
+
+Example config (every key is optional):
+
+    {
+        "bot": "sniper",            "sniper" or "random"
+        "engine": "threads",        sniper engine: "threads" or "asyncio"
+        "buy_amount": 10,           fixed USD per snipe ...
+        "buy_percentage": 0.05,     ... or this share of cash when buy_amount is unset
+        "token": "ABC",             random bot token
+        "max_buy": 10,              cap on USD per buy (random bot default 10)
+        "max_open_positions": null, sniper: skip new coins while this many are held
+        "user_id": null,            the account's id in holder lists (read from the session when unset)
+        "cookie_path": "~/.rugplay_session_cookie",
+        "coin_index_path": "~/.rugplay_coin_index.sqlite3",   coins seen and positions, kept across restarts
+        "journal_path": "~/rugplay_trades.jsonl",             append-only trade journal (see journal_export.py)
+        "record_path": null,        record every API response here for backtest.py
+        "duration": null            seconds to run, null runs until Ctrl+C
+    }
+
+Each account's session is watched by a SessionMonitor: when the cookie file is
+rewritten (e.g. by logging in again with tradingbot.py) the new cookie is
+swapped into the running clients without a restart.
+
+Several accounts can snipe from one process, on the threaded engine only. Give
+each its own cookie file and limits under "accounts"; they share one market
+scanner and one holder monitor, which ignores the accounts' own buys as joins:
+
+    {
+        "accounts": [
+            {"name": "main", "cookie_path": "~/.rugplay_main", "buy_amount": 10},
+            {"name": "alt", "cookie_path": "~/.rugplay_alt", "buy_percentage": 0.05, "max_open_positions": 3}
+        ]
+    }
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+import botcore
+
+DEFAULT_CONFIG = {
+    "bot": "sniper",
+    "engine": botcore.SNIPER_ENGINE,
+    "buy_amount": None,
+    "buy_percentage": None,
+    "token": None,
+    "max_buy": None,
+    "max_open_positions": None,
+    "user_id": None,
+    "cookie_path": botcore.SESSION_COOKIE_PATH,
+    "coin_index_path": botcore.COIN_INDEX_PATH,
+    "journal_path": botcore.TRADE_JOURNAL_PATH,
+    "record_path": None,
+    "duration": None,
+    "accounts": None,
+}
+ACCOUNT_KEYS = ("buy_amount", "buy_percentage", "max_buy", "max_open_positions", "cookie_path")
+
+
+def load_config(path):
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path) as f:
+            config.update(json.load(f))
+    config["cookie_path"] = os.path.expanduser(config["cookie_path"])
+    config["coin_index_path"] = os.path.expanduser(config["coin_index_path"])
+    config["journal_path"] = os.path.expanduser(config["journal_path"])
+    return config
+
+
+def open_account(name, settings, frontend, journal, recorder=None):
+    """Builds an AccountSession from its saved cookie and checks the session with a portfolio fetch."""
+    cookie_path = os.path.expanduser(settings["cookie_path"])
+    session_cookie = botcore.load_session_cookie(cookie_path)
+    if not session_cookie:
+        sys.exit(f"No saved session at {cookie_path}. Log in once with tradingbot.py first.")
+    account = botcore.AccountSession(
+        name, session_cookie, frontend,
+        buy_amount=settings["buy_amount"], buy_percentage=float(settings["buy_percentage"] or 0.0),
+        max_buy=settings["max_buy"], max_open_positions=settings["max_open_positions"], journal=journal,
+        recorder=recorder, user_id=settings.get("user_id"))
+    portfolio_data = account.portfolio_service.refresh()
+    if 'error' in portfolio_data:
+        account.close()
+        sys.exit(f"[{name}] Session check failed: {portfolio_data['error']}. Log in again with tradingbot.py.")
+    frontend.status(f"[{name}] Session OK. Cash: {account.ledger.cash_balance():.2f}")
+    return account
+
+
+def start_session_monitor(account, cookie_path, engine, frontend):
+    """Watches the account's cookie file and session; a rotated cookie is swapped into the account and the asyncio engine."""
+    def apply_cookie(session_cookie):
+        account.set_session_cookie(session_cookie)
+        if isinstance(engine, botcore.AsyncSniperEngine):
+            engine.set_session_cookie(session_cookie)
+
+    monitor = botcore.SessionMonitor(frontend, account.portfolio_service, lambda: account.session_cookie, apply_cookie,
+                                        lambda: botcore.load_session_cookie(cookie_path), name=account.name)
+    monitor.start()
+    return monitor
+
+
+def build_engine(config, frontend, accounts, trace_recorder, coin_index, journal):
+    """Builds the engine the config asks for; every engine has start(), stop() and is_running()."""
+    if config["bot"] == "random":
+        if not config["token"]:
+            sys.exit("The random bot needs a 'token' in the config.")
+        account = accounts[0]
+        return botcore.RandomBotEngine(frontend, lambda: account.api, account.trade_client, account.ledger,
+                                          account.portfolio_service, config["token"], max_buy=float(config["max_buy"] or 10.0))
+
+    if config["bot"] != "sniper":
+        sys.exit(f"Unknown bot: {config['bot']}")
+    for account in accounts:
+        if not account.buy_amount and not account.buy_percentage:
+            sys.exit(f"[{account.name}] The sniper needs 'buy_amount' or 'buy_percentage'.")
+    if len(accounts) > 1:
+        if config["engine"] == "asyncio":
+            sys.exit("The asyncio engine runs a single account. Use \"engine\": \"threads\" with several accounts.")
+        return botcore.MultiAccountSniper(frontend, accounts, trace_recorder, coin_index=coin_index)
+
+    account = accounts[0]
+    if config["engine"] == "asyncio":
+        if botcore.aiohttp is None:
+            sys.exit("The asyncio engine needs aiohttp: pip install aiohttp")
+        return botcore.AsyncSniperEngine(frontend, account.session_cookie, account.resolve_buy_amount,
+                                            on_trade=account.portfolio_service.request_refresh,
+                                            trace_recorder=trace_recorder, ledger=account.ledger,
+                                            coin_index=coin_index, account=account.name, journal=journal,
+                                            max_open_positions=account.max_open_positions)
+    return botcore.ThreadedSniperEngine(frontend, lambda: account.api, account.trade_client, account.resolve_buy_amount,
+                                           trace_recorder=trace_recorder, max_open_positions=account.max_open_positions,
+                                           name=account.name if account.name != "main" else None, coin_index=coin_index)
+
+
+def run(config):
+    log_sink = botcore.LogSink()
+    log_sink.start()
+    frontend = botcore.ConsoleFrontend(log_sink)
+    trace_recorder = botcore.TraceRecorder()
+    coin_index = botcore.CoinIndex(config["coin_index_path"])
+    journal = botcore.TradeJournal(config["journal_path"])
+    journal.start()
+    recorder = None
+    if config["record_path"]:
+        recorder = botcore.ResponseRecorder(os.path.expanduser(config["record_path"]))
+        recorder.start()
+    accounts = []
+    cookie_paths = []
+    monitors = []
+
+    try:
+        if config["accounts"]:
+            for index, account_settings in enumerate(config["accounts"], 1):
+                settings = {key: account_settings.get(key, config[key]) for key in ACCOUNT_KEYS}
+                settings["user_id"] = account_settings.get("user_id")  # Never inherited: it names one account
+                # Market and holder data are shared, so only the first account records
+                accounts.append(open_account(account_settings.get("name", f"acct{index}"), settings, frontend, journal,
+                                             recorder if index == 1 else None))
+                cookie_paths.append(os.path.expanduser(settings["cookie_path"]))
+        else:
+            accounts.append(open_account("main", config, frontend, journal, recorder))
+            cookie_paths.append(config["cookie_path"])
+
+        engine = build_engine(config, frontend, accounts, trace_recorder, coin_index, journal)
+        for account, cookie_path in zip(accounts, cookie_paths):
+            monitors.append(start_session_monitor(account, cookie_path, engine, frontend))
+        stop_event = threading.Event()
+        signal.signal(signal.SIGINT, lambda sig, frame: stop_event.set())
+        signal.signal(signal.SIGTERM, lambda sig, frame: stop_event.set())
+
+        engine.start()
+        frontend.status(f"Headless {config['bot']} bot started for {len(accounts)} account(s). Press Ctrl+C to stop.")
+        stop_event.wait(config["duration"])
+        engine.stop()
+        deadline = time.monotonic() + 5
+        while engine.is_running() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        frontend.status("Headless bot stopped.")
+        for transition, count, p50, p99, worst, _ in trace_recorder.summary():
+            frontend.status(f"{transition}: n={count} p50={p50:.1f}ms p99={p99:.1f}ms max={worst:.1f}ms")
+        caches = [(account.name, account.api.cache) for account in accounts]
+        if isinstance(engine, botcore.AsyncSniperEngine):
+            caches.append(("async", engine.cache))
+        for name, cache in caches:
+            if cache:
+                frontend.status(f"[{name}] Response cache: {cache.summary()}")
+        if botcore.rate_scheduler():
+            frontend.status(f"Rate scheduler: {botcore.rate_scheduler().summary()}")
+        return 0
+    finally:
+        for monitor in monitors:
+            monitor.stop()
+        for account in accounts:
+            account.close()
+        coin_index.close()
+        journal.close()
+        if recorder:
+            recorder.close()
+        log_sink.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Rugplay bots without the GUI.")
+    parser.add_argument("--config", help="JSON config file (see module docstring).")
+    parser.add_argument("--bot", choices=["sniper", "random"], help="Overrides the config's bot.")
+    parser.add_argument("--engine", choices=["threads", "asyncio"], help="Overrides the config's sniper engine.")
+    parser.add_argument("--cookie-path", help="Overrides where the saved session cookie is read from.")
+    parser.add_argument("--duration", type=float, help="Seconds to run before stopping.")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    for key in ("bot", "engine", "cookie_path", "duration"):
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+    config["cookie_path"] = os.path.expanduser(config["cookie_path"])
+    sys.exit(run(config))
+
+
+if __name__ == "__main__":
+    main()
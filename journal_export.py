@@ -0,0 +1,47 @@
+"""
+Exports the trade journal (TRADE_JOURNAL_PATH, one JSON record per trade) for
+analysis: every trade as a table, and one row per snipe with its cost, proceeds
+and PnL. Files ending in .parquet are written with pyarrow, anything else as CSV.
+
+Usage:  python journal_export.py --trades trades.csv --snipes snipes.parquet
+"""
+import argparse
+import os
+import sys
+
+import botcore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the trade journal to CSV or Parquet.")
+    parser.add_argument("--journal", default=botcore.TRADE_JOURNAL_PATH, help="Journal file to read.")
+    parser.add_argument("--trades", help="Write every trade to this file.")
+    parser.add_argument("--snipes", help="Write per-snipe PnL to this file.")
+    parser.add_argument("--strategy", help="Only export trades of this strategy (sniper, random, manual, sell_all).")
+    args = parser.parse_args()
+    if not args.trades and not args.snipes:
+        parser.error("Give --trades and/or --snipes.")
+
+    journal_path = os.path.expanduser(args.journal)
+    if not os.path.exists(journal_path):
+        sys.exit(f"No trade journal at {journal_path}.")
+    records = botcore.read_journal(journal_path)
+    if args.strategy:
+        records = [record for record in records if record.get("strategy") == args.strategy]
+
+    try:
+        if args.trades:
+            botcore.write_table(records, botcore.TradeJournal.FIELDS, args.trades)
+            print(f"{len(records)} trades written to {args.trades}")
+        if args.snipes:
+            snipes = botcore.snipe_pnl(records)
+            botcore.write_table(snipes, botcore.SNIPE_PNL_FIELDS, args.snipes)
+            closed = [snipe for snipe in snipes if snipe["pnl"] is not None]
+            total = sum(snipe["pnl"] for snipe in closed)
+            print(f"{len(snipes)} snipes written to {args.snipes} ({len(closed)} with PnL, total {total:+.2f} USD)")
+    except RuntimeError as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Local stand-in for the Rugplay endpoints the bot talks to, used to measure
+and regress the bot's speed without the live site.
+
+Coin launches, outside buyers and per-endpoint latency can be scripted from
+Python (see benchmark.py) or over HTTP through the /__mock__ control routes:
+
+    POST /__mock__/launch   {"symbol": "ABC"}           -> launches a coin
+    POST /__mock__/buyer    {"symbol": "ABC"}           -> another user buys in
+    POST /__mock__/latency  {"endpoint": "market", "seconds": 0.05}
+    POST /__mock__/session  {"cookie": "session=abc"}   -> only this Cookie header is logged in
+    GET  /__mock__/events                               -> launch/trade/buyer timeline
+
+Run standalone:  python mock_server.py --port 8765 --launch-every 10 --buyer-delay 3
+Then start the bot with RUGPLAY_BASE_URL=http://127.0.0.1:8765
+
+With --etags (or MockRugplay(etags=True)) GET responses carry an ETag and a
+matching If-None-Match is answered with 304, counted as "<endpoint>_304".
+With --rate-limit N (or MockRugplay(rate_limit=N)) API requests beyond N per
+second are answered with 429 and Retry-After, counted as "<endpoint>_429".
+"""
+import argparse
+import collections
+import hashlib
+import itertools
+import json
+import math
+import random
+import re
+import string
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+MOCK_USER_ID = "mock-user"
+STARTING_BALANCE = 10000.0
+INITIAL_POOL_COIN_AMOUNT = 1_000_000.0
+INITIAL_POOL_BASE_AMOUNT = 1_000.0
+# The mock's own pool limit. It is deliberately not the bot's POOL_MAX_SELL_RATIO
+# estimate, so a benchmark shows whether the bot copes with a stricter server.
+POOL_SELL_LIMIT_RATIO = 0.9
+
+COIN_ROUTE = re.compile(r"^/api/coin/([^/]+)(/holders|/trade)?$")
+
+
+class MockRugplay:
+    """
+    In-memory market state behind the mock server. Pools use a constant-product
+    curve so trade sizes and the pool sell limit behave plausibly.
+    Every launch, trade and buyer join is timestamped with time.monotonic().
+    """
+    def __init__(self, starting_balance=STARTING_BALANCE, auto_buyer_delay=None, require_cookie=False, etags=False,
+                 rate_limit=None):
+        self.balance = starting_balance
+        self.auto_buyer_delay = auto_buyer_delay
+        self.require_cookie = require_cookie
+        self.etags = etags
+        self.rate_limit = rate_limit
+        self.session_cookie = None
+        self._recent_requests = collections.deque()
+        self.coins = []
+        self.holders = {}
+        self.latency = {}
+        self.events = []
+        self.request_counts = {}
+        self._lock = threading.RLock()
+        self._buyer_counter = itertools.count(1)
+        self._server = None
+
+    # --- Scripting API ---
+    def launch_coin(self, symbol=None, name=None):
+        symbol = symbol or "".join(random.choices(string.ascii_uppercase, k=5))
+        coin = {
+            "symbol": symbol,
+            "name": name or f"{symbol} Coin",
+            "createdAt": datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "poolCoinAmount": INITIAL_POOL_COIN_AMOUNT,
+            "poolBaseCurrencyAmount": INITIAL_POOL_BASE_AMOUNT,
+        }
+        with self._lock:
+            self.coins.append(coin)
+            self.holders[symbol] = {f"creator-{symbol}": INITIAL_POOL_COIN_AMOUNT * 0.05}
+            self._record("launch", symbol)
+        return coin
+
+    def add_buyer(self, symbol, quantity=1000.0):
+        with self._lock:
+            if symbol not in self.holders:
+                return None
+            user_id = f"buyer-{next(self._buyer_counter)}"
+            self.holders[symbol][user_id] = quantity
+            self._record("buyer", symbol, user_id=user_id)
+            return user_id
+
+    def schedule(self, delay, fn, *args):
+        timer = threading.Timer(delay, fn, args)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def set_latency(self, endpoint, seconds):
+        """Adds a fixed delay to one endpoint: market, coin, holders, portfolio or trade."""
+        with self._lock:
+            self.latency[endpoint] = seconds
+
+    def admit(self):
+        """Counts one API request against the rate limit; False when it is over the limit."""
+        with self._lock:
+            if not self.rate_limit:
+                return True
+            now = time.monotonic()
+            while self._recent_requests and now - self._recent_requests[0] >= 1.0:
+                self._recent_requests.popleft()
+            if len(self._recent_requests) >= self.rate_limit:
+                return False
+            self._recent_requests.append(now)
+            return True
+
+    def events_of(self, kind):
+        with self._lock:
+            return [e for e in self.events if e["kind"] == kind]
+
+    # --- Server lifecycle ---
+    def start(self, host="127.0.0.1", port=0):
+        """Starts serving in a background thread and returns the base URL."""
+        handler = type("BoundMockHandler", (MockRugplayHandler,), {"state": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # --- Endpoint logic ---
+    def market(self, limit):
+        with self._lock:
+            coins = sorted(self.coins, key=lambda c: c["createdAt"], reverse=True)[:limit]
+            return {"coins": [self._coin_view(c) for c in coins]}
+
+    def coin(self, symbol):
+        with self._lock:
+            coin = self._find_coin(symbol)
+            return {"coin": self._coin_view(coin)} if coin else None
+
+    def holders_of(self, symbol, limit, offset=0):
+        with self._lock:
+            if symbol not in self.holders:
+                return None
+            ranked = sorted(self.holders[symbol].items(), key=lambda h: h[1], reverse=True)
+            page = ranked[offset:offset + limit]
+            return {
+                "coinSymbol": symbol,
+                "totalHolders": len(ranked),
+                "holders": [{"rank": offset + i + 1, "userId": user_id, "username": user_id, "quantity": quantity}
+                            for i, (user_id, quantity) in enumerate(page)],
+            }
+
+    def portfolio(self):
+        with self._lock:
+            holdings = []
+            for symbol, holders in self.holders.items():
+                quantity = holders.get(MOCK_USER_ID, 0.0)
+                if quantity > 0:
+                    price = self._price(self._find_coin(symbol))
+                    holdings.append({"symbol": symbol, "quantity": quantity, "currentPrice": price, "value": quantity * price})
+            return {
+                "baseCurrencyBalance": self.balance,
+                "totalCoinValue": sum(h["value"] for h in holdings),
+                "coinHoldings": holdings,
+                "currency": "$",
+            }
+
+    def trade(self, symbol, trade_type, amount):
+        with self._lock:
+            coin = self._find_coin(symbol)
+            if not coin:
+                return 404, {"success": False, "message": "Coin not found"}
+            if amount <= 0:
+                return 400, {"success": False, "message": "Invalid amount"}
+            pool_coin, pool_base = coin["poolCoinAmount"], coin["poolBaseCurrencyAmount"]
+            k = pool_coin * pool_base
+            holders = self.holders[symbol]
+
+            if trade_type == "BUY":
+                if amount > self.balance:
+                    return 400, {"success": False, "message": "Insufficient funds"}
+                coins_bought = pool_coin - k / (pool_base + amount)
+                coin["poolBaseCurrencyAmount"] = pool_base + amount
+                coin["poolCoinAmount"] = pool_coin - coins_bought
+                self.balance -= amount
+                holders[MOCK_USER_ID] = holders.get(MOCK_USER_ID, 0.0) + coins_bought
+                self._record("trade", symbol, side="BUY", amount=amount)
+                if self.auto_buyer_delay is not None:
+                    self.schedule(self.auto_buyer_delay, self.add_buyer, symbol)
+                return 200, {"success": True, "type": "BUY", "coinsBought": coins_bought, "totalCost": amount,
+                             "newPrice": self._price(coin), "newBalance": self.balance}
+
+            if trade_type == "SELL":
+                held = holders.get(MOCK_USER_ID, 0.0)
+                if amount > held + 1e-9:
+                    return 400, {"success": False, "message": "Insufficient coins"}
+                max_sellable = math.floor(pool_coin * POOL_SELL_LIMIT_RATIO)
+                if amount > max_sellable:
+                    return 400, {"success": False, "message": f"Cannot sell more than {max_sellable} coins at once"}
+                received = pool_base - k / (pool_coin + amount)
+                coin["poolCoinAmount"] = pool_coin + amount
+                coin["poolBaseCurrencyAmount"] = pool_base - received
+                self.balance += received
+                holders[MOCK_USER_ID] = held - amount
+                if holders[MOCK_USER_ID] <= 1e-9:
+                    del holders[MOCK_USER_ID]
+                self._record("trade", symbol, side="SELL", amount=amount)
+                return 200, {"success": True, "type": "SELL", "coinsSold": amount, "totalReceived": received,
+                             "newPrice": self._price(coin), "newBalance": self.balance}
+
+            return 400, {"success": False, "message": f"Unknown trade type {trade_type}"}
+
+    # --- Helpers ---
+    def _find_coin(self, symbol):
+        return next((c for c in self.coins if c["symbol"] == symbol), None)
+
+    def _price(self, coin):
+        return coin["poolBaseCurrencyAmount"] / coin["poolCoinAmount"] if coin else 0.0
+
+    def _coin_view(self, coin):
+        view = dict(coin)
+        view["currentPrice"] = self._price(coin)
+        return view
+
+    def _record(self, kind, symbol, **fields):
+        self.events.append(dict(kind=kind, symbol=symbol, at=time.monotonic(), **fields))
+
+
+class MockRugplayHandler(BaseHTTPRequestHandler):
+    """Routes the bot's API paths onto a MockRugplay instance (bound as `state`)."""
+    state = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/__mock__/events":
+            with self.state._lock:
+                return self._send_json(200, {"events": list(self.state.events)})
+        if not self._authorized():
+            return
+        if url.path == "/api/market":
+            return self._respond("market", 200, self.state.market(int(query.get("limit", ["50"])[0])))
+        if url.path == "/api/portfolio/total":
+            return self._respond("portfolio", 200, self.state.portfolio())
+        if url.path == "/api/auth/get-session":
+            return self._respond("session", 200, {"user": {"id": MOCK_USER_ID, "username": MOCK_USER_ID}})
+
+        match = COIN_ROUTE.match(url.path)
+        if match and match.group(2) == "/holders":
+            limit = int(query.get("limit", ["50"])[0])
+            offset = int(query.get("offset", ["0"])[0])
+            data = self.state.holders_of(match.group(1), limit, offset)
+            return self._respond("holders", 200 if data else 404, data or {"message": "Coin not found"})
+        if match and not match.group(2):
+            data = self.state.coin(match.group(1))
+            return self._respond("coin", 200 if data else 404, data or {"message": "Coin not found"})
+        self._send_json(404, {"message": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._read_json()
+        if url.path == "/__mock__/launch":
+            return self._send_json(200, self.state.launch_coin(body.get("symbol"), body.get("name")))
+        if url.path == "/__mock__/buyer":
+            return self._send_json(200, {"userId": self.state.add_buyer(body["symbol"])})
+        if url.path == "/__mock__/latency":
+            self.state.set_latency(body["endpoint"], float(body["seconds"]))
+            return self._send_json(200, {"ok": True})
+        if url.path == "/__mock__/session":
+            # Rotates the session: requests with any other cookie now get the login page
+            self.state.session_cookie = body.get("cookie")
+            return self._send_json(200, {"ok": True})
+        if not self._authorized():
+            return
+
+        match = COIN_ROUTE.match(url.path)
+        if match and match.group(2) == "/trade":
+            status, data = self.state.trade(match.group(1), str(body.get("type", "")).upper(), float(body.get("amount", 0)))
+            return self._respond("trade", status, data)
+        self._send_json(404, {"message": "Not found"})
+
+    def _authorized(self):
+        """Mimics an expired session: without a (or the current) cookie the site serves its HTML login page."""
+        cookie = self.headers.get("Cookie")
+        if (self.state.require_cookie and not cookie) or (self.state.session_cookie and cookie != self.state.session_cookie):
+            self._send(200, b"<!doctype html><html><body>Login</body></html>", "text/html")
+            return False
+        return True
+
+    def _respond(self, endpoint, status, data):
+        if not self.state.admit():
+            self._count(f"{endpoint}_429")
+            return self._send_json(429, {"message": "Too many requests"}, {"Retry-After": "1"})
+        with self.state._lock:
+            self.state.request_counts[endpoint] = self.state.request_counts.get(endpoint, 0) + 1
+            delay = self.state.latency.get(endpoint, 0)
+        if delay:
+            time.sleep(delay)
+        if not (self.state.etags and self.command == "GET" and status == 200):
+            return self._send_json(status, data)
+
+        body = json.dumps(data).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._count(f"{endpoint}_304")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send(status, body, "application/json", {"ETag": etag})
+
+    def _count(self, key):
+        with self.state._lock:
+            self.state.request_counts[key] = self.state.request_counts.get(key, 0) + 1
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            return {}
+
+    def _send_json(self, status, data, headers=None):
+        self._send(status, json.dumps(data).encode(), "application/json", headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Rugplay API for offline testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--launch-every", type=float, default=0, help="Launch a coin every N seconds (0 = never).")
+    parser.add_argument("--buyer-delay", type=float, default=None, help="Seconds after each bot BUY before an outside buyer joins.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latency injected into every endpoint, in seconds.")
+    parser.add_argument("--etags", action="store_true", help="Send ETags and answer matching conditional GETs with 304.")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Answer API requests beyond N per second with 429.")
+    args = parser.parse_args()
+
+    mock = MockRugplay(auto_buyer_delay=args.buyer_delay, etags=args.etags, rate_limit=args.rate_limit)
+    for endpoint in ("market", "coin", "holders", "portfolio", "trade"):
+        mock.set_latency(endpoint, args.latency)
+    base_url = mock.start(args.host, args.port)
+    print(f"[INFO] Mock Rugplay serving at {base_url}")
+    try:
+        while True:
+            if args.launch_every:
+                time.sleep(args.launch_every)
+                print(f"[INFO] Launched {mock.launch_coin()['symbol']}")
+            else:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import pytest
+
+
+class Clock:
+    """A settable stand-in for time.monotonic."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
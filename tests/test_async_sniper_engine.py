@@ -0,0 +1,92 @@
+import asyncio
+
+from botcore import AsyncSniperEngine, HolderSet, SnipeTrace
+
+
+class NullBridge:
+    def post(self, callback, *args):
+        callback(*args)
+
+    def status(self, gui, console=None, is_error=False):
+        pass
+
+
+class FakeAsyncEngine(AsyncSniperEngine):
+    """Answers holder pages from `holders` and fills every trade, without any HTTP."""
+    def __init__(self, **kwargs):
+        super().__init__(NullBridge(), "session=abc", lambda: 10, **kwargs)
+        self.holder_monitor.tick = 0.01
+        self.holders = {}
+        self.holder_requests = []
+        self.trades = []
+        self.sold = []
+
+    async def _fetch(self, url, decode=None):
+        token_symbol = url.split("/coin/")[1].split("/")[0]
+        self.holder_requests.append(token_symbol)
+        return HolderSet(dict.fromkeys(self.holders[token_symbol], 1.0), len(self.holders[token_symbol]))
+
+    async def _trade(self, token_symbol, trade_type, amount, worker_name, trace=None):
+        self.trades.append((token_symbol, trade_type))
+        self.holders.setdefault(token_symbol, {"creator"})
+        self.holders[token_symbol].add("me")
+        return True
+
+    async def _sell_position(self, token_symbol, log_prefix, worker_name, trace):
+        self.sold.append(token_symbol)
+        return True
+
+
+def run(engine, scenario):
+    async def main():
+        engine._loop = asyncio.get_running_loop()
+        engine._spawn(engine._holder_monitor_loop())
+        try:
+            await scenario()
+        finally:
+            for task in list(engine._tasks):
+                task.cancel()
+    asyncio.run(main())
+
+
+def test_joins_by_ignored_users_do_not_trigger_the_exit():
+    engine = FakeAsyncEngine(ignore_users={"alt"})
+
+    async def scenario():
+        await engine._buy("AAA", SnipeTrace("AAA"))
+        engine.holders["AAA"].add("alt")
+        await asyncio.sleep(0.05)
+        assert engine.sold == []
+        engine.holders["AAA"].add("bob")
+        await asyncio.sleep(0.05)
+        assert engine.sold == ["AAA"]
+
+    run(engine, scenario)
+    assert engine._open_positions == 0
+
+
+def test_no_buy_while_max_open_positions_are_held():
+    engine = FakeAsyncEngine(max_open_positions=1)
+
+    async def scenario():
+        await engine._buy("AAA", SnipeTrace("AAA"))
+        await engine._buy("BBB", SnipeTrace("BBB"))
+
+    run(engine, scenario)
+    assert engine.trades == [("AAA", "BUY")]
+
+
+def test_positions_on_one_coin_share_a_holders_request_per_tick():
+    engine = FakeAsyncEngine()
+    engine.holder_monitor.tick = 3600
+
+    async def scenario():
+        await engine._buy("AAA", SnipeTrace("AAA"))
+        await engine._buy("AAA", SnipeTrace("AAA"))
+        await engine._buy("BBB", SnipeTrace("BBB"))
+        engine.holder_requests.clear()
+        await engine._holder_monitor_tick(asyncio.Semaphore(2))
+
+    run(engine, scenario)
+    assert sorted(engine.holder_requests) == ["AAA", "BBB"]
+    assert engine.holder_monitor.open_positions() == 3
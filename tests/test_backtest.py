@@ -0,0 +1,61 @@
+import json
+
+import backtest
+import botcore
+from botcore import ResponseRecorder
+
+
+def market(*coins):
+    return json.dumps({"coins": [{"symbol": symbol, "createdAt": f"2024-01-01T00:00:{second:02d}Z"} for symbol, second in coins]})
+
+
+def holders(*users):
+    return json.dumps({"holders": [{"userId": user, "quantity": 100} for user in users], "totalHolders": len(users)})
+
+
+def write_recording(path, responses):
+    """Writes (t, url, body) responses in the format ResponseRecorder produces."""
+    with open(path, "w") as f:
+        for t, url, body in responses:
+            f.write(json.dumps({"t": t, "path": ResponseRecorder.key(url), "body": body}) + "\n")
+
+
+def holders_url(symbol):
+    return botcore.HOLDERS_API_URL_TEMPLATE.format(token_symbol=symbol, offset=0)
+
+
+def test_recorder_writes_paths_without_the_host(tmp_path):
+    path = str(tmp_path / "rec.jsonl")
+    recorder = ResponseRecorder(path, flush_interval=0.01)
+    recorder.start()
+    recorder.record("https://example.com/api/coin/AAA", b'{"coin": {}}')
+    recorder.close()
+    recording = backtest.Recording(path)
+    assert recording.count == 1
+    assert recording.at("http://127.0.0.1:1/api/coin/AAA", recording.end) == '{"coin": {}}'
+    assert recording.at("http://127.0.0.1:1/api/coin/AAA", recording.start - 1) is None
+
+
+def test_replay_exits_on_a_new_buyer_or_the_timeout(tmp_path):
+    path = str(tmp_path / "rec.jsonl")
+    write_recording(path, [
+        (0.0, botcore.SCAN_WINDOW_API_URL, market(("AAA", 0))),
+        (0.5, holders_url("BBB"), holders("creator")),
+        (1.0, botcore.SCAN_WINDOW_API_URL, market(("BBB", 1), ("AAA", 0))),
+        (1.0, botcore.COIN_API_URL_TEMPLATE.format(token_symbol="BBB"), json.dumps({"coin": {"currentPrice": 0.01, "poolCoinAmount": 1e6}})),
+        (2.0, botcore.SCAN_WINDOW_API_URL, market(("CCC", 2), ("BBB", 1), ("AAA", 0))),
+        (2.0, holders_url("CCC"), holders("creator")),
+        (5.0, holders_url("BBB"), holders("creator", "buyer")),
+        (20.0, botcore.SCAN_WINDOW_API_URL, market(("CCC", 2), ("BBB", 1), ("AAA", 0))),
+    ])
+    recording = backtest.Recording(path)
+    snipes = backtest.replay(recording, scan_interval=0.5, tick=1.0, monitor_duration=10, new_holders=1,
+                             buy_amount=10, sell_fraction=0.8)
+
+    bbb, ccc = snipes
+    assert (bbb.symbol, bbb.detected_at, bbb.entry_price) == ("BBB", 1.0, 0.01)
+    assert bbb.new_buyer_found and 5.0 <= bbb.exited_at <= 6.0
+    assert bbb.exit_action == "80% 800"
+    assert (ccc.symbol, ccc.new_buyer_found) == ("CCC", False)
+    assert 12.0 <= ccc.exited_at <= 13.0
+    assert ccc.exit_action is None  # No coin data was recorded, so there is no entry price
@@ -0,0 +1,23 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("engine", ["asyncio", "threads"])
+def test_engine_snipes_every_coin_on_the_mock_server(engine, tmp_path):
+    """Runs benchmark.py in its own process, since the bot reads RUGPLAY_BASE_URL when it is imported."""
+    if engine == "asyncio":
+        pytest.importorskip("aiohttp")
+    out = str(tmp_path / "samples.json")
+    subprocess.run([sys.executable, "benchmark.py", "--engine", engine, "--coins", "3", "--interval", "0.5",
+                    "--buyer-delay", "0.2", "--warmup", "1", "--timeout", "20", "--json", out],
+                   cwd=ROOT, check=True, capture_output=True, timeout=60)
+    with open(out) as f:
+        samples = json.load(f)["samples"]
+    assert len(samples["launch->buy"]) == 3
+    assert len(samples["buy->sell"]) == 3
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BLOCK_GUI = "import sys; sys.modules.update(tkinter=None, selenium=None); "
+
+
+def run_blocked(code):
+    """Runs code in a fresh interpreter where importing tkinter or selenium fails."""
+    return subprocess.run([sys.executable, "-c", BLOCK_GUI + code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+
+
+def test_engines_import_without_tkinter_or_selenium():
+    result = run_blocked("import botcore, headless, backtest, journal_export; "
+                         "api = botcore.RugplayHTTPAPI(None, 'session=x'); print(api.is_browser_open())")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
+
+
+def test_the_gui_module_is_what_needs_them():
+    result = run_blocked("import tradingbot")
+    assert result.returncode != 0
+    assert "ModuleNotFoundError" in result.stderr
@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from botcore import CoinIndex, CoinListing, CoinScanner, NewCoinDetector, ScanResponseFilter
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "coins.db")
+
+
+def test_seen_coins_survive_a_restart(index_path):
+    index = CoinIndex(index_path)
+    index.record_seen([CoinListing("A", 1.0), CoinListing("B", 2.0)], detected_at=100.0)
+    index.record_seen([CoinListing("A", 1.0)], detected_at=200.0)
+    index.close()
+
+    index = CoinIndex(index_path)
+    assert index.coin_count() == 2
+    assert index.is_seen("A") and not index.is_seen("C")
+    assert index._coins["A"] == (1.0, 100.0)
+    index.close()
+
+
+def test_seed_resumes_after_a_quick_restart(index_path):
+    index = CoinIndex(index_path)
+    index.record_seen([CoinListing("A", 1.0), CoinListing("B", 2.0)])
+    detector = NewCoinDetector()
+    assert index.seed(detector)
+    assert detector.initialized
+    assert detector.is_seen("A") and detector.newest_symbol == "B"
+    index.close()
+
+
+def test_seed_rebaselines_after_a_long_stop(index_path):
+    index = CoinIndex(index_path)
+    index.record_seen([CoinListing("A", 1.0)], detected_at=time.time() - 3600)
+    detector = NewCoinDetector()
+    assert not index.seed(detector, resume_window=60)
+    assert not detector.initialized
+    assert detector.is_seen("A")
+    index.close()
+
+
+def test_each_account_buys_a_coin_once_across_restarts(index_path):
+    index = CoinIndex(index_path)
+    assert index.claim_buy("A", "main")
+    assert not index.claim_buy("A", "main")
+    assert index.claim_buy("A", "alt")
+    index.record_buy("A", "main", 10, True)
+    index.close()
+
+    index = CoinIndex(index_path)
+    assert not index.claim_buy("A", "main")
+    assert index.position("A", "main")['buy_outcome'] == 'bought'
+    index.close()
+
+
+def test_open_positions_are_bought_and_not_sold(index_path):
+    index = CoinIndex(index_path)
+    for symbol in ("A", "B", "C", "D"):
+        index.claim_buy(symbol, "main")
+    index.record_buy("A", "main", 10, True)
+    index.record_buy("B", "main", 10, True)
+    index.record_buy("C", "main", 10, False)
+    index.record_buy("D", "main", 10, True)
+    index.record_sell("B", "main", True)
+    index.record_sell("D", "main", False)
+    assert index.open_positions("main") == ["A", "D"]
+    assert index.open_positions("alt") == []
+    index.close()
+
+
+def test_writes_after_close_only_update_memory(index_path):
+    index = CoinIndex(index_path)
+    index.claim_buy("A", "main")
+    index.record_buy("A", "main", 10, True)
+    index.close()
+    index.record_sell("A", "main", True)
+    assert index.position("A", "main")['sell_outcome'] == 'sold'
+
+    index = CoinIndex(index_path)
+    assert index.position("A", "main")['sell_outcome'] is None
+    index.close()
+
+
+def test_a_claim_left_pending_by_a_crash_still_counts_after_restart(index_path):
+    index = CoinIndex(index_path)
+    assert index.claim_buy("A", "main")
+    index.close()  # No record_buy: the process died with the buy in flight
+
+    index = CoinIndex(index_path)
+    assert index.position("A", "main")['buy_outcome'] == 'pending'
+    assert not index.claim_buy("A", "main")
+    assert index.open_positions("main") == []
+    index.close()
+
+
+class NullFrontend:
+    def status(self, gui, console=None, is_error=False):
+        pass
+
+
+class ListingsAPI:
+    def __init__(self, listings):
+        self.listings = listings
+
+    def get_latest_listings(self):
+        return self.listings
+
+
+def test_scanner_indexes_new_coins_after_handing_them_out(index_path):
+    index = CoinIndex(index_path)
+    listings = [CoinListing("B", 2.0), CoinListing("A", 1.0)]
+    scanner = CoinScanner(NullFrontend(), lambda: ListingsAPI(listings), coin_index=index, hedge=1)
+    scanner._detector = NewCoinDetector()
+    scanner._detector.baseline(listings[1:])
+    scanner._filter = ScanResponseFilter()
+    seen_at_submit = []
+    scanner.subscribe(lambda coin, trace: seen_at_submit.append(index.is_seen(coin.symbol)))
+
+    scanner._poll(0)
+    assert seen_at_submit == [False]
+    assert index.is_seen("B")
+    index.close()
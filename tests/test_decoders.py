@@ -0,0 +1,43 @@
+import pytest
+
+from botcore import (CoinListing, HolderSet, TradeResult, decode_coin_listings, decode_holder_set,
+                        decode_trade_result, parse_created_at)
+
+
+def test_coin_listings_keep_symbol_and_parsed_created_at():
+    listings = decode_coin_listings(b'{"coins": [{"symbol": "AAA", "createdAt": "2024-01-01T00:00:00Z", "name": "x"},'
+                                    b' {"symbol": "BBB"}, {"name": "no symbol"}]}')
+    assert [(coin.symbol, coin.created_at) for coin in listings] == [
+        ("AAA", parse_created_at("2024-01-01T00:00:00Z")), ("BBB", None)]
+    assert parse_created_at("2024-01-01T00:00:00Z") == 1704067200.0
+
+
+def test_holder_set_maps_users_to_quantities():
+    holders = decode_holder_set('{"holders": [{"userId": 1, "quantity": "5.5"}, {"username": "bob"}], "totalHolders": 7}')
+    assert (holders.holders, holders.total) == ({"1": 5.5, "bob": 0.0}, 7)
+
+
+def test_trade_result_fields_are_numbers():
+    result = decode_trade_result('{"success": true, "newBalance": "90.5", "coinsBought": 1000, "totalCost": 10}')
+    assert result.success is True
+    assert (result.new_balance, result.coins_bought, result.total_cost) == (90.5, 1000.0, 10.0)
+    assert result.coins_sold is None and result.message is None
+    assert not decode_trade_result('{"success": false, "message": "Insufficient funds"}').success
+
+
+@pytest.mark.parametrize("decode, body", [
+    (decode_coin_listings, '{"error": "x"}'),
+    (decode_holder_set, '{"coins": []}'),
+    (decode_trade_result, '[1, 2]'),
+    (decode_coin_listings, 'not json'),
+])
+def test_malformed_responses_raise_value_error(decode, body):
+    with pytest.raises(ValueError):
+        decode(body)
+
+
+@pytest.mark.parametrize("record", [CoinListing("AAA", None), HolderSet({}), TradeResult(True)])
+def test_records_are_slotted(record):
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.extra = 1
@@ -0,0 +1,16 @@
+import pytest
+
+import headless
+
+
+class StubAccount:
+    def __init__(self, name):
+        self.name = name
+        self.buy_amount = 10
+        self.buy_percentage = 0.0
+
+
+def test_asyncio_engine_with_several_accounts_is_rejected():
+    config = dict(headless.DEFAULT_CONFIG, engine="asyncio")
+    with pytest.raises(SystemExit, match="single account"):
+        headless.build_engine(config, None, [StubAccount("main"), StubAccount("alt")], None, None, None)
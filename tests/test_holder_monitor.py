@@ -0,0 +1,146 @@
+import threading
+import time
+
+from botcore import HolderMonitor, HolderSet
+
+
+class FakeHolderAPI:
+    """Serves one page per coin from a mutable user -> quantity dict."""
+    def __init__(self):
+        self.holders = {}
+        self.fail = False
+
+    def get_holder_page(self, token_symbol, offset=0):
+        if self.fail:
+            return {'error': "down"}
+        holders = dict(self.holders.get(token_symbol, {}))
+        return HolderSet(holders, len(holders))
+
+
+class GatedHolderAPI(FakeHolderAPI):
+    """Holds every holders request until the gate opens."""
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def get_holder_page(self, token_symbol, offset=0):
+        self.gate.wait(5)
+        return super().get_holder_page(token_symbol, offset)
+
+
+def make_monitor(api, clock, new_holders=1):
+    return HolderMonitor(lambda: api, tick=1.0, new_holders=new_holders, clock=clock)
+
+
+def record_triggers(fired):
+    return lambda position, found, count: fired.append((position.key, found, count))
+
+
+def test_buyer_joining_before_the_first_poll_triggers_the_exit(clock):
+    api = FakeHolderAPI()
+    api.holders["COIN"] = {"creator": 100, "me": 5}
+    monitor = make_monitor(api, clock)
+    fired = []
+    monitor.add_position("COIN", "W1", record_triggers(fired), duration=60)
+
+    api.holders["COIN"]["buyer"] = 3
+    monitor._poll_once()
+    assert fired == [("W1", True, 3)]
+    assert monitor.open_positions() == 0
+
+
+def test_own_buy_in_the_snapshot_is_not_a_join(clock):
+    api = FakeHolderAPI()
+    api.holders["COIN"] = {"creator": 100, "me": 5}
+    monitor = make_monitor(api, clock)
+    fired = []
+    monitor.add_position("COIN", "W1", record_triggers(fired), duration=60)
+    monitor._poll_once()
+    assert fired == []
+
+
+def test_shared_coin_counts_only_joins_after_each_positions_snapshot(clock):
+    api = FakeHolderAPI()
+    api.holders["COIN"] = {"creator": 100}
+    monitor = make_monitor(api, clock)
+    fired = []
+    monitor.add_position("COIN", "W1", record_triggers(fired), duration=60)
+
+    # The second position opens after "early" joined but before the monitor polled again
+    api.holders["COIN"]["early"] = 1
+    monitor.add_position("COIN", "W2", record_triggers(fired), duration=60)
+    monitor._poll_once()
+    assert fired == [("W1", True, 2)]
+
+    api.holders["COIN"]["late"] = 1
+    monitor._poll_once()
+    assert fired[1:] == [("W2", True, 3)]
+
+
+def test_without_a_snapshot_a_shared_trackers_first_diff_is_skipped(clock):
+    api = FakeHolderAPI()
+    api.holders["COIN"] = {"creator": 100}
+    monitor = make_monitor(api, clock)
+    fired = []
+    monitor.add_position("COIN", "W1", record_triggers(fired), duration=60)
+    monitor._poll_once()
+
+    api.fail = True
+    monitor.add_position("COIN", "W2", record_triggers(fired), duration=60)
+    api.fail = False
+    api.holders["COIN"]["me2"] = 1
+    monitor._poll_once()
+    assert fired == [("W1", True, 2)]
+
+
+def test_timeout_fires_without_a_buyer(clock):
+    api = FakeHolderAPI()
+    api.holders["COIN"] = {"creator": 100}
+    monitor = make_monitor(api, clock)
+    fired = []
+    monitor.add_position("COIN", "W1", record_triggers(fired), duration=5)
+    clock.now = 5
+    monitor._poll_once()
+    assert fired == [("W1", False, None)]
+
+
+def test_joins_by_the_bots_own_accounts_are_ignored(clock):
+    api = FakeHolderAPI()
+    api.holders["COIN"] = {"creator": 100, "main": 5}
+    monitor = make_monitor(api, clock)
+    monitor.ignore_users = {"main", "alt"}
+    fired = []
+    monitor.add_position("COIN", "main/W1", record_triggers(fired), duration=60)
+
+    api.holders["COIN"]["alt"] = 5
+    monitor._poll_once()
+    assert fired == []
+
+    api.holders["COIN"]["outsider"] = 1
+    monitor._poll_once()
+    assert fired == [("main/W1", True, 4)]
+
+
+def test_snapshot_is_read_on_the_monitor_not_the_callers_thread(clock):
+    api = GatedHolderAPI()
+    api.holders["COIN"] = {"creator": 100, "me": 5}
+    monitor = HolderMonitor(lambda: api, tick=60, clock=clock)
+    monitor.start()
+    try:
+        fired = []
+        position = monitor.add_position("COIN", "W1", record_triggers(fired), duration=60)
+        assert position.baseline_pending  # add_position returned while the snapshot is still blocked
+        monitor._poll_once()
+
+        api.gate.set()
+        deadline = time.monotonic() + 2
+        while position.baseline_pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert position.baseline == {"creator", "me"}
+        assert fired == []
+
+        api.holders["COIN"]["buyer"] = 3
+        monitor._poll_once()
+        assert fired == [("W1", True, 3)]
+    finally:
+        monitor.stop()
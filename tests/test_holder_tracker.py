@@ -0,0 +1,106 @@
+from botcore import HolderSet, HolderTracker
+
+
+class PagedHolders:
+    """Serves a user -> quantity dict in pages ordered by quantity, like the holders API."""
+    def __init__(self, holders, page_size):
+        self.holders = dict(holders)
+        self.page_size = page_size
+        self.offsets = []
+        self.fail_at = None
+
+    def __call__(self, offset):
+        self.offsets.append(offset)
+        if offset == self.fail_at:
+            return {'error': "down"}
+        ranked = sorted(self.holders.items(), key=lambda item: -item[1])
+        return HolderSet(dict(ranked[offset:offset + self.page_size]), len(ranked))
+
+
+def test_first_poll_sets_the_baseline():
+    tracker = HolderTracker(page_size=2)
+    diff = tracker.poll(PagedHolders({"a": 3, "b": 2, "c": 1}, 2))
+    assert not diff
+    assert diff.total == 3
+    assert tracker.holders == {"a": 3, "b": 2, "c": 1}
+
+
+def test_join_is_seen_when_the_count_does_not_move():
+    fetch = PagedHolders({"a": 3, "b": 2}, 50)
+    tracker = HolderTracker()
+    tracker.poll(fetch)
+    del fetch.holders["b"]
+    fetch.holders["new"] = 1
+    diff = tracker.poll(fetch)
+    assert diff.joined == {"new": 1}
+    assert diff.left == {"b": 2}
+    assert diff.total == 2
+
+
+def test_changed_quantities_are_reported():
+    fetch = PagedHolders({"a": 3, "b": 2}, 50)
+    tracker = HolderTracker()
+    tracker.poll(fetch)
+    fetch.holders["a"] = 5
+    diff = tracker.poll(fetch)
+    assert diff.changed == {"a": (3, 5)}
+    assert not diff.joined and not diff.left
+
+
+def test_join_past_the_first_page_is_found():
+    fetch = PagedHolders({"a": 5, "b": 4, "c": 3}, 2)
+    tracker = HolderTracker(page_size=2, stop_on_join=False)
+    tracker.poll(fetch)
+    fetch.holders["small"] = 1
+    diff = tracker.poll(fetch)
+    assert diff.joined == {"small": 1}
+
+
+def test_stop_on_join_stops_paging_at_the_first_new_user():
+    fetch = PagedHolders({"a": 5, "b": 4, "c": 3, "d": 2}, 2)
+    tracker = HolderTracker(page_size=2)
+    tracker.poll(fetch)
+    fetch.holders["whale"] = 10
+    fetch.offsets.clear()
+    diff = tracker.poll(fetch)
+    assert fetch.offsets == [0]
+    assert "whale" in diff.joined
+    assert not diff.left  # Not every page was read, so nobody is reported as leaving
+
+
+def test_joins_beyond_max_pages_are_hidden_joins():
+    fetch = PagedHolders({f"u{i}": 100 - i for i in range(6)}, 2)
+    tracker = HolderTracker(page_size=2, max_pages=1)
+    tracker.poll(fetch)
+    fetch.holders["tail1"] = 0.5
+    fetch.holders["tail2"] = 0.4
+    diff = tracker.poll(fetch)
+    assert not diff.joined
+    assert diff.hidden_joins == 2
+    assert diff
+
+
+def test_failed_page_keeps_what_earlier_pages_showed():
+    fetch = PagedHolders({"a": 5, "b": 4, "c": 3}, 2)
+    tracker = HolderTracker(page_size=2, stop_on_join=False)
+    tracker.poll(fetch)
+    fetch.fail_at = 2
+    fetch.holders["d"] = 4.5
+    diff = tracker.poll(fetch)
+    assert diff.joined == {"d": 4.5}
+    assert not diff.left
+
+
+def test_nothing_read_returns_none():
+    fetch = PagedHolders({"a": 1}, 2)
+    fetch.fail_at = 0
+    assert HolderTracker().poll(fetch) is None
+
+
+def test_unchanged_cached_pages_are_not_diffed():
+    page = HolderSet({"a": 1}, 1)
+    tracker = HolderTracker()
+    tracker.poll(lambda offset: page)
+    tracker.holders["stale"] = 1  # Would show as a leave if the page were diffed again
+    diff = tracker.poll(lambda offset: page)
+    assert not diff
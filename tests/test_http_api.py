@@ -0,0 +1,67 @@
+import http.server
+import threading
+
+import pytest
+
+from botcore import RugplayHTTPAPI
+
+
+class SessionHandler(http.server.BaseHTTPRequestHandler):
+    """Answers every GET with JSON, or the login page for the cookie "session=expired"."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.client_address, self.headers.get("Cookie")))
+        body = b"<html>Login</html>" if self.headers.get("Cookie") == "session=expired" else b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SessionHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/api/auth/get-session"
+
+
+def test_requests_share_one_keep_alive_connection(server):
+    api = RugplayHTTPAPI(None, "session=abc")
+    for _ in range(3):
+        assert api._fetch(url(server)) == {"ok": True}
+    api.close()
+    assert len(server.requests) == 3
+    assert len({client for client, _ in server.requests}) == 1
+    assert {cookie for _, cookie in server.requests} == {"session=abc"}
+
+
+def test_set_session_cookie_applies_to_the_next_request(server):
+    api = RugplayHTTPAPI(None, "session=abc")
+    api._fetch(url(server))
+    api.set_session_cookie("session=def")
+    api._fetch(url(server))
+    api.close()
+    assert [cookie for _, cookie in server.requests] == ["session=abc", "session=def"]
+
+
+def test_login_page_is_reported_as_an_error(server):
+    api = RugplayHTTPAPI(None, "session=expired")
+    assert "Session may be invalid" in api._fetch(url(server))['error']
+    api.close()
+
+
+def test_connection_errors_are_returned_not_raised():
+    api = RugplayHTTPAPI(None, "session=abc")
+    assert "API fetch failed" in api._fetch("http://127.0.0.1:9/api/auth/get-session")['error']
+    api.close()
@@ -0,0 +1,58 @@
+import os
+
+from botcore import LogSink
+
+
+class BatchRecordingSink(LogSink):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+
+    def _write_batch(self, text):
+        self.batches.append(text)
+        super()._write_batch(text)
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_queued_lines_are_written_in_one_batch(tmp_path):
+    path = str(tmp_path / "bot.log")
+    sink = BatchRecordingSink(path, echo=False, flush_interval=0.01)
+    for i in range(5):
+        sink.write(f"line {i}")
+    sink.start()
+    sink.close()
+    assert sink.batches == ["line 0\nline 1\nline 2\nline 3\nline 4\n"]
+    assert read(path) == sink.batches[0]
+
+
+def test_lines_are_echoed_to_stdout(tmp_path, capsys):
+    sink = LogSink(str(tmp_path / "bot.log"), flush_interval=0.01)
+    sink.start()
+    sink.write("hello")
+    sink.close()
+    assert capsys.readouterr().out == "hello\n"
+
+
+def test_file_is_rotated_and_backups_are_capped(tmp_path):
+    path = str(tmp_path / "bot.log")
+    sink = LogSink(path, max_bytes=10, backup_count=2, echo=False)
+    sink._file = open(path, "a", encoding="utf-8")
+    for i in range(4):
+        sink._write_batch(f"batch {i} is long\n")
+    sink._file.close()
+    assert sorted(os.listdir(tmp_path)) == ["bot.log", "bot.log.1", "bot.log.2"]
+    assert read(path + ".1") == "batch 3 is long\n"
+    assert read(path + ".2") == "batch 2 is long\n"
+    assert read(path) == ""
+
+
+def test_unwritable_path_still_echoes(tmp_path, capsys):
+    sink = LogSink(str(tmp_path / "missing" / "bot.log"), flush_interval=0.01)
+    sink.start()
+    sink.write("still here")
+    sink.close()
+    assert "still here\n" in capsys.readouterr().out
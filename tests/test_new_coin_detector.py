@@ -0,0 +1,88 @@
+from botcore import CoinListing, CoinScanner, NewCoinDetector, ScanResponseFilter, SCAN_WINDOW_SIZE
+
+
+def listings(*coins):
+    """Newest first, like the market API."""
+    return [CoinListing(symbol, created_at) for symbol, created_at in sorted(coins, key=lambda c: -c[1])]
+
+
+class RecordingFrontend:
+    def __init__(self):
+        self.lines = []
+
+    def post(self, callback, *args):
+        callback(*args)
+
+    def status(self, gui, console=None, is_error=False):
+        self.lines.append(gui)
+
+
+class FakeAPI:
+    def __init__(self, recent):
+        self.recent = recent
+
+    def get_recent_listings(self):
+        return self.recent
+
+
+def test_first_batch_only_sets_the_baseline():
+    detector = NewCoinDetector()
+    assert detector.process(listings(("A", 1), ("B", 2))) == ([], False)
+    assert detector.initialized
+    assert detector.watermark == 2
+    assert detector.newest_symbol == "B"
+
+
+def test_reports_new_coins_once_oldest_first():
+    detector = NewCoinDetector()
+    detector.baseline(listings(("A", 1)))
+    new_coins, gap = detector.process(listings(("A", 1), ("C", 3), ("B", 2)), window_size=5)
+    assert [c.symbol for c in new_coins] == ["B", "C"]
+    assert not gap
+    assert detector.process(listings(("A", 1), ("C", 3), ("B", 2)))[0] == []
+
+
+def test_skips_unseen_coins_older_than_the_watermark():
+    detector = NewCoinDetector()
+    detector.baseline(listings(("A", 10)))
+    new_coins, _ = detector.process(listings(("A", 10), ("OLD", 5), ("D", 11)))
+    assert [c.symbol for c in new_coins] == ["D"]
+
+
+def test_full_window_of_new_coins_is_a_gap():
+    detector = NewCoinDetector()
+    detector.baseline(listings(("A", 1)))
+    _, gap = detector.process(listings(("B", 2), ("C", 3)), window_size=2)
+    assert gap
+
+
+def test_fill_gap_finds_coins_behind_the_window():
+    detector = NewCoinDetector()
+    detector.baseline(listings(("A", 1)))
+    watermark = detector.watermark
+    window, gap = detector.process(listings(("D", 4), ("E", 5)), window_size=2)
+    assert gap
+    more = detector.fill_gap(listings(("A", 1), ("B", 2), ("C", 3), ("D", 4), ("E", 5)), watermark)
+    assert [c.symbol for c in window + more] == ["D", "E", "B", "C"]
+    assert detector.newest_symbol == "E"
+    assert detector.process(listings(("B", 2), ("C", 3), ("D", 4), ("E", 5)))[0] == []
+
+
+def test_seen_index_is_bounded():
+    detector = NewCoinDetector(seen_limit=2)
+    detector.baseline(listings(("A", 1), ("B", 2), ("C", 3)))
+    assert not detector.is_seen("A")
+    assert detector.is_seen("B") and detector.is_seen("C")
+
+
+def test_scanner_detects_a_burst_larger_than_the_window():
+    burst = [(f"N{i}", 100 + i) for i in range(SCAN_WINDOW_SIZE + 3)]
+    recent = listings(("OLD", 50), *burst)
+
+    scanner = CoinScanner(RecordingFrontend(), get_api=lambda: None, hedge=1)
+    scanner._detector = NewCoinDetector()
+    scanner._detector.baseline(listings(("OLD", 50)))
+    scanner._filter = ScanResponseFilter()
+
+    new_coins = scanner._detect(FakeAPI(recent), 0, recent[:SCAN_WINDOW_SIZE])
+    assert sorted(c.symbol for c in new_coins) == sorted(symbol for symbol, _ in burst)
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+from botcore import (AsyncSniperEngine, PortfolioLedger, PortfolioService, SnipeTrace, TradeResult,
+                        resolve_buy_amount)
+
+
+SNAPSHOT = {"baseCurrencyBalance": 100.0, "coinHoldings": [{"symbol": "AAA", "quantity": 50}]}
+
+
+class NullBridge:
+    def post(self, callback, *args):
+        callback(*args)
+
+    def status(self, gui, console=None, is_error=False):
+        pass
+
+
+def test_unknown_until_reconciled():
+    ledger = PortfolioLedger()
+    assert ledger.cash_balance() is None
+    assert ledger.quantity("AAA") is None
+    assert ledger.reconcile(SNAPSHOT, time.monotonic())
+    assert ledger.cash_balance() == 100.0
+    assert ledger.quantity("AAA") == 50
+    assert ledger.quantity("BBB") == 0.0
+
+
+def test_trades_apply_response_fields():
+    ledger = PortfolioLedger()
+    ledger.reconcile(SNAPSHOT, time.monotonic())
+    ledger.apply_trade("BBB", "BUY", 10, TradeResult(True, new_balance=90.0, coins_bought=1000))
+    assert ledger.cash_balance() == 90.0
+    assert ledger.quantity("BBB") == 1000
+    ledger.apply_trade("BBB", "SELL", 1000, TradeResult(True, total_received=12.5))
+    assert ledger.cash_balance() == 102.5
+    assert ledger.quantity("BBB") == 0.0
+
+
+def test_buy_without_a_balance_in_the_response_subtracts_the_cost():
+    ledger = PortfolioLedger()
+    ledger.reconcile(SNAPSHOT, time.monotonic())
+    ledger.apply_trade("BBB", "BUY", 10)
+    assert ledger.cash_balance() == 90.0
+
+
+def test_snapshot_fetched_before_a_trade_is_ignored():
+    ledger = PortfolioLedger()
+    started_at = time.monotonic()
+    ledger.begin_trade()
+    ledger.apply_trade("BBB", "BUY", 10, TradeResult(True, new_balance=90.0, coins_bought=1000))
+    ledger.end_trade()
+    assert not ledger.reconcile(SNAPSHOT, started_at)
+    assert ledger.cash_balance() == 90.0
+
+
+def test_snapshot_fetched_while_a_trade_is_in_flight_is_ignored():
+    ledger = PortfolioLedger()
+    ledger.begin_trade()
+    assert not ledger.reconcile(SNAPSHOT, time.monotonic())
+    ledger.end_trade()
+    assert ledger.reconcile(SNAPSHOT, time.monotonic())
+
+
+def test_resolve_buy_amount_refreshes_an_empty_ledger():
+    ledger = PortfolioLedger()
+    service = PortfolioService(lambda: SNAPSHOT, ledger=ledger, debounce=0)
+    assert resolve_buy_amount(None, 0.25, ledger, service) == 25
+    assert resolve_buy_amount("7", 0.25, ledger, service) == 7
+
+
+def test_async_engine_sizes_an_empty_ledger_off_the_event_loop():
+    threads = []
+
+    def resolve():
+        threads.append(threading.get_ident())
+        return 0
+
+    engine = AsyncSniperEngine(NullBridge(), "session=abc", resolve, ledger=PortfolioLedger())
+
+    async def buy():
+        engine._loop = asyncio.get_running_loop()
+        await engine._buy("AAA", SnipeTrace("AAA"))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(buy())
+    assert threads and threads[0] != loop_thread
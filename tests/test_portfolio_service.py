@@ -0,0 +1,52 @@
+import threading
+import time
+
+from botcore import PortfolioService
+
+
+class SlowPortfolio:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {"baseCurrencyBalance": 100.0 + self.calls, "coinHoldings": []}
+
+
+def test_refresh_returns_a_snapshot_fetched_after_the_call():
+    fetch = SlowPortfolio(delay=0)
+    service = PortfolioService(fetch, debounce=0)
+    first = service.refresh()
+    second = service.refresh()
+    assert first["baseCurrencyBalance"] == 101.0
+    assert second["baseCurrencyBalance"] == 102.0
+    assert service.snapshot is second
+
+
+def test_concurrent_refreshes_share_fetches():
+    fetch = SlowPortfolio()
+    service = PortfolioService(fetch, debounce=0.02)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.refresh())) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert len(results) == 10
+    assert fetch.calls <= 2
+    assert service.request_count == 10
+
+
+def test_errors_reach_on_error_and_keep_the_last_snapshot():
+    errors = []
+    responses = iter([{"baseCurrencyBalance": 5.0, "coinHoldings": []}, {'error': "down"}])
+    service = PortfolioService(lambda: next(responses), on_error=errors.append, debounce=0)
+    good = service.refresh()
+    assert service.refresh() == {'error': "down"}
+    deadline = time.monotonic() + 5  # Callbacks run after waiting callers are woken
+    while not errors and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert errors == [{'error': "down"}]
+    assert service.snapshot is good
@@ -0,0 +1,100 @@
+import socket
+import threading
+import time
+
+from botcore import PreArmedBuy
+
+
+def serve_once(handler):
+    """Listens on localhost and runs handler(conn) for the first connection."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+
+    def run():
+        conn, _ = server.accept()
+        try:
+            handler(conn)
+        finally:
+            conn.close()
+            server.close()
+
+    threading.Thread(target=run, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def armed_buy(port):
+    prearmed = PreArmedBuy(lambda: "session=abc", lambda: 10)
+    prearmed._https, prearmed._host, prearmed._port = False, "127.0.0.1", port
+    prearmed.amount = 10
+    prearmed._parts = prearmed._build_parts("session=abc", 10)
+    prearmed._armed_key = (10, "session=abc")
+    prearmed._sock = prearmed._connect()
+    return prearmed
+
+
+def read_request(conn):
+    data = b""
+    while b"\r\n\r\n" not in data:
+        data += conn.recv(4096)
+    return data
+
+
+def test_connection_dropped_while_idle_falls_back():
+    port = serve_once(lambda conn: None)
+    prearmed = armed_buy(port)
+    time.sleep(0.2)
+    assert prearmed.fire("COIN") is None
+
+
+def test_connection_dropped_after_the_request_is_an_error_not_a_fallback():
+    received = []
+    port = serve_once(lambda conn: received.append(read_request(conn)))
+    prearmed = armed_buy(port)
+
+    amount, status_code, message = prearmed.fire("COIN")
+    assert received and b"POST" in received[0] and b"COIN" in received[0]
+    assert amount == 10
+    assert status_code is None
+    assert "Trade response error" in message
+
+
+def test_response_is_returned():
+    def respond(conn):
+        read_request(conn)
+        body = b'{"success": true}'
+        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+
+    prearmed = armed_buy(serve_once(respond))
+    assert prearmed.fire("COIN") == (10, 200, '{"success": true}')
+
+
+class IdleSocket:
+    def close(self):
+        pass
+
+
+def test_arming_failures_and_the_recovery_are_reported():
+    amounts = iter([OSError("no route to host")])
+
+    def resolve_amount():
+        failure = next(amounts, None)
+        if failure:
+            raise failure
+        return 10
+
+    statuses = []
+    prearmed = PreArmedBuy(lambda: "session=abc", resolve_amount,
+                           on_status=lambda message, is_error=False: statuses.append((message, is_error)))
+    prearmed._connect = IdleSocket
+    prearmed.start()
+    try:
+        deadline = time.monotonic() + 3
+        while len(statuses) < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        prearmed.stop()
+    assert "no route to host" in statuses[0][0] and statuses[0][1]
+    assert statuses[1] == ("✅ [PREARM] Sniper buy armed again.", False)
+    assert prearmed.amount == 10
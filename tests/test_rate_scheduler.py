@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botcore import RATE_LIMIT_PENALTY, RateScheduler, TokenBucket, parse_retry_after
+
+
+def scheduler(clock, limits=None, global_limit=(100.0, 100)):
+    return RateScheduler(limits={"trade": (10.0, 2), "portfolio": (1.0, 1)} if limits is None else limits,
+                         global_limit=global_limit, priorities={"trade": 0, "portfolio": 3}, clock=clock)
+
+
+def test_bucket_refills_at_its_rate_up_to_burst():
+    bucket = TokenBucket(2.0, 3, now=0.0)
+    bucket.tokens = 0.0
+    bucket.refill(0.25)
+    assert bucket.tokens == 0.5
+    assert bucket.wait_time(0.25) == 0.25
+    bucket.refill(10.0)
+    assert bucket.tokens == 3.0
+    assert bucket.wait_time(10.0) == 0.0
+
+
+def test_paused_bucket_does_not_refill_until_the_pause_ends():
+    bucket = TokenBucket(1.0, 5, now=0.0)
+    bucket.tokens = 0.0
+    bucket.paused_until = 2.0
+    bucket.refill(1.0)
+    assert bucket.tokens == 0.0
+    assert bucket.wait_time(1.0) == 1.0
+    bucket.refill(3.0)
+    assert bucket.tokens == 1.0  # Only the second after the pause counts
+
+
+def test_try_acquire_takes_tokens_until_the_burst_is_spent(clock):
+    rates = scheduler(clock)
+    assert rates.try_acquire("trade")
+    assert rates.try_acquire("trade")
+    assert not rates.try_acquire("trade")
+    assert rates.try_acquire("portfolio")  # Endpoints have separate buckets
+    clock.now = 0.1
+    assert rates.try_acquire("trade")
+    assert rates.stats()["granted"] == 4
+
+
+def test_global_bucket_limits_every_endpoint(clock):
+    rates = scheduler(clock, global_limit=(1.0, 1))
+    assert rates.try_acquire("trade")
+    assert not rates.try_acquire("portfolio")
+    assert not rates.try_acquire("unlisted")
+
+
+def test_acquire_waits_for_a_token():
+    rates = RateScheduler(limits={"trade": (20.0, 1)}, global_limit=(100.0, 100), priorities={})
+    rates.acquire("trade")
+    started = time.monotonic()
+    rates.acquire("trade")
+    assert time.monotonic() - started >= 0.04
+    assert rates.stats()["waited"] == 1
+
+
+def test_more_urgent_waiter_gets_the_next_global_token():
+    rates = RateScheduler(limits={}, global_limit=(10.0, 1), priorities={"trade": 0, "portfolio": 3})
+    rates.acquire("portfolio")
+    order = []
+
+    def take(endpoint):
+        rates.acquire(endpoint)
+        order.append(endpoint)
+
+    low = threading.Thread(target=take, args=("portfolio",))
+    low.start()
+    while not rates._waiters:
+        time.sleep(0.001)
+    high = threading.Thread(target=take, args=("trade",))
+    high.start()
+    for thread in (low, high):
+        thread.join(timeout=5)
+    assert order == ["trade", "portfolio"]
+
+
+def test_acquire_async_takes_free_tokens_inline(clock):
+    rates = scheduler(clock)
+    asyncio.run(rates.acquire_async("trade"))
+    assert rates.stats()["granted"] == 1
+
+
+class NoExecutor(ThreadPoolExecutor):
+    def submit(self, *args, **kwargs):
+        raise AssertionError("acquire_async used an executor thread")
+
+
+def test_acquire_async_waits_on_the_event_loop():
+    rates = scheduler(time.monotonic, limits={"trade": (20.0, 1)})
+    assert rates.try_acquire("trade")
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.005)
+
+    async def main():
+        asyncio.get_running_loop().set_default_executor(NoExecutor())
+        task = asyncio.ensure_future(ticker())
+        await rates.acquire_async("trade")
+        task.cancel()
+
+    asyncio.run(main())
+    stats = rates.stats()
+    assert stats["granted"] == 2 and stats["waited"] == 1
+    assert len(ticks) > 1
+    assert not rates._waiters
+
+
+def test_429_pauses_and_halves_the_endpoint_then_successes_restore_it(clock):
+    rates = scheduler(clock)
+    rates.report("trade", 429, "3")
+    assert not rates.try_acquire("trade")
+    clock.now = 2.9
+    assert not rates.try_acquire("trade")
+    clock.now = 3.1
+    assert not rates.try_acquire("trade")  # Half a token at the halved rate of 5/s
+    clock.now = 3.25
+    assert rates.try_acquire("trade")
+    stats = rates.stats()
+    assert stats["throttled"] == 1
+    assert stats["reduced_rates"] == {"trade": 5.0}
+    for _ in range(10):
+        rates.report("trade", 200)
+    assert rates.stats()["reduced_rates"] == {}
+
+
+def test_429_without_retry_after_uses_the_penalty(clock):
+    rates = scheduler(clock)
+    rates.report("portfolio", 429)
+    clock.now = RATE_LIMIT_PENALTY - 0.01
+    assert not rates.try_acquire("portfolio")
+    rates.report("portfolio", 500)
+    assert rates.stats()["reduced_rates"] == {"portfolio": 0.5}  # Server errors don't count as recovery
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Mon, 01 Jan 2024 00:00:00 GMT") == 0.0
@@ -0,0 +1,91 @@
+import pytest
+
+from botcore import BASE_URL, ResponseCache, api_endpoint
+
+COIN_URL = f"{BASE_URL}/api/coin/AAA"
+HOLDERS_URL = f"{BASE_URL}/api/coin/AAA/holders?limit=50&offset=0"
+MARKET_URL = f"{BASE_URL}/api/market?limit=5"
+PORTFOLIO_URL = f"{BASE_URL}/api/portfolio/total"
+
+
+@pytest.fixture
+def cache(clock):
+    return ResponseCache(ttls={"coin": 1.0, "market": 0, "holders": 0}, max_entries=2, clock=clock)
+
+
+def test_api_endpoint_names():
+    assert api_endpoint(COIN_URL) == "coin"
+    assert api_endpoint(HOLDERS_URL) == "holders"
+    assert api_endpoint(f"{BASE_URL}/api/coin/AAA/trade") == "trade"
+    assert api_endpoint(MARKET_URL) == "market"
+    assert api_endpoint(PORTFOLIO_URL) == "portfolio"
+    assert api_endpoint(f"{BASE_URL}/api/auth/get-session") is None
+
+
+def test_fresh_entries_are_served_until_their_ttl(cache, clock):
+    result = cache.store(COIN_URL, '{"coin": {"symbol": "AAA"}}')
+    clock.now = 0.5
+    assert cache.fresh(COIN_URL) is result
+    clock.now = 1.0
+    assert cache.fresh(COIN_URL) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_zero_ttl_endpoints_are_never_served_fresh(cache):
+    cache.store(MARKET_URL, '{"coins": []}')
+    assert cache.fresh(MARKET_URL) is None
+
+
+def test_unchanged_body_returns_the_same_object_without_decoding(cache):
+    decoded = []
+
+    def decode(body):
+        decoded.append(body)
+        return {"body": body}
+
+    first = cache.store(MARKET_URL, '{"coins": []}', decode)
+    assert cache.store(MARKET_URL, '{"coins": []}', decode) is first
+    assert cache.store(MARKET_URL, '{"coins": [1]}', decode) is not first
+    assert len(decoded) == 2
+    assert cache.stats()["unchanged"] == 1
+
+
+def test_entries_are_keyed_by_decoder(cache):
+    as_dict = cache.store(MARKET_URL, '{"coins": []}')
+    as_list = cache.store(MARKET_URL, '{"coins": []}', lambda body: ["decoded"])
+    assert as_dict == {"coins": []}
+    assert as_list == ["decoded"]
+
+
+def test_validators_and_not_modified(cache, clock):
+    result = cache.store(COIN_URL, '{"coin": {}}', etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    assert cache.request_headers(COIN_URL) == {'If-None-Match': '"v1"',
+                                               'If-Modified-Since': "Mon, 01 Jan 2024 00:00:00 GMT"}
+    clock.now = 5.0
+    assert cache.not_modified(COIN_URL) == ('{"coin": {}}', result)
+    assert cache.fresh(COIN_URL) is result  # The 304 restarted the TTL
+    assert cache.not_modified(MARKET_URL) is None
+    assert cache.request_headers(MARKET_URL) == {}
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.store(COIN_URL, '{"a": 1}')
+    cache.store(MARKET_URL, '{"b": 2}')
+    cache.fresh(COIN_URL)
+    cache.store(HOLDERS_URL, '{"c": 3}')
+    assert cache.fresh(COIN_URL) is not None
+    assert cache.not_modified(MARKET_URL) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_and_uncacheable_urls(cache):
+    cache.store(COIN_URL, '{"coin": {}}')
+    cache.invalidate(COIN_URL)
+    assert cache.fresh(COIN_URL) is None
+    assert cache.store(PORTFOLIO_URL, '{"baseCurrencyBalance": 1}') == {"baseCurrencyBalance": 1}
+    assert cache.stats()["entries"] == 0
+
+
+def test_bad_body_raises_value_error(cache):
+    with pytest.raises(ValueError):
+        cache.store(MARKET_URL, "<html>login</html>")
@@ -0,0 +1,82 @@
+import botcore
+from botcore import CoinListing, CoinScanner, RugplayAPI, RugplayHTTPAPI, NewCoinDetector, ScanResponseFilter, scan_hedge
+
+
+class NullFrontend:
+    def post(self, callback, *args):
+        callback(*args)
+
+    def status(self, gui, console=None, is_error=False):
+        pass
+
+
+class ListingsAPI:
+    def __init__(self):
+        self.listings = []
+
+    def get_latest_listings(self):
+        return self.listings
+
+    def get_recent_listings(self):
+        return self.listings
+
+
+def test_filter_drops_repeats_and_overtaken_responses():
+    response_filter = ScanResponseFilter()
+    first = [CoinListing("AAA", 10.0)]
+    assert response_filter.accept(2, first, watermark=10.0)
+    assert not response_filter.accept(3, first, watermark=10.0)  # The same cached object again
+    assert not response_filter.accept(1, [CoinListing("AAA", 10.0)], watermark=10.0)  # Sent before poll 2
+    assert response_filter.accept(0, [CoinListing("BBB", 11.0)], watermark=10.0)  # Late, but shows a newer coin
+    assert response_filter.newest_poll == 2
+
+
+def test_hedge_is_capped_by_the_market_rate_limit(monkeypatch):
+    monkeypatch.setattr(botcore, "RATE_LIMITING", True)
+    monkeypatch.setattr(botcore, "RATE_LIMITS", {"market": (6.0, 6)})
+    assert scan_hedge(4, interval=0.5) == 3
+    assert scan_hedge(2, interval=0.5) == 2
+    assert scan_hedge(0) == 1
+    monkeypatch.setattr(botcore, "RATE_LIMITING", False)
+    assert scan_hedge(4, interval=0.5) == 4
+
+
+def test_overlapping_polls_report_a_new_coin_once():
+    api = ListingsAPI()
+    scanner = CoinScanner(NullFrontend(), lambda: api, hedge=1)
+    scanner._detector = NewCoinDetector()
+    scanner._detector.baseline([CoinListing("AAA", 10.0)])
+    scanner._filter = ScanResponseFilter()
+    detected = []
+    scanner.subscribe(lambda coin, trace: detected.append((coin.symbol, trace.token_symbol)))
+
+    api.listings = [CoinListing("BBB", 11.0), CoinListing("AAA", 10.0)]
+    scanner._poll(1)
+    api.listings = [CoinListing("BBB", 11.0), CoinListing("AAA", 10.0)]
+    scanner._poll(0)  # A slower poll sent earlier shows the same coin
+    assert detected == [("BBB", "BBB")]
+
+
+class StoppingListingsMixin:
+    """Answers the scanner's first listings request and stops it, so _run() returns before polling."""
+    def get_latest_listings(self):
+        self.scanner.stop()
+        return []
+
+
+class BrowserListingsAPI(StoppingListingsMixin, RugplayAPI):
+    pass
+
+
+class HTTPListingsAPI(StoppingListingsMixin, RugplayHTTPAPI):
+    pass
+
+
+def test_browser_backend_scans_one_poll_at_a_time(monkeypatch):
+    monkeypatch.setattr(botcore, "RATE_LIMITING", False)
+    for api, hedge in ((BrowserListingsAPI(None), 1), (HTTPListingsAPI(None, "session=x"), 3)):
+        api.scanner = CoinScanner(NullFrontend(), lambda: api, hedge=3)
+        api.scanner._active = True
+        api.scanner._run_staggered = lambda: None
+        api.scanner._run()
+        assert api.scanner.hedge == hedge
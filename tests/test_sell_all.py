@@ -0,0 +1,77 @@
+import threading
+import time
+
+import tradingbot
+from tradingbot import TradeApp
+
+HOLDINGS = [
+    {'symbol': "SMALL", 'quantity': 10, 'value': 1.0},
+    {'symbol': "DUST", 'quantity': 0.00001, 'value': 0.0},
+    {'symbol': "BIG", 'quantity': 5, 'value': 500.0},
+    {'symbol': "MID", 'quantity': 100, 'currentPrice': 0.5},
+]
+
+
+class StubApp:
+    """Just the parts of TradeApp that the Sell All flow touches; callbacks run inline."""
+    def __init__(self, failing=()):
+        self.api = self
+        self.portfolio_service = self
+        self.session_cookie = "session=abc"
+        self.failing = failing
+        self.sells = []
+        self.statuses = []
+        self.balance_checks = 0
+        self.finalized = threading.Event()
+        self._lock = threading.Lock()
+
+    def is_browser_open(self):
+        return True
+
+    def get_portfolio(self):
+        return {'coinHoldings': HOLDINGS}
+
+    refresh = get_portfolio
+
+    def after(self, ms, callback):
+        callback()
+
+    def update_status(self, gui_message, console_message=None, is_error=False):
+        self.statuses.append(gui_message)
+
+    def _trade_via_api(self, token_symbol, trade_type, amount, worker_name="API", refresh_balance=True, **kwargs):
+        with self._lock:
+            self.sells.append((token_symbol, amount, refresh_balance))
+        return token_symbol not in self.failing
+
+    def _check_balance(self):
+        with self._lock:
+            self.balance_checks += 1
+
+    def _finalize_sell_all_ui(self):
+        self.finalized.set()
+
+
+def run_sell_all(app):
+    TradeApp._sell_all_tokens_flow(app)
+    assert app.finalized.is_set()
+    deadline = time.monotonic() + 2  # The balance refresh may run on its own thread
+    while not app.balance_checks and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_largest_holdings_are_sold_first_with_one_balance_refresh(monkeypatch):
+    monkeypatch.setattr(tradingbot, "SELL_ALL_PARALLELISM", 1)
+    app = StubApp()
+    run_sell_all(app)
+    assert app.sells == [("BIG", 5.0, False), ("MID", 100.0, False), ("SMALL", 10.0, False)]
+    assert app.balance_checks == 1
+    assert "3/3 tokens sold" in app.statuses[-1]
+
+
+def test_failed_sells_are_summarised():
+    app = StubApp(failing={"MID"})
+    run_sell_all(app)
+    assert {symbol for symbol, _, _ in app.sells} == {"BIG", "MID", "SMALL"}
+    assert "2/3 tokens sold" in app.statuses[-1]
+    assert app.statuses[-1].endswith("Failed: MID")
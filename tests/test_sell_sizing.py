@@ -0,0 +1,67 @@
+import botcore
+from botcore import ThreadedSniperEngine, calculate_sell_amount, retry_sell_cap
+
+
+class NullFrontend:
+    def post(self, callback, *args):
+        callback(*args)
+
+    def status(self, gui, console=None, is_error=False):
+        pass
+
+
+class StrictPoolMarket:
+    """One holding in one pool, with a server-side sell limit stricter than the bot's estimate."""
+    def __init__(self, quantity, pool, limit_ratio):
+        self.quantity = quantity
+        self.pool = pool
+        self.limit_ratio = limit_ratio
+        self.sells = []
+
+    # API
+    def get_portfolio(self):
+        return {'coinHoldings': [{'symbol': "AAA", 'quantity': self.quantity}]}
+
+    def get_coin(self, token_symbol):
+        return {'coin': {'poolCoinAmount': self.pool}}
+
+    # Trade client
+    def trade(self, token_symbol, trade_type, amount, worker_name="API", **kwargs):
+        accepted = amount <= self.pool * self.limit_ratio
+        self.sells.append((amount, accepted))
+        if accepted:
+            self.quantity -= amount
+            self.pool += amount
+        return accepted
+
+
+def test_sells_a_fraction_when_the_pool_is_deep():
+    assert calculate_sell_amount(1000, pool_coin_amount=1_000_000) == (800, False)
+
+
+def test_pool_limit_caps_the_sale():
+    amount, pool_limited = calculate_sell_amount(1000, pool_coin_amount=500)
+    assert pool_limited
+    assert amount == 497
+
+
+def test_cap_bounds_the_sale_and_counts_as_pool_limited():
+    assert calculate_sell_amount(1000, pool_coin_amount=1_000_000, cap=300) == (300, True)
+    assert calculate_sell_amount(1000, pool_coin_amount=1_000_000, cap=900) == (800, False)
+
+
+def test_retry_cap_shrinks_the_failed_amount():
+    assert retry_sell_cap(1000) == 800
+
+
+def test_sell_worker_retries_smaller_when_the_server_limit_is_stricter(monkeypatch):
+    monkeypatch.setattr(botcore, "SNIPER_MONITOR_INTERVAL", 0)
+    market = StrictPoolMarket(quantity=1000, pool=1000, limit_ratio=0.7)
+    engine = ThreadedSniperEngine(NullFrontend(), lambda: market, market, lambda: 10)
+    engine._active = True
+
+    assert engine._sell_position_via_api("AAA", 1) is True
+    assert market.sells[0] == (995, False)
+    assert all(amount <= retry_sell_cap(995) for amount, _ in market.sells[1:])
+    assert market.sells[-1][1]
+    assert [accepted for _, accepted in market.sells].count(False) == 2
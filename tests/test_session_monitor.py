@@ -0,0 +1,124 @@
+import time
+
+from botcore import SessionMonitor, cookie_header, load_session_cookie, save_session_cookie
+
+LOGIN_PAGE = {'error': 'API returned HTML. Session may be invalid.'}
+
+
+class NullFrontend:
+    def post(self, callback, *args):
+        callback(*args)
+
+    def status(self, gui, console=None, is_error=False):
+        pass
+
+
+class Site:
+    """A session that only accepts `valid_cookie`, with a browser whose cookie jar may lag behind."""
+    def __init__(self, cookie):
+        self.valid_cookie = cookie
+        self.client_cookie = cookie
+        self.browser_cookie = cookie
+        self.snapshot_started_at = None
+        self.refreshes = 0
+        self.reloads = 0
+        self.restarts = 0
+        self.reissue_on_reload = None
+
+    # PortfolioService
+    def refresh(self):
+        self.refreshes += 1
+        return {'baseCurrencyBalance': 1.0} if self.client_cookie == self.valid_cookie else LOGIN_PAGE
+
+    def reload(self):
+        self.reloads += 1
+        if self.reissue_on_reload:
+            self.browser_cookie = self.valid_cookie = self.reissue_on_reload
+
+    def restart(self):
+        self.restarts += 1
+
+
+def monitor_for(site, reload=True, restart=True, restart_after=2):
+    def apply_cookie(cookie):
+        site.client_cookie = cookie
+    return SessionMonitor(NullFrontend(), site, lambda: site.client_cookie, apply_cookie, lambda: site.browser_cookie,
+                          reload=site.reload if reload else None, restart=site.restart if restart else None,
+                          restart_after=restart_after)
+
+
+def test_rotated_cookie_is_swapped_in_once():
+    site = Site("session=a")
+    monitor = monitor_for(site)
+    assert not monitor.sync_cookie()
+    site.browser_cookie = "session=b"
+    assert monitor.sync_cookie()
+    assert not monitor.sync_cookie()
+    assert site.client_cookie == "session=b"
+    assert monitor.counters["rotations"] == 1
+
+
+def test_recent_snapshot_counts_as_a_check():
+    site = Site("session=a")
+    site.snapshot_started_at = time.monotonic()
+    monitor_for(site)._check()
+    assert site.refreshes == 0
+
+
+def test_failed_check_recovers_with_the_browsers_cookie():
+    site = Site("session=a")
+    site.valid_cookie = site.browser_cookie = "session=b"
+    monitor = monitor_for(site)
+    monitor._check()
+    assert site.client_cookie == "session=b"
+    assert (site.reloads, site.restarts, monitor.failures) == (0, 0, 0)
+
+
+def test_reload_reissues_the_cookie():
+    site = Site("session=a")
+    site.valid_cookie = "session=gone"
+    site.reissue_on_reload = "session=c"
+    monitor = monitor_for(site)
+    monitor._check()
+    assert site.client_cookie == "session=c"
+    assert (site.reloads, monitor.failures) == (1, 0)
+
+
+def test_browser_restarts_only_after_repeated_failures():
+    site = Site("session=a")
+    site.valid_cookie = "session=gone"
+    monitor = monitor_for(site, restart_after=2)
+    monitor._check()
+    assert (site.reloads, site.restarts, monitor.failures) == (1, 0, 1)
+    monitor._check()
+    assert (site.reloads, site.restarts, monitor.failures) == (2, 1, 0)
+
+
+def test_headless_monitor_never_restarts():
+    site = Site("session=a")
+    site.valid_cookie = "session=gone"
+    monitor = monitor_for(site, reload=False, restart=False)
+    for _ in range(3):
+        monitor._check()
+    assert monitor.failures == 3
+    assert monitor.counters["restarts"] == 0
+
+
+def test_background_thread_picks_up_a_rewritten_cookie_file(tmp_path):
+    path = str(tmp_path / "cookie")
+    save_session_cookie("session=a", path)
+    site = Site("session=a")
+    monitor = SessionMonitor(NullFrontend(), site, lambda: site.client_cookie,
+                             lambda cookie: setattr(site, "client_cookie", cookie), lambda: load_session_cookie(path),
+                             cookie_poll=0.01, interval=60)
+    monitor.start()
+    save_session_cookie("session=b", path)
+    deadline = time.monotonic() + 5
+    while site.client_cookie != "session=b" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    monitor.stop()
+    assert site.client_cookie == "session=b"
+
+
+def test_cookie_header_is_sorted_by_name():
+    assert cookie_header([{'name': "b", 'value': "2"}, {'name': "a", 'value': "1"}]) == "a=1; b=2"
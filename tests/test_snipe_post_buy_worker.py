@@ -0,0 +1,141 @@
+import tradingbot
+from tradingbot import TradeApp
+
+
+class FakeElement:
+    text = ""
+
+    def click(self):
+        pass
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+
+class FakeDriver:
+    """Every element is present and clickable; the trade panel shows no amounts."""
+    def __init__(self):
+        self.loaded = []
+        self.cdp = []
+        self.current_url = tradingbot.BASE_URL
+        self.window_handles = ["main"]
+
+    def get(self, url):
+        self.loaded.append(url)
+        self.current_url = url
+
+    def find_element(self, by, value):
+        return FakeElement()
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append(cmd)
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.driver = FakeDriver()
+
+
+class FakePool:
+    def __init__(self):
+        self.browser = FakeBrowser()
+        self.released = []
+        self.discarded = []
+
+    def checkout(self):
+        return self.browser
+
+    def release(self, browser):
+        self.released.append(browser)
+
+    def discard(self, browser):
+        self.discarded.append(browser)
+
+
+class StubApp:
+    """Just the parts of TradeApp that the post-buy sell worker touches; callbacks run inline."""
+    def __init__(self, active):
+        self.worker_pool = FakePool()
+        self.sniper_bot_active = active
+        self.trade_journal = self
+        self.trace_recorder = self
+
+    def after(self, ms, callback):
+        callback()
+
+    def update_status(self, gui_message, console_message=None, is_error=False):
+        pass
+
+    def record(self, *args, **kwargs):
+        pass
+
+    def finish(self, trace):
+        pass
+
+
+def test_checked_out_browser_opens_the_coin_without_a_hard_reload():
+    app = StubApp(active=False)
+    assert TradeApp._snipe_post_buy_worker(app, "AAA", 1) is False
+    driver = app.worker_pool.browser.driver
+    assert driver.loaded == [f"{tradingbot.BASE_URL}/coin/AAA"]
+    assert driver.cdp == []
+    assert app.worker_pool.released == [app.worker_pool.browser]
+
+
+def test_failed_sell_attempt_recovers_with_a_hard_reload(monkeypatch):
+    monkeypatch.setattr(tradingbot, "SNIPER_MAX_SELL_ATTEMPTS", 1)
+    app = StubApp(active=True)
+    assert TradeApp._snipe_post_buy_worker(app, "AAA", 1) is False
+    assert "Page.reload" in app.worker_pool.browser.driver.cdp
+    assert app.worker_pool.released == [app.worker_pool.browser]
+
+
+class RecordingEngine:
+    def __init__(self, *args, sell_position=None, **kwargs):
+        self.sell_position = sell_position
+
+    def start(self):
+        pass
+
+
+class StartedPool:
+    def __init__(self, on_status=None):
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+
+class SniperStartApp(StubApp):
+    def __init__(self, session_cookie):
+        super().__init__(active=True)
+        self.worker_pool = None
+        self.session_cookie = session_cookie
+        self.bridge = self
+        self.trade_client = None
+        self.coin_index = None
+
+    def status(self, gui, console=None, is_error=False):
+        pass
+
+    def _resolve_sniper_buy_amount(self):
+        return 10
+
+    _snipe_post_buy_worker = TradeApp._snipe_post_buy_worker
+
+
+def test_sells_go_through_the_api_once_a_session_cookie_is_captured(monkeypatch):
+    monkeypatch.setattr(tradingbot, "ThreadedSniperEngine", RecordingEngine)
+    monkeypatch.setattr(tradingbot, "WorkerBrowserPool", StartedPool)
+    app = SniperStartApp("session=abc")
+    TradeApp._start_threaded_sniper(app)
+    assert app.sniper_engine.sell_position is None  # The engine's own API sell, which journals proceeds
+    assert app.worker_pool is None
+
+    app = SniperStartApp(None)
+    TradeApp._start_threaded_sniper(app)
+    assert app.sniper_engine.sell_position == app._snipe_post_buy_worker
+    assert app.worker_pool.started
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from botcore import SnipeQueue
+
+
+def drain(queue):
+    symbols = []
+    while len(queue):
+        symbols.append(queue.get(timeout=0).token_symbol)
+    return symbols
+
+
+def test_default_order_is_detection_order():
+    queue = SnipeQueue(priority=None)
+    for symbol in ("A", "B", "C"):
+        queue.put(symbol)
+    assert drain(queue) == ["A", "B", "C"]
+
+
+def test_newest_first():
+    queue = SnipeQueue(priority="newest")
+    for symbol in ("A", "B", "C"):
+        queue.put(symbol)
+    assert drain(queue) == ["C", "B", "A"]
+
+
+def test_score_function_orders_highest_first():
+    queue = SnipeQueue(priority=lambda entry: entry.coin.get("score", 0))
+    queue.put("LOW", {"score": 1})
+    queue.put("HIGH", {"score": 9})
+    queue.put("MID", {"score": 5})
+    assert drain(queue) == ["HIGH", "MID", "LOW"]
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        SnipeQueue(priority="oldest")
+
+
+def test_get_times_out_on_an_empty_queue():
+    assert SnipeQueue().get(timeout=0.01) is None
+
+
+def test_get_wakes_as_soon_as_a_coin_is_put():
+    queue = SnipeQueue()
+    threading.Timer(0.05, queue.put, args=("A",)).start()
+    started = time.monotonic()
+    entry = queue.get(timeout=5)
+    assert entry.token_symbol == "A"
+    assert time.monotonic() - started < 1
+
+
+def test_close_wakes_waiting_consumers():
+    queue = SnipeQueue()
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(queue.get()))
+    consumer.start()
+    queue.close()
+    consumer.join(timeout=5)
+    assert results == [None]
+
+
+def test_stats_track_depth_and_wait():
+    queue = SnipeQueue()
+    queue.put("A")
+    queue.put("B")
+    queue.get(timeout=0)
+    stats = queue.stats()
+    assert stats['depth'] == 1
+    assert stats['max_depth'] == 2
+    assert stats['enqueued'] == 2
+    assert stats['dequeued'] == 1
+    assert stats['max_wait'] >= stats['avg_wait'] >= 0
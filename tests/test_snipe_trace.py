@@ -0,0 +1,67 @@
+import json
+
+from botcore import SnipeTrace, TraceRecorder, percentile
+
+
+def trace(symbol, *marks):
+    """A SnipeTrace with (stage, seconds) marks."""
+    snipe = SnipeTrace(symbol)
+    for stage, at in marks:
+        snipe.mark(stage, at)
+    return snipe
+
+
+def test_percentile_is_nearest_rank():
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([3, 1, 2], 99) == 3
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_percentile_rounds_the_rank_up():
+    values = list(range(1, 101))
+    assert percentile(values, 99) == 99
+    assert percentile(values, 50) == 50
+    assert percentile(values, 7) == 7
+    assert percentile(values, 100) == 100
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 0) == 1
+
+
+def test_transitions_are_between_consecutive_marks():
+    snipe = trace("AAA", ("detected", 1.0), ("dequeued", 1.002), ("request_sent", 1.5))
+    assert [(name, round(seconds, 3)) for name, seconds in snipe.transitions()] == [
+        ("detected->dequeued", 0.002), ("dequeued->request_sent", 0.498)]
+    assert snipe.to_dict()['marks_ms'] == [["detected", 0.0], ["dequeued", 2.0], ["request_sent", 500.0]]
+
+
+def test_recorder_buckets_each_transition():
+    recorder = TraceRecorder(buckets_ms=(10, 100))
+    recorder.finish(trace("AAA", ("detected", 0.0), ("dequeued", 0.005)))
+    recorder.finish(trace("BBB", ("detected", 0.0), ("dequeued", 0.050)))
+    recorder.finish(trace("CCC", ("detected", 0.0), ("dequeued", 0.500)))
+    recorder.finish(None)
+    [(transition, count, p50, p99, worst, histogram)] = recorder.summary()
+    assert (transition, count, histogram) == ("detected->dequeued", 3, [1, 1, 1])
+    assert round(p50) == 50 and round(p99) == 500 and round(worst) == 500
+    assert recorder.histogram_labels() == ["<=10ms", "<=100ms", ">100ms"]
+
+
+def test_recorder_keeps_only_the_latest_history():
+    recorder = TraceRecorder(history=2)
+    for seconds in (1.0, 2.0, 3.0):
+        recorder.finish(trace("AAA", ("detected", 0.0), ("sold", seconds)))
+    [(_, count, _, _, worst, histogram)] = recorder.summary()
+    assert count == 2
+    assert round(worst) == 3000
+    assert sum(histogram) == 3  # The histogram counts every trace ever finished
+
+
+def test_export_writes_stages_and_traces(tmp_path):
+    recorder = TraceRecorder(buckets_ms=(10,))
+    recorder.finish(trace("AAA", ("detected", 0.0), ("dequeued", 0.001)))
+    path = recorder.export(str(tmp_path / "traces.json"))
+    with open(path) as f:
+        exported = json.load(f)
+    assert exported['stages'][0]['histogram'] == {"<=10ms": 1, ">10ms": 0}
+    assert exported['traces'][0]['symbol'] == "AAA"
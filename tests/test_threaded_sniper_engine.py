@@ -0,0 +1,97 @@
+import pytest
+
+from botcore import CoinIndex, SnipeQueue, ThreadedSniperEngine
+
+
+class NullFrontend:
+    def post(self, callback, *args):
+        callback(*args)
+
+    def status(self, gui, console=None, is_error=False):
+        pass
+
+
+@pytest.fixture
+def coin_index(tmp_path):
+    index = CoinIndex(str(tmp_path / "coins.db"))
+    yield index
+    index.close()
+
+
+def engine_selling_with(sell_position, coin_index):
+    engine = ThreadedSniperEngine(NullFrontend(), lambda: None, None, lambda: 10,
+                                  sell_position=sell_position, coin_index=coin_index)
+    coin_index.claim_buy("AAA", engine.account)
+    coin_index.record_buy("AAA", engine.account, 10, True)
+    engine._open_positions = 1
+    return engine
+
+
+@pytest.mark.parametrize("result, outcome", [(True, 'sold'), (False, 'unsold'), (None, 'unsold')])
+def test_sell_result_is_recorded(coin_index, result, outcome):
+    engine = engine_selling_with(lambda token_symbol, worker_id, trace: result, coin_index)
+    engine._run_sell("AAA", 1, None)
+    assert coin_index.position("AAA", "main")['sell_outcome'] == outcome
+    assert engine._open_positions == 0
+
+
+def test_failed_sell_keeps_the_position_open(coin_index):
+    def sell_position(token_symbol, worker_id, trace):
+        raise RuntimeError("browser died")
+
+    engine = engine_selling_with(sell_position, coin_index)
+    with pytest.raises(RuntimeError):
+        engine._run_sell("AAA", 1, None)
+    assert coin_index.position("AAA", "main")['sell_outcome'] == 'unsold'
+    assert coin_index.open_positions("main") == ["AAA"]
+
+
+class ArmedStub:
+    """A PreArmedBuy whose armed amount differs from what the trade client reports sending."""
+    amount = 10
+
+
+class PrearmedTradeClient:
+    """Closes the snipe queue on the first buy, so the buy loop returns after it."""
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.snipe_queue = None
+
+    def buy_prearmed(self, prearmed, token_symbol, worker_name="API", trace=None, strategy="sniper"):
+        self.snipe_queue.close()
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+class RecordingMonitor:
+    def __init__(self):
+        self.positions = []
+
+    def add_position(self, token_symbol, worker_name, on_trigger, trace=None):
+        self.positions.append(token_symbol)
+
+
+def buy_one_prearmed(outcome, coin_index):
+    trade_client = PrearmedTradeClient(outcome)
+    engine = ThreadedSniperEngine(NullFrontend(), lambda: None, trade_client, lambda: 10,
+                                  holder_monitor=RecordingMonitor(), coin_index=coin_index)
+    engine.prearmed = ArmedStub()
+    engine.snipe_queue = trade_client.snipe_queue = SnipeQueue()
+    engine.snipe_queue.put("AAA")
+    engine._active = True
+    engine._buy_loop()
+    return engine
+
+
+def test_prearmed_buy_records_the_amount_actually_sent(coin_index):
+    engine = buy_one_prearmed((True, 7.5), coin_index)
+    position = coin_index.position("AAA", "main")
+    assert (position['buy_outcome'], position['buy_amount']) == ('bought', 7.5)
+    assert engine.holder_monitor.positions == ["AAA"]
+
+
+def test_prearmed_buy_that_raises_is_recorded_as_failed(coin_index):
+    engine = buy_one_prearmed(RuntimeError("socket exploded"), coin_index)
+    assert coin_index.position("AAA", "main")['buy_outcome'] == 'failed'
+    assert engine.holder_monitor.positions == []
@@ -0,0 +1,70 @@
+import threading
+
+from botcore import TkBridge, find_holding_quantity
+
+
+class FakeRoot:
+    """Records what TkBridge schedules instead of running a Tk main loop."""
+    def __init__(self):
+        self.scheduled = []
+        self.statuses = []
+        self.exists = True
+
+    def after(self, ms, callback):
+        self.scheduled.append((ms, callback))
+
+    def winfo_exists(self):
+        return self.exists
+
+    def update_status(self, gui_message, console_message=None, is_error=False):
+        self.statuses.append((gui_message, console_message, is_error))
+
+
+def test_callbacks_from_threads_run_in_order_on_drain():
+    root = FakeRoot()
+    bridge = TkBridge(root, poll_ms=5)
+    bridge.start()
+    calls = []
+    threads = [threading.Thread(target=bridge.post, args=(calls.append, i)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    assert calls == []  # Nothing runs off the Tk thread
+
+    _, drain = root.scheduled.pop()
+    drain()
+    assert calls == [0, 1, 2, 3, 4]
+    assert root.scheduled == [(5, bridge._drain)]
+
+
+def test_status_goes_to_update_status():
+    root = FakeRoot()
+    bridge = TkBridge(root)
+    bridge.status("gui", "console", is_error=True)
+    bridge._drain()
+    assert root.statuses == [("gui", "console", True)]
+
+
+def test_failing_callback_does_not_stop_the_drain():
+    root = FakeRoot()
+    bridge = TkBridge(root)
+    calls = []
+    bridge.post(lambda: 1 / 0)
+    bridge.post(calls.append, "after")
+    bridge._drain()
+    assert calls == ["after"]
+
+
+def test_drain_stops_rescheduling_once_the_window_is_gone():
+    root = FakeRoot()
+    bridge = TkBridge(root)
+    root.exists = False
+    bridge._drain()
+    assert root.scheduled == []
+
+
+def test_find_holding_quantity():
+    portfolio = {'coinHoldings': [{'symbol': "AAA", 'quantity': "12.5"}]}
+    assert find_holding_quantity(portfolio, "AAA") == 12.5
+    assert find_holding_quantity(portfolio, "BBB") == 0.0
+    assert find_holding_quantity({'error': "down"}, "AAA") is None
@@ -0,0 +1,65 @@
+import csv
+
+import pytest
+
+from botcore import SNIPE_PNL_FIELDS, TradeJournal, TradeResult, read_journal, snipe_pnl, write_table
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "trades.jsonl")
+
+
+def test_records_are_written_in_order_with_response_fields(journal_path):
+    journal = TradeJournal(journal_path, flush_interval=0.01)
+    journal.start()
+    journal.record("AAA", "buy", 10, 'ok', "SniperAPI", "sniper", latency=0.0125,
+                   result=TradeResult(True, coins_bought=1000, total_cost=10.0))
+    journal.record("AAA", "SELL", 800, 'failed', "Worker-1", "sniper", message="Cannot sell")
+    journal.close()
+
+    buy, sell = read_journal(journal_path)
+    assert (buy["side"], buy["amount"], buy["outcome"], buy["latency_ms"]) == ("BUY", 10.0, 'ok', 12.5)
+    assert (buy["cost"], buy["coins"], buy["proceeds"]) == (10.0, 1000, None)
+    assert (sell["side"], sell["outcome"], sell["message"], sell["coins"]) == ("SELL", 'failed', "Cannot sell", None)
+    assert set(buy) == set(TradeJournal.FIELDS)
+
+
+def test_read_journal_skips_a_torn_last_line(journal_path):
+    with open(journal_path, "w") as f:
+        f.write('{"symbol": "AAA"}\n{"symbol": "BB')
+    assert read_journal(journal_path) == [{"symbol": "AAA"}]
+
+
+def record(ts, side, outcome='ok', strategy="sniper", symbol="AAA", **fields):
+    return dict({"ts": ts, "account": "main", "strategy": strategy, "symbol": symbol, "side": side,
+                 "outcome": outcome}, **fields)
+
+
+def test_snipe_pnl_sums_sells_against_the_buy():
+    rows = snipe_pnl([
+        record(0, "BUY", cost=10.0, latency_ms=5.0),
+        record(3, "SELL", proceeds=8.0),
+        record(4, "SELL", 'failed', proceeds=None),
+        record(5, "SELL", proceeds=4.0),
+        record(1, "BUY", strategy="manual", symbol="BBB", cost=50.0),
+    ])
+    assert len(rows) == 1
+    row = rows[0]
+    assert (row["sells"], row["proceeds"], row["pnl"], row["pnl_pct"], row["hold_s"]) == (2, 12.0, 2.0, 20.0, 5)
+    assert row["complete"]
+
+
+def test_snipe_pnl_is_left_empty_when_a_sell_reported_no_proceeds():
+    row = snipe_pnl([record(0, "BUY", cost=10.0), record(2, "SELL", proceeds=None)])[0]
+    assert not row["complete"]
+    assert row["pnl"] is None
+
+
+def test_write_table_writes_csv(tmp_path):
+    path = str(tmp_path / "snipes.csv")
+    write_table(snipe_pnl([record(0, "BUY", cost=10.0), record(2, "SELL", proceeds=15.0)]), SNIPE_PNL_FIELDS, path)
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["symbol"] == "AAA"
+    assert float(rows[0]["pnl"]) == 5.0
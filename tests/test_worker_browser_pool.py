@@ -0,0 +1,118 @@
+import pytest
+
+from tradingbot import PooledBrowser, WorkerBrowserPool
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.quit_called = False
+        self.driver = None  # release() cannot reset it, so it is discarded
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeDriver:
+    """Records CDP commands; `broken` makes every command fail like a crashed browser."""
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.cdp = []
+        self.window_handles = ["main"]
+        self.switch_to = self
+        self.quit_called = False
+
+    def execute_cdp_cmd(self, cmd, params):
+        if self.broken:
+            raise RuntimeError("browser is gone")
+        self.cdp.append((cmd, params))
+
+    def window(self, handle):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+def cookie_browser(broken=False):
+    return PooledBrowser(FakeDriver(broken), "/nonexistent-profile")
+
+
+SESSION = [{'name': "session", 'value': "new", 'domain': ".rugplay.com", 'path': "/", 'secure': True,
+            'httpOnly': True, 'expiry': 1900000000, 'sameSite': "Lax"}]
+
+
+def set_cookie_calls(browser):
+    return [params for cmd, params in browser.driver.cdp if cmd == 'Network.setCookie']
+
+
+def running_pool(*idle):
+    pool = WorkerBrowserPool(size=len(idle))
+    pool._running = True  # Without the refill thread, which would launch real browsers
+    pool._idle.extend(idle)
+    return pool
+
+
+def test_close_when_drained_waits_for_checked_out_browsers():
+    busy, spare = FakeBrowser(), FakeBrowser()
+    pool = running_pool(spare, busy)
+    browser = pool.checkout()
+    assert browser is busy
+
+    pool.close_when_drained()
+    assert not spare.quit_called
+    with pytest.raises(RuntimeError):
+        pool.checkout()
+
+    pool.release(browser)
+    assert busy.quit_called and spare.quit_called
+    assert not pool._running
+
+
+def test_close_when_drained_closes_an_idle_pool_at_once():
+    spare = FakeBrowser()
+    pool = running_pool(spare)
+    pool.close_when_drained()
+    assert spare.quit_called
+    assert not pool._running
+
+
+def test_unhealthy_browser_is_discarded_and_the_pool_stays_open():
+    browser = FakeBrowser()
+    pool = running_pool(browser)
+    pool.release(pool.checkout())
+    assert browser.quit_called
+    assert pool._running and pool._checked_out == 0
+
+
+def test_rotated_cookies_reach_idle_browsers_at_once():
+    idle = cookie_browser()
+    pool = running_pool(idle)
+    pool.set_cookies(SESSION)
+    assert set_cookie_calls(idle) == [{'name': "session", 'value': "new", 'domain': ".rugplay.com", 'path': "/",
+                                       'secure': True, 'httpOnly': True, 'sameSite': "Lax", 'expires': 1900000000}]
+
+
+def test_checked_out_browser_gets_the_rotation_on_release():
+    busy = cookie_browser()
+    pool = running_pool(busy)
+    browser = pool.checkout()
+    pool.set_cookies(SESSION)
+    assert set_cookie_calls(busy) == []
+
+    pool.release(browser)
+    assert len(set_cookie_calls(busy)) == 1
+    assert pool._idle[-1] is busy
+
+    pool.release(pool.checkout())
+    assert len(set_cookie_calls(busy)) == 1  # Already up to date
+
+
+def test_idle_browser_that_cannot_take_the_cookies_is_dropped():
+    healthy, broken = cookie_browser(), cookie_browser(broken=True)
+    pool = running_pool(healthy, broken)
+    pool.set_cookies(SESSION)
+    assert list(pool._idle) == [healthy]
+    assert broken.driver.quit_called
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -14,7 +14,6 @@ from selenium.common.exceptions import (
 )
 import time
 from datetime import datetime
-import json
 import threading
 import math
 import signal
@@ -24,23 +23,29 @@ import os
 import shutil
 import tempfile
 import itertools
-import requests
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+# Engines, API clients and their configuration live in botcore.py
+from botcore import *
 
 
 # --- Configuration & Constants ---
 CHROMEDRIVER_PATH = "/usr/bin/chromedriver"
 CHROME_USER_DATA_DIR = os.path.expanduser("~/chromeprofile")
-USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:140.0) Gecko/20100101 Firefox/140.0"
 DEBUG_MODE = False
 HEADLESS_MODE = not DEBUG_MODE
 
-# URLs
-BASE_URL = "https://rugplay.com"
-PORTFOLIO_API_URL = f"{BASE_URL}/api/portfolio/total"
-MARKET_API_URL = f"{BASE_URL}/api/market?sortBy=createdAt&sortOrder=desc&limit=50"
-NEWEST_COIN_API_URL = f"{BASE_URL}/api/market?sortBy=createdAt&sortOrder=desc&limit=1"
-HOLDERS_API_URL_TEMPLATE = f"{BASE_URL}/api/coin/{{token_symbol}}/holders?limit=50"
-TRADE_API_URL_TEMPLATE = f"{BASE_URL}/api/coin/{{token_symbol}}/trade"
+# Sell All: how many API sells run at once, and "largest" to liquidate the
+# highest-value holdings first (None keeps the portfolio's order).
+SELL_ALL_PARALLELISM = 4
+SELL_ALL_ORDER = "largest"
+
+# Post-buy workers check out pre-launched, logged-in browsers from a pool.
+# Idle browsers older than the timeout are recycled in the background.
+WORKER_POOL_SIZE = 2
+WORKER_POOL_IDLE_TIMEOUT = 600
+WORKER_POOL_CHECKOUT_TIMEOUT = 30
 
 # XPaths
 DIALOG_CONTENT_XPATH = "//div[@data-slot='dialog-content']"
@@ -56,53 +61,244 @@ MAX_BUTTON_XPATH = "//button[text()='Max']"
 CONFIRM_SELL_BUTTON_XPATH_TEMPLATE = "//div[@data-slot='dialog-content']//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'sell {token_symbol}')]"
 
 
-class RugplayAPI:
-    """Handles all JavaScript-based API interactions with rugplay.com."""
-    def __init__(self, driver):
-        self.driver = driver
-
-    def _fetch(self, url):
-        """Generic method to execute a fetch request and return JSON."""
-        js_script = f"""
-            return fetch('{url}', {{ headers: {{ 'Content-Type': 'application/json', 'User-Agent': '{USER_AGENT}' }} }})
-            .then(response => response.text())
-            .catch(error => JSON.stringify({{'error': error.message, 'status': 'fetch_failed'}}));
-        """
-        try:
-            if not self.is_browser_open():
-                return {'error': 'Browser is not open.'}
-            response_text = self.driver.execute_script(js_script)
-
-            # Handle cases where the API returns an HTML login page instead of JSON
-            if response_text.strip().startswith('<'):
-                return {'error': 'API returned HTML. Session may be invalid.'}
+def launch_worker_browser(tag):
+    """
+    Clones the logged-in Chrome profile and launches a worker browser on it.
+    Returns (driver, temp_profile_path); the caller owns both.
+    """
+    temp_profile_path = tempfile.mkdtemp(suffix=f"_worker_{tag}")
+    try:
+        ignore_patterns = shutil.ignore_patterns('Singleton*', 'lockfile', '*Cache*', '*Code Cache*', '*ShaderCache*')
+        shutil.copytree(CHROME_USER_DATA_DIR, temp_profile_path, dirs_exist_ok=True, ignore=ignore_patterns)
 
-            return json.loads(response_text)
-        except (WebDriverException, json.JSONDecodeError) as e:
-            return {'error': f"API fetch failed: {e}"}
+        options = Options()
+        options.add_argument("--no-sandbox")
+        options.add_argument(f"--user-data-dir={temp_profile_path}")
+        options.add_argument("--window-size=1280,720")
+        if not DEBUG_MODE:
+            options.add_argument("--headless=new")
 
-    def get_portfolio(self):
-        return self._fetch(PORTFOLIO_API_URL)
+        service = Service(CHROMEDRIVER_PATH)
+        driver = webdriver.Chrome(service=service, options=options)
+        try:
+            driver.get(BASE_URL)
+            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        except Exception:
+            driver.quit()
+            raise
+        return driver, temp_profile_path
+    except Exception:
+        shutil.rmtree(temp_profile_path, ignore_errors=True)
+        raise
+
+
+def cdp_cookie(cookie):
+    """Network.setCookie parameters for a cookie dict as returned by WebDriver's get_cookies()."""
+    params = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite') if key in cookie}
+    if 'expiry' in cookie:
+        params['expires'] = cookie['expiry']
+    return params
+
+
+class PooledBrowser:
+    """A launched worker browser together with its cloned profile directory."""
+    def __init__(self, driver, profile_path):
+        self.driver = driver
+        self.profile_path = profile_path
+        self.idle_since = time.monotonic()
+        self.cookie_version = 0
 
-    def get_recent_coins(self):
-        return self._fetch(MARKET_API_URL)
+    def set_cookies(self, cookies, version):
+        for cookie in cookies:
+            self.driver.execute_cdp_cmd('Network.setCookie', cdp_cookie(cookie))
+        self.cookie_version = version
 
-    def get_newest_coin(self):
-        return self._fetch(NEWEST_COIN_API_URL)
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(self.profile_path, ignore_errors=True)
+
+
+class WorkerBrowserPool:
+    """
+    Keeps `size` already-launched, already-logged-in worker browsers ready so a
+    post-buy worker can start without cloning a profile and booting Chrome.
+    A background thread refills the pool and recycles browsers idle for longer
+    than `idle_timeout` seconds. Workers should hold on to the pool they checked
+    out from; close_when_drained() lets the ones still running finish with it.
+    set_cookies() pushes a rotated session into the idle browsers at once, and
+    into checked-out or still launching ones when they come back or come up.
+    """
+    def __init__(self, size=WORKER_POOL_SIZE, idle_timeout=WORKER_POOL_IDLE_TIMEOUT, on_status=None):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.on_status = on_status or (lambda *args, **kwargs: None)
+        self._idle = collections.deque()
+        self._launching = 0
+        self._checked_out = 0
+        self._running = False
+        self._draining = False
+        self._cond = threading.Condition()
+        self._tag_counter = itertools.count(1)
+        self._cookies = ()
+        self._cookie_version = 0
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._refill_loop, daemon=True).start()
+
+    def close(self):
+        """Stops refilling and quits every idle browser. Checked-out browsers are quit on release."""
+        with self._cond:
+            self._running = False
+            idle, self._idle = list(self._idle), collections.deque()
+            self._cond.notify_all()
+        for browser in idle:
+            browser.quit()
+
+    def close_when_drained(self):
+        """Stops handing out browsers now and closes the pool once every checked-out browser is back."""
+        with self._cond:
+            self._draining = True
+            drained = not self._checked_out
+        if drained:
+            self.close()
+
+    def set_cookies(self, cookies):
+        """Injects session cookies (WebDriver cookie dicts) into every idle browser with CDP Network.setCookie."""
+        dead = []
+        with self._cond:
+            self._cookies = list(cookies)
+            self._cookie_version += 1
+            # Under the lock so no worker checks a browser out halfway through
+            for browser in list(self._idle):
+                try:
+                    browser.set_cookies(self._cookies, self._cookie_version)
+                except Exception:
+                    self._idle.remove(browser)
+                    dead.append(browser)
+            self._cond.notify_all()
+        for browser in dead:
+            browser.quit()
+
+    def _refresh_cookies(self, browser):
+        """Brings a browser that missed a rotation up to date; raises if it is unhealthy."""
+        with self._cond:
+            cookies, version = self._cookies, self._cookie_version
+        if browser.cookie_version != version:
+            browser.set_cookies(cookies, version)
+
+    def checkout(self, timeout=WORKER_POOL_CHECKOUT_TIMEOUT):
+        """Returns a ready browser, waiting for the refill thread or launching one as a last resort."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._draining or not self._running:
+                raise RuntimeError("Worker browser pool is closed.")
+            self._checked_out += 1
+            while self._running and not self._idle and self.size > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            browser = self._idle.pop() if self._idle else None
+            self._cond.notify_all()
+        if browser:
+            return browser
+        self.on_status("⚠️ [POOL] No pre-warmed browser available. Launching one on demand...")
+        try:
+            browser = PooledBrowser(*launch_worker_browser(f"ondemand_{next(self._tag_counter)}"))
+        except Exception:
+            self._checked_in()
+            raise
+        try:
+            self._refresh_cookies(browser)
+        except Exception:
+            self.discard(browser)
+            raise
+        return browser
+
+    def release(self, browser):
+        """Resets a browser and returns it to the pool, or discards it if it is unhealthy."""
+        if not self._running or self._draining:
+            browser.quit()
+            self._checked_in()
+            return
+        try:
+            driver = browser.driver
+            for handle in driver.window_handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+            driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': False})
+            self._refresh_cookies(browser)
+            driver.get(BASE_URL)
+        except Exception:
+            self.discard(browser)
+            return
+        with self._cond:
+            if self._running and not self._draining and len(self._idle) < self.size:
+                browser.idle_since = time.monotonic()
+                self._idle.append(browser)
+                browser = None
+            self._cond.notify_all()
+        if browser:
+            browser.quit()
+        self._checked_in()
+
+    def discard(self, browser):
+        browser.quit()
+        self._checked_in()
+
+    def _checked_in(self):
+        with self._cond:
+            self._checked_out -= 1
+            drained = self._draining and self._running and not self._checked_out
+            self._cond.notify_all()
+        if drained:
+            self.close()
+
+    def _refill_loop(self):
+        while True:
+            expired = []
+            with self._cond:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                while self._idle and now - self._idle[0].idle_since > self.idle_timeout:
+                    expired.append(self._idle.popleft())
+                missing = self.size - len(self._idle) - self._launching
+                if missing <= 0 and not expired:
+                    self._cond.wait(min(self.idle_timeout / 2, 5))
+                    continue
+                missing = max(missing, 0)
+                self._launching += missing
 
-    def get_token_holders(self, token_symbol):
-        url = HOLDERS_API_URL_TEMPLATE.format(token_symbol=token_symbol)
-        return self._fetch(url)
+            for browser in expired:
+                browser.quit()
+            for _ in range(missing):
+                self._launch_one()
 
-    def is_browser_open(self):
-        """Checks if the Selenium browser instance is still alive."""
-        if not self.driver:
-            return False
+    def _launch_one(self):
+        browser = None
         try:
-            _ = self.driver.window_handles
-            return True
-        except (WebDriverException, NoSuchWindowException):
-            return False
+            browser = PooledBrowser(*launch_worker_browser(f"pool_{next(self._tag_counter)}"))
+            self._refresh_cookies(browser)
+        except Exception as e:
+            if browser:
+                browser.quit()
+                browser = None
+            self.on_status(f"❌ [POOL] Failed to pre-launch worker browser: {e}", is_error=True)
+            time.sleep(5)
+        with self._cond:
+            self._launching -= 1
+            if browser and self._running:
+                self._idle.append(browser)
+                browser = None
+            self._cond.notify_all()
+        if browser:
+            browser.quit()
 
 
 class TradeApp(tk.Tk):
@@ -111,22 +307,38 @@ class TradeApp(tk.Tk):
         super().__init__()
         self.selenium_driver = None
         self.api = None
-        self.log_history = []
+        self.log_history = collections.deque(maxlen=LOG_HISTORY_SIZE)
+        self.log_sink = LogSink()
+        self.log_sink.start()
+        self.trade_journal = TradeJournal()
+        self.trade_journal.start()
         self.current_coin_holdings = []
         self.session_cookie = None
+        self.session_monitor = None
 
         # Bot state
         self.sniper_bot_active = False
         self.random_bot_active = False
-        self.sniper_bot_thread = None
-        self.random_bot_thread = None
+        self.random_bot_engine = None
+        self.sniper_engine = None
+        self.worker_pool = None
+        self.trace_recorder = TraceRecorder()
+        self.coin_index = CoinIndex()
+        self.ledger = PortfolioLedger()
+        self.portfolio_service = PortfolioService(self._fetch_portfolio, self._on_portfolio_snapshot, self._on_portfolio_error, ledger=self.ledger)
+        self.sniper_sizing = (None, 0.0)
 
         # Window references
         self.history_window = None
+        self.timings_window = None
         self.log_text_widget = None
         self.recent_coins_window = None
 
         self._setup_gui()
+        self.bridge = TkBridge(self)
+        self.bridge.start()
+        self.trade_client = TradeClient(self.bridge, lambda: self.api, lambda: self.session_cookie,
+                                        ledger=self.ledger, on_trade=self._check_balance, journal=self.trade_journal)
         self.update_status("Initializing application...")
         threading.Thread(target=self._run_selenium_thread, args=(True,), daemon=True).start()
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
@@ -280,53 +492,16 @@ class TradeApp(tk.Tk):
 
 
 
-    def _trade_via_api(self, token_symbol, trade_type, amount, worker_name="API", on_complete=None):
-        """Executes a trade using the direct API endpoint."""
-        log_prefix = f"[{worker_name}:{token_symbol}]"
-        self.after(0, lambda: self.update_status(f"{log_prefix} Firing {trade_type} API for {amount}..."))
-
-        trade_successful = False
+    def _trade_via_api(self, token_symbol, trade_type, amount, worker_name="API", on_complete=None, trace=None, refresh_balance=True,
+                       strategy="manual"):
+        """Executes a trade through the shared TradeClient, then runs `on_complete` on the Tk thread."""
         try:
-            if not self.session_cookie:
-                self.after(0, lambda: self.update_status(f"❌ {log_prefix} Trade failed: No session cookie.", is_error=True))
-                return False
-
-            url = TRADE_API_URL_TEMPLATE.format(token_symbol=token_symbol)
-            headers = {
-                'User-Agent': USER_AGENT,
-                'Content-Type': 'application/json',
-                'Origin': BASE_URL,
-                'Referer': f'{BASE_URL}/coin/{token_symbol}',
-                'Cookie': self.session_cookie
-            }
-            payload = {"type": trade_type.upper(), "amount": float(amount)}
-
-            try:
-                response = requests.post(url, headers=headers, json=payload, timeout=15)
-
-                if response.status_code in [200, 204] and not response.text:
-                    self.after(0, lambda: self.update_status(f"✅ {log_prefix} Trade successful (No Content response)."))
-                    threading.Thread(target=self._check_balance).start()
-                    trade_successful = True
-                else:
-                    response_data = response.json()
-                    if response.status_code == 200 and response_data.get('success'):
-                        self.after(0, lambda: self.update_status(f"✅ {log_prefix} Trade successful!"))
-                        threading.Thread(target=self._check_balance).start()
-                        trade_successful = True
-                    else:
-                        error_msg = response_data.get('message', response.text)
-                        self.after(0, lambda: self.update_status(f"❌ {log_prefix} Trade failed: '{error_msg}'.", is_error=True))
-            except requests.exceptions.RequestException as e:
-                self.after(0, lambda err=e: self.update_status(f"❌ {log_prefix} Trade request error: {err}", is_error=True))
-            except json.JSONDecodeError:
-                self.after(0, lambda: self.update_status(f"❌ {log_prefix} Trade failed: Invalid JSON in response: {response.text}", is_error=True))
-
+            return self.trade_client.trade(token_symbol, trade_type, amount, worker_name, trace=trace, refresh_balance=refresh_balance,
+                                           strategy=strategy)
         finally:
             # FIX: Execute the on_complete callback to re-enable UI elements
             if on_complete:
                 self.after(0, on_complete)
-            return trade_successful
 
     def _create_notebook(self, parent):
         notebook = ttk.Notebook(parent)
@@ -449,6 +624,8 @@ class TradeApp(tk.Tk):
 
         self.recent_coins_button = ttk.Button(bottom_frame, text="Show/Hide Recent Coins", command=self._toggle_recent_coins_window)
         self.recent_coins_button.pack(pady=5)
+        self.timings_button = ttk.Button(bottom_frame, text="Show/Hide Snipe Timings", command=self._toggle_timings_window)
+        self.timings_button.pack(pady=5)
 
     def _create_status_bar(self, parent):
         status_frame = ttk.Frame(parent)
@@ -476,13 +653,16 @@ class TradeApp(tk.Tk):
         log_prefix = "[ERROR]" if is_error else "[CONSOLE]"
         message_to_log = f"{timestamp} {log_prefix} {console_message or gui_message}"
 
-        print(message_to_log)
+        self.log_sink.write(message_to_log)
         self.log_history.append(message_to_log)
 
-        # Update external history window if open
+        # Update external history window if open, keeping only the tail
         if self.log_text_widget and self.log_text_widget.winfo_exists():
             self.log_text_widget.config(state=tk.NORMAL)
             self.log_text_widget.insert(tk.END, message_to_log + "\n")
+            excess_lines = int(self.log_text_widget.index('end-1c').split('.')[0]) - 1 - LOG_HISTORY_WINDOW_LINES
+            if excess_lines > 0:
+                self.log_text_widget.delete("1.0", f"{excess_lines + 1}.0")
             self.log_text_widget.see(tk.END)
             self.log_text_widget.config(state=tk.DISABLED)
 
@@ -538,8 +718,7 @@ class TradeApp(tk.Tk):
             percentage = float(percentage_str.replace('%', '')) / 100.0
 
             if is_buy:
-                balance_str = self.balance_var.get().split('$')[-1]
-                available_balance = float(balance_str)
+                available_balance = self.ledger.cash_balance() or 0.0
                 calculated_amount = math.floor(available_balance * percentage)
             else: # SELL
                 selected_symbol = self.selected_token_symbol.get()
@@ -579,7 +758,7 @@ class TradeApp(tk.Tk):
         try:
             service = Service(CHROMEDRIVER_PATH)
             self.selenium_driver = webdriver.Chrome(service=service, options=options)
-            self.api = RugplayAPI(self.selenium_driver)
+            self._set_api(self._create_api(self.selenium_driver))
             self.selenium_driver.get(BASE_URL)
 
             if initial_run:
@@ -591,11 +770,23 @@ class TradeApp(tk.Tk):
                 if not self.sniper_bot_active and not self.random_bot_active:
                     self.sniper_bot_button.config(state=tk.NORMAL)
                     self.random_bot_button.config(state=tk.NORMAL)
-                threading.Thread(target=self._check_balance).start()
+                self._check_balance()
         except Exception as e:
             self.after(0, lambda e=e: self.update_status(f"Failed to start browser: {e}", is_error=True))
             self.after(0, lambda: self.action_button.config(state=tk.DISABLED))
 
+    def _create_api(self, driver):
+        """Builds the API client for the configured backend."""
+        if API_BACKEND == "http" and self.session_cookie:
+            return RugplayHTTPAPI(driver, self.session_cookie)
+        return RugplayAPI(driver)
+
+    def _set_api(self, api):
+        """Swaps in a new API client and releases the previous one."""
+        old_api, self.api = self.api, api
+        if old_api and old_api is not api:
+            old_api.close()
+
     def _proceed_after_login(self):
         global HEADLESS_MODE
         if not self.api or not self.api.is_browser_open(): return
@@ -616,8 +807,13 @@ class TradeApp(tk.Tk):
                 self.update_status("Could not retrieve session cookie. Please try again.", is_error=True)
                 self.action_button.config(state=tk.NORMAL)
                 return
-            self.session_cookie = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
-            self.update_status("Session cookie captured successfully.", "Auth cookie stored.")
+            self.session_cookie = cookie_header(cookies)
+            self._set_api(self._create_api(self.selenium_driver))
+            self.update_status("Session cookie captured successfully.", f"Auth cookie stored. API backend: {API_BACKEND}.")
+            try:
+                save_session_cookie(self.session_cookie)
+            except OSError as e:
+                self.update_status(f"Could not save session cookie for headless runs: {e}", is_error=True)
         except Exception as e:
             self.update_status(f"Error capturing cookie: {e}", is_error=True)
             self.action_button.config(state=tk.NORMAL)
@@ -626,6 +822,12 @@ class TradeApp(tk.Tk):
 
         self._update_balance_labels(portfolio_data)
         self._populate_token_dropdown(portfolio_data.get("coinHoldings", []))
+        if not self.session_monitor:
+            self.session_monitor = SessionMonitor(
+                self.bridge, self.portfolio_service, lambda: self.session_cookie, self._apply_session_cookie,
+                self._read_browser_cookie, reload=self._reload_session_page,
+                restart=lambda: threading.Thread(target=self._run_selenium_thread).start())
+            self.session_monitor.start()
 
         # Reconfigure button for future use
         self.action_button.config(text="Restart & Refresh", command=lambda: threading.Thread(target=self._run_selenium_thread).start())
@@ -639,21 +841,65 @@ class TradeApp(tk.Tk):
             self.update_status("Login confirmed. Debug mode is ON, staying in normal browser.")
             self.action_button.config(state=tk.NORMAL)
 
+    def _read_browser_cookie(self):
+        """The live browser's cookies as a Cookie header, or None without a browser."""
+        driver = self.selenium_driver
+        if not driver or not self.api or not self.api.is_browser_open():
+            return None
+        cookies = driver.get_cookies()
+        return cookie_header(cookies) if cookies else None
+
+    def _apply_session_cookie(self, session_cookie):
+        """
+        Swaps a rotated cookie into every client. The trade client and pre-armed buy
+        read self.session_cookie on each use; the asyncio engine holds its own session,
+        and the pooled worker browsers get the browser's cookies through CDP.
+        """
+        self.session_cookie = session_cookie
+        if isinstance(self.api, RugplayHTTPAPI):
+            self.api.set_session_cookie(session_cookie)
+        elif API_BACKEND == "http" and self.selenium_driver:
+            self._set_api(self._create_api(self.selenium_driver))
+        if isinstance(self.sniper_engine, AsyncSniperEngine):
+            self.sniper_engine.set_session_cookie(session_cookie)
+        if self.worker_pool and self.selenium_driver:
+            try:
+                self.worker_pool.set_cookies(self.selenium_driver.get_cookies())
+            except Exception as e:
+                self.bridge.status(f"Could not update the worker browsers' session: {e}", is_error=True)
+        try:
+            save_session_cookie(session_cookie)
+        except OSError as e:
+            self.bridge.status(f"Could not save session cookie for headless runs: {e}", is_error=True)
+
+    def _reload_session_page(self):
+        """Reloads the site in the browser so it re-issues the session cookie."""
+        if self.selenium_driver:
+            self.selenium_driver.get(BASE_URL)
+
     def _check_balance(self):
-        if not self.api or not self.api.is_browser_open(): return
+        """Requests a coalesced portfolio refresh; the labels and dropdown update once it lands."""
+        self.portfolio_service.request_refresh()
 
+    def _fetch_portfolio(self):
+        """Portfolio fetch run by the PortfolioService on its refresh thread."""
+        if not self.api or not self.api.is_browser_open():
+            return {'error': "Browser not open."}
         self.after(0, lambda: self.update_status("Checking balance...", f"Requesting {PORTFOLIO_API_URL}"))
-        portfolio_data = self.api.get_portfolio()
+        return self.api.get_portfolio()
 
-        if 'error' in portfolio_data:
-            msg = portfolio_data['error']
-            self.after(0, lambda: self.update_status(f"Balance check failed: {msg}", is_error=True))
-            if "HTML" in msg:
-                self.after(0, lambda: self.update_status("Refreshing page to fix session..."))
-                self.selenium_driver.refresh()
-        else:
-            self.after(0, lambda: self._update_balance_labels(portfolio_data))
-            self.after(0, lambda: self._populate_token_dropdown(portfolio_data.get("coinHoldings", [])))
+    def _on_portfolio_snapshot(self, portfolio_data):
+        self.after(0, lambda: self._update_balance_labels(portfolio_data))
+        self.after(0, lambda: self._populate_token_dropdown(portfolio_data.get("coinHoldings", [])))
+
+    def _on_portfolio_error(self, portfolio_data):
+        msg = portfolio_data['error']
+        self.after(0, lambda: self.update_status(f"Balance check failed: {msg}", is_error=True))
+        if self.session_monitor and session_expired(portfolio_data):
+            self.session_monitor.check_now()
+        elif "HTML" in msg and self.selenium_driver:
+            self.after(0, lambda: self.update_status("Refreshing page to fix session..."))
+            self.selenium_driver.refresh()
 
     def _execute_trade(self, trade_type):
         token_symbol = self.selected_token_symbol.get()
@@ -684,11 +930,12 @@ class TradeApp(tk.Tk):
         # The incorrect self.after(3000, ...) lines have been removed.
 
 
-    def _trade_token_flow(self, token_symbol, trade_type, amount, driver, worker_name="Manual"):
+    def _trade_token_flow(self, token_symbol, trade_type, amount, driver, worker_name="Manual", strategy="manual"):
         log_prefix = f"[{worker_name}:{token_symbol}]"
         self.after(0, lambda: self.update_status(f"{log_prefix} Starting {trade_type} for {amount}..."))
 
         trade_successful = False
+        outcome, message, sent_at = 'error', None, None
         try:
             coin_page_url = f"{BASE_URL}/coin/{token_symbol}"
             if driver.current_url != coin_page_url:
@@ -711,20 +958,27 @@ class TradeApp(tk.Tk):
 
             confirm_xpath = CONFIRM_BUTTON_XPATH_TEMPLATE.format(trade_type=trade_type.lower(), token_symbol=token_symbol.lower())
             confirm_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, confirm_xpath)))
+            sent_at = time.monotonic()
             driver.execute_script("arguments[0].click();", confirm_button)
 
             outcome_element = WebDriverWait(driver, 15).until(EC.visibility_of_element_located((By.XPATH, "//*[contains(text(), 'successful') or contains(text(), 'failed')]")))
+            message = outcome_element.text
             if 'successful' in outcome_element.text.lower():
+                outcome = 'ok'
                 self.after(0, lambda: self.update_status(f"✅ {log_prefix} Trade successful!"))
                 WebDriverWait(driver, 10).until(EC.invisibility_of_element_located((By.XPATH, DIALOG_CONTENT_XPATH)))
                 trade_successful = True
             else:
+                outcome = 'failed'
                 self.after(0, lambda: self.update_status(f"❌ {log_prefix} Trade failed: '{outcome_element.text}'.", is_error=True))
 
         except Exception as e:
+            message = message or str(e)
             self.after(0, lambda err=e: self.update_status(f"❌ {log_prefix} Trade failed with exception: {err}", is_error=True))
 
         finally:
+            self.trade_journal.record(token_symbol, trade_type, amount, outcome, worker_name, strategy,
+                                      latency=time.monotonic() - sent_at if sent_at else None, message=message)
             # FIX: Only re-enable buttons if it was a manual trade
             if worker_name == "Manual":
                 self.after(0, self._finalize_manual_trade_ui)
@@ -754,14 +1008,16 @@ class TradeApp(tk.Tk):
             return
 
         self.after(0, lambda: self.update_status("Fetching portfolio for sell-all...", "Requesting portfolio API."))
-        portfolio_data = self.api.get_portfolio()
+        portfolio_data = self.portfolio_service.refresh()
         if 'error' in portfolio_data:
             self.after(0, lambda: self.update_status(f"Could not get portfolio: {portfolio_data['error']}", is_error=True))
             self._finalize_sell_all_ui()
             return
 
-        holdings = portfolio_data.get("coinHoldings", [])
-        tokens_to_sell = [(h['symbol'], float(h.get('quantity', 0))) for h in holdings if h.get('symbol') and float(h.get('quantity', 0)) > 0.0001]
+        holdings = [h for h in portfolio_data.get("coinHoldings", []) if h.get('symbol') and float(h.get('quantity', 0)) > 0.0001]
+        if SELL_ALL_ORDER == "largest":
+            holdings.sort(key=lambda h: float(h.get('value') or float(h.get('quantity', 0)) * float(h.get('currentPrice') or 0)), reverse=True)
+        tokens_to_sell = [(h['symbol'], float(h.get('quantity', 0))) for h in holdings]
 
         if not tokens_to_sell:
             self.after(0, lambda: self.update_status("Portfolio is empty. Nothing to sell."))
@@ -770,24 +1026,47 @@ class TradeApp(tk.Tk):
 
         self.after(0, lambda: self.update_status(f"Found {len(tokens_to_sell)} tokens to sell."))
 
-        for token_symbol, quantity in tokens_to_sell:
-            # --- Check Debug Mode ---
-            if DEBUG_MODE:
+        results = {}
+        # --- Check Debug Mode ---
+        if DEBUG_MODE:
+            # The UI method drives the single main browser, so it stays sequential
+            for token_symbol, quantity in tokens_to_sell:
                 self.after(0, lambda t=token_symbol: self.update_status(f"[DEBUG] Using UI method to sell {t}"))
-                self._sell_max_for_token(self.selenium_driver, token_symbol)
-            else:
-                self.after(0, lambda t=token_symbol, q=quantity: self.update_status(f"Selling all {q} of {t} via API"))
-                self._trade_via_api(token_symbol, 'SELL', quantity, "SellAll")
-            # --- End Check ---
-            time.sleep(1)
+                results[token_symbol] = self._sell_max_for_token(self.selenium_driver, token_symbol)
+                time.sleep(1)
+        else:
+            def sell_one(token_symbol, quantity):
+                self.after(0, lambda: self.update_status(f"Selling all {quantity} of {token_symbol} via API"))
+                return self._trade_via_api(token_symbol, 'SELL', quantity, "SellAll", refresh_balance=False, strategy="sell_all")
+
+            with ThreadPoolExecutor(max_workers=SELL_ALL_PARALLELISM, thread_name_prefix="sellall") as executor:
+                futures = {token_symbol: executor.submit(sell_one, token_symbol, quantity) for token_symbol, quantity in tokens_to_sell}
+                for token_symbol, future in futures.items():
+                    try:
+                        results[token_symbol] = future.result()
+                    except Exception as e:
+                        self.after(0, lambda t=token_symbol, err=e: self.update_status(f"An error occurred selling {t}: {err}", is_error=True))
+                        results[token_symbol] = False
+        # --- End Check ---
 
-        self.after(0, lambda: self.update_status("✅ Sell All process complete."))
-        threading.Thread(target=self._check_balance).start()
+        failed = [token_symbol for token_symbol, sold in results.items() if not sold]
+        summary = f"Sell All process complete: {len(results) - len(failed)}/{len(results)} tokens sold."
+        if failed:
+            self.after(0, lambda: self.update_status(f"⚠️ {summary} Failed: {', '.join(failed)}", is_error=True))
+        else:
+            self.after(0, lambda: self.update_status(f"✅ {summary}"))
+        self._check_balance()
         self._finalize_sell_all_ui()
 
     def _sell_max_for_token(self, driver, token_symbol):
-        """Performs a single max sell for a given token, updating the GUI."""
+        """Performs a single max sell for a given token, updating the GUI. Returns True on success."""
         self.after(0, lambda t=token_symbol: self.update_status(f"Attempting MAX SELL for: {t}"))
+        sent_at = None
+
+        def journal(outcome, message):
+            self.trade_journal.record(token_symbol, 'SELL', None, outcome, "SellAll", "sell_all",
+                                      latency=time.monotonic() - sent_at if sent_at else None, message=message)
+
         try:
             coin_page_url = f"{BASE_URL}/coin/{token_symbol}"
             if driver.current_url != coin_page_url:
@@ -802,21 +1081,28 @@ class TradeApp(tk.Tk):
 
             confirm_xpath = CONFIRM_SELL_BUTTON_XPATH_TEMPLATE.format(token_symbol=token_symbol.lower())
             confirm_button = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.XPATH, confirm_xpath)))
+            sent_at = time.monotonic()
             driver.execute_script("arguments[0].click();", confirm_button)
 
             outcome_element = WebDriverWait(driver, 15).until(EC.visibility_of_element_located((By.XPATH, "//*[contains(text(), 'successful') or contains(text(), 'failed')]")))
             outcome_text = outcome_element.text
 
             if 'successful' in outcome_text.lower():
+                journal('ok', outcome_text)
                 self.after(0, lambda t=token_symbol, o=outcome_text: self.update_status(f"✅ SELL SUCCESSFUL for {t}. Message: '{o}'"))
                 WebDriverWait(driver, 5).until(EC.invisibility_of_element_located((By.XPATH, DIALOG_CONTENT_XPATH)))
+                return True
             else:
+                journal('failed', outcome_text)
                 self.after(0, lambda t=token_symbol, o=outcome_text: self.update_status(f"❌ SELL FAILED for {t}. Message: '{o}'.", is_error=True))
 
         except TimeoutException:
+            journal('error', "Timeout")
             self.after(0, lambda t=token_symbol: self.update_status(f"Timeout selling {t}. Token might be gone.", is_error=True))
         except Exception as e:
+            journal('error', str(e))
             self.after(0, lambda t=token_symbol, err=e: self.update_status(f"An error occurred selling {t}: {err}", is_error=True))
+        return False
 
 
 
@@ -841,9 +1127,21 @@ class TradeApp(tk.Tk):
             self.notebook.tab(0, state="disabled") # Manual Tab
             self.notebook.tab(1, state="disabled") # Sniper Tab
 
-            self.random_bot_thread = threading.Thread(target=self._random_bot_logic, daemon=True)
-            self.random_bot_thread.start()
+            try:
+                max_buy = float(self.random_max_buy_entry.get())
+            except ValueError:
+                max_buy = 10.0 # Default to 10 if input is invalid
+
+            self.random_bot_engine = RandomBotEngine(
+                self.bridge, lambda: self.api, self.trade_client, self.ledger, self.portfolio_service,
+                token_symbol, max_buy=max_buy,
+                scrape_sell_amount=self._scrape_and_calculate_sell_amount,
+                on_stopped=self._toggle_random_bot)
+            self.random_bot_engine.start()
         else:
+            if self.random_bot_engine:
+                self.random_bot_engine.stop()
+                self.random_bot_engine = None
             # --- Stop Bot: Re-enable all controls ---
             self.random_bot_button.config(text="Start Random Bot")
             self.sniper_bot_button.config(state=tk.NORMAL)
@@ -854,71 +1152,6 @@ class TradeApp(tk.Tk):
 
 
 
-    def _random_bot_logic(self):
-        self.after(0, lambda: self.update_status("Random Bot Activated!", "Random bot thread started."))
-        last_trade_type = 'SELL'  # Start by buying first
-
-        while self.random_bot_active:
-            try:
-                # Check for valid session and browser state
-                if (not self.session_cookie) or (not self.api.is_browser_open()):
-                    self.after(0, lambda: self.update_status("Session/Browser not ready, stopping bot.", is_error=True))
-                    self.after(0, self._toggle_random_bot)
-                    break
-
-                token_symbol = self.selected_token_symbol.get()
-                trade_type = 'BUY' if last_trade_type == 'SELL' else 'SELL'
-                trade_successful = False
-                amount = 0
-
-                if trade_type == 'BUY':
-                    balance_str = self.balance_var.get().split('$')[-1]
-                    available_balance = float(balance_str.replace(',', ''))
-
-                    try:
-                        # Get the user-defined max buy limit from the UI
-                        max_buy_limit = float(self.random_max_buy_entry.get())
-                    except ValueError:
-                        max_buy_limit = 10.0 # Default to 10 if input is invalid
-
-                    if available_balance > 1:
-                        # Determine the max possible buy, respecting the user's limit
-                        max_buy = min(available_balance * 0.80, max_buy_limit)
-                        if max_buy > 1:
-                            # Calculate a more random amount within the allowed range
-                            amount = math.floor(random.uniform(max_buy * 0.20, max_buy * 0.95))
-
-                    if amount > 0:
-                        # Use the fast API to buy
-                        trade_successful = self._trade_via_api(token_symbol, trade_type, amount, "RandomBot")
-
-                    last_trade_type = 'BUY' # Set type for next iteration
-
-                else:  # SELL logic
-                    # Use the robust scraping method to determine the sell amount
-                    amount = self._scrape_and_calculate_sell_amount(token_symbol)
-
-                    if amount > 0:
-                        # Use the fast API to sell the scraped amount
-                        trade_successful = self._trade_via_api(token_symbol, trade_type, amount, "RandomBot")
-
-                    last_trade_type = 'SELL' # Set type for next iteration
-
-            except Exception as e:
-                self.after(0, lambda e=e: self.update_status(f"Critical error in random bot: {e}", is_error=True))
-                time.sleep(2) # Keep a small sleep only for critical error cases
-
-
-
-
-
-
-
-
-
-
-
-
     def _toggle_sniper_bot(self):
         self.sniper_bot_active = not self.sniper_bot_active
 
@@ -931,107 +1164,91 @@ class TradeApp(tk.Tk):
                 messagebox.showerror("Input Error", "Please set a buy amount or a percentage.")
                 self.sniper_bot_active = False
                 return
+            # Capture sizing on the Tk thread so the buy path never touches widgets
+            percentage_str = self.sniper_buy_percentage.get()
+            self.sniper_sizing = (self.sniper_buy_amount_entry.get(),
+                                  float(percentage_str.replace('%', '')) / 100.0 if percentage_str else 0.0)
 
             self.sniper_bot_button.config(text="Stop Sniper Bot")
             self.random_bot_button.config(state=tk.DISABLED)
             self.notebook.tab(0, state="disabled")
             self.notebook.tab(2, state="disabled")
 
-            # --- Setup for the hybrid model ---
-            self.snipe_queue = []
-            self.worker_id_counter = itertools.count(1)
-
-            # --- Launch scanner and the NEW buy-only action thread ---
-            self.scanner_thread = threading.Thread(target=self._sniper_scanner_logic, daemon=True)
-            self.buy_thread = threading.Thread(target=self._sniper_buy_logic, daemon=True)
-            self.scanner_thread.start()
-            self.buy_thread.start()
+            if SNIPER_ENGINE == "asyncio":
+                self._start_async_sniper_engine()
+            else:
+                self._start_threaded_sniper()
         else:
+            stats = None
+            if self.sniper_engine:
+                stats = self.sniper_engine.stop()
+                self.sniper_engine = None
+            if self.worker_pool:
+                # Sell workers still running keep their own reference and return their browsers first
+                self.worker_pool.close_when_drained()
+                self.worker_pool = None
+            queue_summary = None
+            if stats:
+                queue_summary = (f"Sniper Bot Stopped. Snipe queue: {stats['dequeued']}/{stats['enqueued']} processed, "
+                                 f"max depth {stats['max_depth']}, avg wait {stats['avg_wait'] * 1000:.1f}ms, max wait {stats['max_wait'] * 1000:.1f}ms.")
             # --- Stop Bot: Re-enable all controls ---
             self.sniper_bot_button.config(text="Start Sniper Bot")
             self.random_bot_button.config(state=tk.NORMAL)
             self.notebook.tab(0, state="normal")
             self.notebook.tab(2, state="normal")
-            self.update_status("Sniper Bot Stopped.")
-
-    def _sniper_scanner_logic(self):
-        """Finds new coins and adds them to the buy queue."""
-        last_seen_coin_symbol = None
-        self.after(0, lambda: self.update_status("[SCANNER] Starting scan for new coins..."))
-        try:
-            initial_coin_data = self.api.get_newest_coin()
-            if initial_coin_data.get("coins"):
-                last_seen_coin_symbol = initial_coin_data["coins"][0].get('symbol')
-        except Exception: pass
-
-        while self.sniper_bot_active:
-            time.sleep(0.5)
-            try:
-                newest_coin_data = self.api.get_newest_coin()
-                current_newest = newest_coin_data.get("coins", [{}])[0].get('symbol') if newest_coin_data.get("coins") else last_seen_coin_symbol
-                gui_msg = f"[SNIPER] Monitoring... Newest: {current_newest or 'N/A'}"
-                console_msg = f"Scanning for new coins... Current newest found: {current_newest or 'N/A'}"
-                self.after(0, lambda gm=gui_msg, cm=console_msg: self.update_status(gm, cm))
-
-                if newest_coin_data.get("coins"):
-                    newest_symbol = newest_coin_data["coins"][0].get('symbol')
-                    if newest_symbol and newest_symbol != last_seen_coin_symbol:
-                        self.after(0, lambda s=newest_symbol: self.update_status(f"✨ [SCANNER] New coin detected: {s}! Added to buy queue."))
-                        last_seen_coin_symbol = newest_symbol
-                        self.snipe_queue.append(newest_symbol)
-            except Exception:
-                time.sleep(2)
-                continue
-
-    def _sniper_buy_logic(self):
-        """Processes the buy queue sequentially using the fast main browser."""
-        self.after(0, lambda: self.update_status("[BUY-THREAD] Waiting for coins in queue..."))
-        while self.sniper_bot_active:
-            if self.snipe_queue:
-                token_symbol = self.snipe_queue.pop(0)
-                log_prefix = f"[BUY-THREAD:{token_symbol}]"
-                self.after(0, lambda: self.update_status(f"{log_prefix} Processing buy..."))
-
-                try:
-                    buy_amount = 0
-                    fixed_amount = self.sniper_buy_amount_entry.get()
-                    if fixed_amount:
-                        buy_amount = int(fixed_amount)
-                    else:
-                        percentage = float(self.sniper_buy_percentage.get().replace('%', '')) / 100.0
-                        balance_str = self.balance_var.get().split('$')[-1]
-                        buy_amount = math.floor(float(balance_str) * percentage)
-
-                    if buy_amount < 1:
-                        self.after(0, lambda a=buy_amount: self.update_status(f"{log_prefix} Insufficient amount ({a}). Skipping."))
-                        continue
-
-                    # Execute the buy using the main driver
-                    buy_successful = self._trade_via_api(token_symbol, 'BUY', buy_amount, "SniperAPI")
-
-                    if buy_successful:
-                        # --- Launch the parallel post-buy worker ---
-                        worker_id = next(self.worker_id_counter)
-                        self.after(0, lambda s=token_symbol, w_id=worker_id: self.update_status(f"✅ {log_prefix} Buy successful! Spawning Worker-{w_id} for monitoring."))
-
-                        worker_thread = threading.Thread(target=self._snipe_post_buy_worker, args=(token_symbol, worker_id), daemon=True)
-                        worker_thread.start()
-                    else:
-                        self.after(0, lambda: self.update_status(f"❌ {log_prefix} Buy failed."))
-
-                except Exception as e:
-                    self.after(0, lambda err=e: self.update_status(f"❌ {log_prefix} Critical buy error: {err}", is_error=True))
-            else:
-                time.sleep(0.2)
-
-    def _snipe_post_buy_worker(self, token_symbol, worker_id):
-        """Monitors and sells a single coin using the robust, UI-scraping sell logic."""
+            self.update_status("Sniper Bot Stopped.", queue_summary)
+
+    def _start_threaded_sniper(self):
+        # --- With a session cookie sells go through the API, which reports their proceeds ---
+        sell_position = None
+        if not self.session_cookie:
+            # --- Otherwise pre-warm worker browsers so post-buy workers start instantly ---
+            self.worker_pool = WorkerBrowserPool(on_status=self.bridge.status)
+            self.worker_pool.start()
+            sell_position = self._snipe_post_buy_worker
+
+        # --- Scanner, buy thread and holder monitor run GUI-free ---
+        self.sniper_engine = ThreadedSniperEngine(
+            self.bridge, lambda: self.api, self.trade_client, self._resolve_sniper_buy_amount,
+            trace_recorder=self.trace_recorder,
+            sell_position=sell_position,
+            coin_index=self.coin_index)
+        self.sniper_engine.start()
+
+    def _start_async_sniper_engine(self):
+        """Runs the sniper on the asyncio engine instead of scanner/buy/worker threads."""
+        if aiohttp is None or not self.session_cookie:
+            reason = "aiohttp is not installed" if aiohttp is None else "no session cookie"
+            self.update_status(f"Async sniper engine unavailable ({reason}). Using threads.", is_error=True)
+            self._start_threaded_sniper()
+            return
+        self.sniper_engine = AsyncSniperEngine(
+            self.bridge, self.session_cookie, self._resolve_sniper_buy_amount,
+            on_trade=self._check_balance,
+            trace_recorder=self.trace_recorder,
+            ledger=self.ledger,
+            coin_index=self.coin_index,
+            journal=self.trade_journal)
+        self.sniper_engine.start()
+        self.update_status("[ASYNC] Sniper engine started.")
+
+    def _resolve_sniper_buy_amount(self):
+        """Returns the USD amount for the next snipe from the sizing captured at start and the ledger's cash."""
+        fixed_amount, percentage = self.sniper_sizing
+        return resolve_buy_amount(fixed_amount, percentage, self.ledger, self.portfolio_service)
+
+    def _snipe_post_buy_worker(self, token_symbol, worker_id, trace=None):
+        """Sells a single coin using the robust, UI-scraping sell logic once its exit trigger fires. True once sold out."""
         worker_name = f"Worker-{worker_id}"
         log_prefix = f"[{worker_name}:{token_symbol}]"
+        browser = None
+        browser_healthy = False
+        sold = False
         dedicated_driver = None
-        temp_profile_path = ""
+        thread_api = None
+        pool = self.worker_pool  # Stopping the sniper clears self.worker_pool while this worker may still run
 
-        # --- Helper function for recovery, now lives inside the worker ---
+        # --- Recovery after a failed sell attempt: hard-reload the coin page ---
         def recover_with_hard_reload(driver, thread_api, reason=""):
             self.after(0, lambda r=reason: self.update_status(f"⚠️ {log_prefix} {r}. Initiating recovery..."))
             if not driver or not thread_api.is_browser_open():
@@ -1059,66 +1276,25 @@ class TradeApp(tk.Tk):
                 return False
 
         try:
-            # 1. Setup browser clone
-            self.after(0, lambda: self.update_status(f"🛠️ {log_prefix} Cloning profile..."))
-            source_profile = CHROME_USER_DATA_DIR
-            temp_profile_path = tempfile.mkdtemp(suffix=f"_worker_{worker_id}")
-            ignore_patterns = shutil.ignore_patterns('Singleton*', 'lockfile', '*Cache*', '*Code Cache*', '*ShaderCache*')
-            shutil.copytree(source_profile, temp_profile_path, dirs_exist_ok=True, ignore=ignore_patterns)
-
-            options = Options()
-            options.add_argument("--no-sandbox")
-            options.add_argument(f"--user-data-dir={temp_profile_path}")
-            options.add_argument("--window-size=1280,720")
-            if not DEBUG_MODE:
-                options.add_argument("--headless=new")
-
-            service = Service(CHROMEDRIVER_PATH)
-            dedicated_driver = webdriver.Chrome(service=service, options=options)
+            # 1. Check out a pre-warmed browser from the pool
+            if pool is None:
+                raise RuntimeError("Worker browser pool is closed.")
+            browser = pool.checkout()
+            dedicated_driver = browser.driver
             thread_api = RugplayAPI(dedicated_driver)
-
-            dedicated_driver.get(BASE_URL)
-            WebDriverWait(dedicated_driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            self.after(0, lambda: self.update_status(f"✅ {log_prefix} Worker browser ready. Starting monitoring..."))
-
-            # 2. Monitor for new buyers
-            monitoring_duration = 180
-            new_buyer_found = False
-            initial_holders_data = thread_api.get_token_holders(token_symbol)
-            if 'error' in initial_holders_data:
-                raise Exception(f"API error getting initial holders: {initial_holders_data['error']}")
-
-            target_holder_count = len(initial_holders_data.get('holders', [])) + 1
-
-            for i in range(monitoring_duration):
-                if not self.sniper_bot_active: break
-                current_holders_data = thread_api.get_token_holders(token_symbol)
-                if 'error' in current_holders_data:
-                    time.sleep(1)
-                    continue
-
-                current_holder_count = len(current_holders_data.get('holders', []))
-                time_left = monitoring_duration - i
-                self.after(0, lambda: self.update_status(f"{log_prefix} Monitoring... {time_left}s left | Holders: {current_holder_count}/{target_holder_count}"))
-
-                if current_holder_count >= target_holder_count:
-                    self.after(0, lambda c=current_holder_count: self.update_status(f"✅ {log_prefix} New buyer detected! Holders: {c}."))
-                    new_buyer_found = True
-                    break
-                time.sleep(1)
-
-            if not new_buyer_found:
-                self.after(0, lambda: self.update_status(f"{log_prefix} Monitoring timed out. Selling anyway."))
+            if trace: trace.mark("worker_ready")
+            self.after(0, lambda: self.update_status(f"✅ {log_prefix} Worker browser ready."))
 
             # --- START OF CORRECTED SELL LOGIC ---
-            self.after(0, lambda: self.update_status(f"⏳ {log_prefix} Pausing before sell-off..."))
-            time.sleep(1)
-
-            if not recover_with_hard_reload(dedicated_driver, thread_api, "Preparing for sell-off"): return
+            # release() hands browsers back reset on the home page, so a plain load of the coin page is enough
+            dedicated_driver.get(f"{BASE_URL}/coin/{token_symbol}")
+            WebDriverWait(dedicated_driver, 15).until(EC.element_to_be_clickable((By.XPATH, SELL_TAB_XPATH)))
+            browser_healthy = True
 
             sell_attempt = 0
-            while self.sniper_bot_active and sell_attempt < 10:
+            while self.sniper_bot_active and sell_attempt < SNIPER_MAX_SELL_ATTEMPTS:
                 sell_attempt += 1
+                if trace: trace.mark("sell_attempt")
                 self.after(0, lambda s=sell_attempt: self.update_status(f"{log_prefix} Sell attempt #{s}."))
                 try:
                     sell_tab_button = WebDriverWait(dedicated_driver, 15).until(EC.element_to_be_clickable((By.XPATH, SELL_TAB_XPATH)))
@@ -1137,9 +1313,10 @@ class TradeApp(tk.Tk):
                     elif "Available" in panel_text:
                         self.after(0, lambda: self.update_status(f"{log_prefix} Action: No pool limit. Selling 80%."))
                         available_amount_val = float(available_text.replace(',', ''))
-                        final_amount = math.floor(available_amount_val * 0.80)
+                        final_amount = math.floor(available_amount_val * SNIPER_SELL_FRACTION)
                         if final_amount < 1:
                             self.after(0, lambda: self.update_status(f"{log_prefix} Remainder too small. Ending cycle."))
+                            sold = True
                             break
                         amount_input_element = dedicated_driver.find_element(By.XPATH, AMOUNT_INPUT_XPATH)
                         amount_input_element.clear()
@@ -1148,11 +1325,16 @@ class TradeApp(tk.Tk):
                         raise Exception("Could not find 'Available' or 'Max sellable' text.")
 
                     confirm_button = WebDriverWait(dedicated_driver, 10).until(EC.element_to_be_clickable((By.XPATH, CONFIRM_SELL_BUTTON_XPATH_TEMPLATE.format(token_symbol=token_symbol.lower()))))
+                    sent_at = time.monotonic()
                     dedicated_driver.execute_script("arguments[0].click();", confirm_button)
 
                     outcome_element = WebDriverWait(dedicated_driver, 15).until(EC.visibility_of_element_located((By.XPATH, TRADE_OUTCOME_XPATH)))
                     outcome_text = outcome_element.text
+                    sold_amount = None if "Max sellable" in panel_text else final_amount
+                    self.trade_journal.record(token_symbol, 'SELL', sold_amount, 'ok' if 'successful' in outcome_text.lower() else 'failed',
+                                              worker_name, "sniper", latency=time.monotonic() - sent_at, message=outcome_text)
                     if 'successful' in outcome_text.lower():
+                        if trace: trace.mark("sold")
                         self.after(0, lambda o=outcome_text: self.update_status(f"✅ {log_prefix} Sell successful: '{o}'"))
                         WebDriverWait(dedicated_driver, 10).until(EC.invisibility_of_element_located((By.XPATH, DIALOG_CONTENT_XPATH)))
                         if "Max sellable" in panel_text:
@@ -1160,22 +1342,28 @@ class TradeApp(tk.Tk):
                             time.sleep(1)
                             continue
                         else:
+                            sold = True
                             break
                     else:
                         raise Exception(f"Trade failed with message: '{outcome_text}'")
                 except Exception as e:
                     if not recover_with_hard_reload(dedicated_driver, thread_api, f"Error on sell attempt #{sell_attempt}: {e}"):
-                        return
+                        browser_healthy = False
+                        return False
                     continue
             # --- END OF CORRECTED SELL LOGIC ---
+            return sold
 
         except Exception as e:
             self.after(0, lambda err=e: self.update_status(f"❌ {log_prefix} Worker error: {err}", is_error=True))
+            return False
         finally:
-            if dedicated_driver:
-                dedicated_driver.quit()
-            if temp_profile_path and os.path.exists(temp_profile_path):
-                shutil.rmtree(temp_profile_path, ignore_errors=True)
+            if browser:
+                if browser_healthy:
+                    pool.release(browser)
+                else:
+                    pool.discard(browser)
+            self.trace_recorder.finish(trace)
             self.after(0, lambda: self.update_status(f"🗑️ {log_prefix} Worker finished and cleaned up."))
 
 
@@ -1239,6 +1427,55 @@ class TradeApp(tk.Tk):
             if tree.winfo_exists():
                 tree.insert("", "end", values=(coin.get("symbol", "N/A"), coin.get("name", "N/A"), readable_date))
 
+    def _toggle_timings_window(self):
+        if self.timings_window and self.timings_window.winfo_exists():
+            self._on_window_close(self.timings_window, 'timings_window')
+            return
+
+        win = tk.Toplevel(self)
+        self.timings_window = win
+        win.title("Snipe Stage Timings")
+        win.geometry("900x400")
+        win.protocol("WM_DELETE_WINDOW", lambda: self._on_window_close(win, 'timings_window'))
+
+        tree_frame = ttk.Frame(win)
+        tree_frame.pack(expand=True, fill="both", padx=10, pady=10)
+
+        cols = ("Stage", "Count", "p50 (ms)", "p99 (ms)", "Max (ms)", "Histogram")
+        tree = ttk.Treeview(tree_frame, columns=cols, show='headings')
+        for col in cols: tree.heading(col, text=col)
+        for col in cols[1:5]: tree.column(col, width=70, anchor="e")
+        tree.column("Stage", width=230)
+        tree.column("Histogram", width=380)
+        tree.pack(side="left", expand=True, fill="both")
+
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+        vsb.pack(side='right', fill='y')
+        tree.configure(yscrollcommand=vsb.set)
+
+        def refresh_data():
+            for i in tree.get_children(): tree.delete(i)
+            labels = self.trace_recorder.histogram_labels()
+            for transition, count, p50, p99, worst, histogram in self.trace_recorder.summary():
+                buckets = " ".join(f"{label}:{n}" for label, n in zip(labels, histogram) if n)
+                tree.insert("", "end", values=(transition, count, f"{p50:.1f}", f"{p99:.1f}", f"{worst:.1f}", buckets))
+
+        def export_data():
+            path = filedialog.asksaveasfilename(parent=win, defaultextension=".json",
+                                                initialfile=os.path.basename(SNIPE_TRACE_EXPORT_PATH),
+                                                initialdir=os.path.dirname(SNIPE_TRACE_EXPORT_PATH))
+            if not path: return
+            try:
+                self.update_status(f"Snipe timings exported to {self.trace_recorder.export(path)}")
+            except OSError as e:
+                self.update_status(f"Could not export snipe timings: {e}", is_error=True)
+
+        button_frame = ttk.Frame(win)
+        button_frame.pack(pady=5)
+        ttk.Button(button_frame, text="Refresh", command=refresh_data).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Export...", command=export_data).pack(side=tk.LEFT, padx=5)
+        refresh_data()
+
     def _toggle_log_history_window(self):
         if self.history_window and self.history_window.winfo_exists():
             self.history_window.destroy()
@@ -1260,7 +1497,8 @@ class TradeApp(tk.Tk):
         vsb.pack(side="right", fill="y")
         log_text.pack(side="left", fill="both", expand=True)
 
-        for entry in self.log_history: log_text.insert(tk.END, entry + "\n")
+        tail_start = max(len(self.log_history) - LOG_HISTORY_WINDOW_LINES, 0)
+        log_text.insert(tk.END, "".join(entry + "\n" for entry in itertools.islice(self.log_history, tail_start, None)))
         log_text.see(tk.END)
         log_text.config(state=tk.DISABLED)
         self.log_text_widget = log_text
@@ -1293,12 +1531,25 @@ class TradeApp(tk.Tk):
         """Handles proper shutdown of Selenium and Tkinter."""
         self.sniper_bot_active = False
         self.random_bot_active = False
+        if self.session_monitor:
+            self.session_monitor.stop()
+        if self.random_bot_engine:
+            self.random_bot_engine.stop()
+        if self.sniper_engine:
+            self.sniper_engine.stop()
+        if self.worker_pool:
+            self.worker_pool.close()
+        if self.api:
+            self.api.close()
+        self.coin_index.close()
         if self.selenium_driver:
             print("[INFO] Quitting Selenium driver...")
             if self.api.is_browser_open():
                 self.selenium_driver.quit()
             self.selenium_driver = None
         print("[INFO] Application closing.")
+        self.trade_journal.close()
+        self.log_sink.close()
         self.destroy()
         sys.exit(0)
 